@@ -18,15 +18,29 @@ class PhysicalObject():
 
     def __init__(self, solver):
         self.geom = {} # The geometry of the component
+        self.geomSI = GeomSnapshot(self.geom) # Values of the geometry in the SI system
         self.pos = np.zeros(3) # Position of the component relative to x0
         self._solver = solver # The solver object
+        self.totalWrench = Wrench(solver) # Sum of the forces, updated in place
 
     def getTotalForce(self):
         """
         Return the force <Force> class holding the force value, and the application point
         """
+        return self.getTotalWrench().toForce()
+
+    def addTotalForce(self, wrench):
+        """
+        Add the forces exerced on this object to the Wrench <wrench>
+        """
         raise Exception("Not implemented!")
 
+    def getTotalWrench(self):
+        """
+        Return the sum of the forces exerced on this object (Wrench updated in place)
+        """
+        return self.addTotalForce(self.totalWrench.reset())
+
     def getInertia(self):
         """
         Return the inertia matrix of this object
@@ -46,6 +60,7 @@ class PhysicalObject():
         """
         for key in geom:
             self.geom[key] = geom[key]
+        self.geomSI = GeomSnapshot(self.geom, self.geomSI)
             
         # Then update the dependencies (may update the cdg!)
         self.updateGeomDependecies()
@@ -87,14 +102,21 @@ class PhysicalObject():
         """
         self.gravityForce = Force(Vector(self._solver, PHY_G_VECTOR*self.getWeight(), Base.SEA), self.getCdg())
 
+    def getGeomSI(self):
+        """
+        Return the snapshot of the geometry in the SI system (see GeomSnapshot)
+        """
+        return self.geomSI
+
     def getGeomP(self, name):
         """
-        Return the value of the geometric parameter named 'name'
+        Return the value of the geometric parameter named 'name' (SI system)
         """
-        return Units.toSI(self.geom[name]['value'], self.geom[name]['unit'])
+        return self.geomSI.values[name]
     
     def setGeomP(self, name, value):
         """
         Set the value of a geometry parameter
         """
-        self.geom[name]['value'] = value
\ No newline at end of file
+        self.geom[name]['value'] = value
+        self.geomSI = GeomSnapshot(self.geom, self.geomSI)
\ No newline at end of file
@@ -58,6 +58,16 @@ class Wind():
         Return the wind velocity vector relative to the sea
         """
         return Vector(self._solver, self.wind, Base.SEA)
+
+    def getSpeedVecs(self, angs, speeds):
+        """
+        Return the wind velocity vectors (N, 3) relative to the sea (sea base) for N wind
+        angles and speeds (see update)
+        """
+        winds = np.zeros((len(angs), 3))
+        winds[:,0] = speeds*np.cos(angs)
+        winds[:,1] = -speeds*np.sin(angs)
+        return winds
     
     def getGeom(self):
         """
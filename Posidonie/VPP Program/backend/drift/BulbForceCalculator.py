@@ -44,6 +44,31 @@ class BulbForceCalculator():
 
         return Force(Vector(self._solver, np.array([Fx, Fy, 0]), Base.BOAT), Moment(Vector(self._solver, np.array([0, 0, Mz]), Base.BOAT)))
     
+    def getForces(self, bulbUVecs):
+        """
+        Return the water forces (N, 3) exerced to the keel's bulb of N boats in the boat base,
+        giving the water velocities at the bulb center (N, 3) in the boat base (see getForce, no moment)
+        """
+        bulbVol = self._solver.getDrift().getLestVolume()
+        bulbUNorm = np.linalg.norm(bulbUVecs, axis=1)
+        moving = bulbUNorm > 0
+
+        # Incidence angle, in [-pi, pi]
+        i = np.zeros(len(bulbUNorm))
+        i[moving] = np.arctan2(-bulbUVecs[moving,1], bulbUVecs[moving,0])
+
+        # Same model as getXYM (no lift)
+        V0 = 0.64*0.001
+        u0 = 2
+        f0 = 3
+        FxCase = f0*((bulbVol/V0)**(2/3))*(bulbUNorm/u0)**2
+        FxCase[i < 0] *= -1
+
+        forces = np.zeros((len(bulbUNorm), 3))
+        forces[:,0] = np.cos(i)*FxCase
+        forces[:,1] = -np.sin(i)*FxCase
+        return forces
+
     def getXYM(self, V, i, u):
         """
         Return the force for an incidence i; a bulb volume V; and a water speed u
@@ -46,6 +46,7 @@ class Drift(PhysicalObject):
 
         # Compute the center of effort
         self.computeDefaultCenterOfEffort()
+        self.computeSections()
 
         # Verify than Ld is possible
         dd = np.tan(self.getGeomP('gd')) * self.getGeomP('hd')
@@ -76,14 +77,14 @@ class Drift(PhysicalObject):
         return [poly]
     
 
-    def getTotalForce(self):
+    def addTotalForce(self, wrench):
         """
         Forces exerced on {drift}:
             - Hydrodynamic
             - Gravity
             - Buoyency
         """
-        return self.getGravityForce() + self.getBuoyencyForce() + self.getHydrodynamicForce() + self.getBulbForce()
+        return wrench.add(self.getGravityForce()).add(self.getBuoyencyForce()).add(self.getHydrodynamicForce()).add(self.getBulbForce())
     
     def getPlateVolume(self):
         """
@@ -186,7 +187,13 @@ class Drift(PhysicalObject):
         """
         Compute the hydrodynamic force on this object
         """
-        self.hydroForce = self._solver.getNACACalculator().getFluidForce(self.linepf, self.lengthpf, Fluids.WATER, Referential.BOAT,  Referential.SEA, self.getGeomP('profile'))
+        self.hydroForce = self._solver.getNACACalculator().getFluidForce(self.sections, Fluids.WATER, Referential.BOAT,  Referential.SEA, self.getGeomP('profile'))
+
+    def computeSections(self):
+        """
+        Compute the table of sections of the drift (see NACACalculator.getSections)
+        """
+        self.sections = self._solver.getNACACalculator().getSections(self.linepf, self.lengthpf)
 
     def linepf(self, t):
         """
@@ -279,6 +286,21 @@ class Drift(PhysicalObject):
     def getBulbForce(self):
         return self.bulbForce
 
+    def addTotalForces(self, wrenches, batch):
+        """
+        Add the forces exerced on this object to the sums of forces <wrenches> of a batch
+        of boats (see addTotalForce and Solver.batchF)
+        """
+        fluidV = -self._solver.getBatchVelocities(batch, self.sections[0], Referential.BOAT, Referential.SEA, Base.BOAT)
+        forces, moments = self._solver.getNACACalculator().getFluidForces(self.sections, Fluids.WATER, fluidV, batch['P'](Base.BOAT, Base.BOAT), self.getGeomP('profile'))
+
+        # Bulb (no moment, see BulbForceCalculator.getForce)
+        bulbUVecs = -self._solver.getBatchVelocities(batch, self.getCdgLest().getPt()[None,:], Referential.BOAT, Referential.SEA, Base.BOAT)[:,0]
+        bulbForces = self.bulbForceCalculator.getForces(bulbUVecs)
+
+        wrenches.add(self.getGravityForce()).add(self.getBuoyencyForce())
+        return wrenches.addForces(forces, Base.BOAT, moments, Base.BOAT).addForces(bulbForces, Base.BOAT, np.zeros(3), Base.BOAT)
+
     def compute(self):
         """
         Compute the force on this component for the current step
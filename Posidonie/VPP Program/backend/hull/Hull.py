@@ -117,6 +117,18 @@ class Hull(PhysicalObject):
         """
         self.hydroAeroForce = self.hullHydroCalculator.getForce()
     
+    def addTotalForces(self, wrenches, batch):
+        """
+        Add the forces exerced on this object to the sums of forces <wrenches> of a batch
+        of boats (see addTotalForce and Solver.batchF)
+        """
+        buoyencyForces, cdcs = self.hullBuoyencyCalculator.getForces(batch['ang'], batch['pos'])
+        buoyencyMoments = np.cross(cdcs, np.einsum('nij,nj->ni', batch['P'](Base.SEA, Base.BOAT), buoyencyForces))
+        dragForces = self.hullHydroCalculator.getForces(batch['speed'], batch['ang'][:,-1])
+
+        wrenches.add(self.getGravityForce())
+        return wrenches.addForces(buoyencyForces, Base.SEA, buoyencyMoments, Base.BOAT).addForces(dragForces, Base.SEA, np.zeros(3), Base.SEA)
+
     def compute(self):
         """
         Compute the force on this component for the current step
@@ -131,7 +143,7 @@ class Hull(PhysicalObject):
         """
         return self.hydroAeroForce
     
-    def getTotalForce(self):
+    def addTotalForce(self, wrench):
         """
         Forces exerced on {hull}:
             - Aerodynamic
@@ -139,7 +151,7 @@ class Hull(PhysicalObject):
             - Buoyency
             - Gravity
         """
-        return self.getGravityForce() + self.getBuoyencyForce() + self.getHydroAeroForce()
+        return wrench.add(self.getGravityForce()).add(self.getBuoyencyForce()).add(self.getHydroAeroForce())
 
     def getBottomHullCoord(self, alpha):
         """
@@ -1,6 +1,5 @@
 import meshlib.mrmeshpy as mr
 import meshlib as mm
-import matplotlib.pyplot as plt
 import json
 
 import sys
@@ -11,7 +10,6 @@ sys.path.insert(0, str(_parentdir))
 sys.path.insert(0, str(_2parentdir))
 
 from config.Config import *
-from frontend.simu.Boat import *
 from backend.hull.InputModel import *
 from utils.Utils import *
 from utils.Force import *
@@ -360,8 +358,29 @@ class HullBuoyencyCalculator():
         The center of buoyency is exprimed in the boat referential
         The force is exprimed in the sea referential
         """
-        ang = self._solver.getBoatAng()
-        z = -self._solver.getBoatPos()[2]
+        value = self.getValueOfState(self._solver.getBoatAng(), self._solver.getBoatPos())
+
+        vol = value[0]
+        cdc = value[1:]
+
+        return Force(Vector(self._solver, -vol*PHY_G_VECTOR*PHY_RHO_SWATER, Base.SEA), 
+                     Point(self._solver, cdc, Referential.BOAT))
+
+    def getForces(self, angs, poss):
+        """
+        Return the buoyency forces (N, 3) exerced on the hull of N boats in the sea base and the
+        centers of buoyency (N, 3) in the boat referential, giving the angles (N, 3) and the positions (N, 3)
+        of the boats (see getForce). The model is interpolated boat per boat
+        """
+        values = np.array([self.getValueOfState(ang, pos) for ang, pos in zip(angs, poss)])
+        return -values[:,0,None]*PHY_G_VECTOR*PHY_RHO_SWATER, values[:,1:]
+
+    def getValueOfState(self, ang, pos):
+        """
+        Return the [volume, center of buoyency] of the hull at the angles <ang> and the position <pos>
+        of the boat. The angles out of the model are bounded (warning of the solver)
+        """
+        z = -pos[2]
         # z is the sea level, thus opposed to the boat altitude
 
         roll = ang[ROLL_AXIS]
@@ -390,13 +409,7 @@ class HullBuoyencyCalculator():
         We use an LINEAR interpalation between the 3D input:
         roll, pitch, z
         """
-        value = self.getValueAt(roll, pitch, z)
-
-        vol = value[0]
-        cdc = value[1:]
-
-        return Force(Vector(self._solver, -vol*PHY_G_VECTOR*PHY_RHO_SWATER, Base.SEA), 
-                     Point(self._solver, cdc, Referential.BOAT))
+        return self.getValueAt(roll, pitch, z)
     
     def getValueAt(self, aroll, pitch, z):
         """
@@ -443,12 +456,15 @@ class HullBuoyencyCalculator():
             print(e)
             print("[ERROR] - Impossible to load buoyency model file")
             self.model = {}
+            self.modelDigest = None
             self.cdg = np.zeros(3)
             self.imergedVol = 0
             self.box = {'max':np.ones(3),
                         'min':np.zeros(3)}
             return
 
+        self.modelDigest = getFileDigest(path)
+
         # Then convert the keys as float
         rawModel = fileModel['buoyencyMod']
         self.box = {'max':np.array(fileModel['box']['max']),
@@ -469,6 +485,12 @@ class HullBuoyencyCalculator():
                     self.model[float(roll)][float(pitch)][float(z)] = np.array([fvalue['vol']]+fvalue['cdc'])
 
 
+    def getModelDigest(self):
+        """
+        Return the digest of the loaded model file (None if no model is loaded)
+        """
+        return getattr(self, 'modelDigest', None)
+
     def getCdG(self):
         """
         Return the position of the center of gravity
@@ -78,4 +78,21 @@ class HullHydroCalculator():
         dragZ = - self.alphaZ * speedZ
 
         drag = Vector(self._solver, np.array([dragXY[0], dragXY[1], dragZ]), Base.SEA)
-        return Force(drag, Moment(Vector(self._solver, np.zeros(3), Base.SEA)))
\ No newline at end of file
+        return Force(drag, Moment(Vector(self._solver, np.zeros(3), Base.SEA)))
+
+    def getForces(self, speeds, boatHeadings):
+        """
+        Return the hydrodynamic forces (N, 3) exerced on the hull of N boats in the sea base (see getForce, no moment),
+        giving the speeds of the boats (N, 3) in the sea base and their headings (N,)
+        """
+        u_longi = np.stack((np.cos(boatHeadings), -np.sin(boatHeadings)), axis=1)
+        u_lat = np.stack((-u_longi[:,1], u_longi[:,0]), axis=1)
+
+        v_longi = np.sum(speeds[:,:2]*u_longi, axis=1)
+        v_lat   = np.sum(speeds[:,:2]*u_lat, axis=1)
+
+        drag = np.empty((len(speeds), 3))
+        drag[:,:2]  = -u_longi*(self.longiDrag(np.abs(v_longi))*np.sign(v_longi))[:,None]
+        drag[:,:2] -= u_lat*(self.alphaLat*self.longiDrag(np.abs(v_lat))*np.sign(v_lat))[:,None]
+        drag[:,2] = - self.alphaZ * speeds[:,2]
+        return drag
\ No newline at end of file
@@ -1,8 +1,9 @@
 
 from enum import Enum
 import csv
-import matplotlib.pyplot as plt
+import hashlib
 import time
+import os
 
 import sys
 import pathlib
@@ -42,6 +43,9 @@ class Fluids(Enum):
         
         raise Exception(f"Unknow rho value for {str(fluid)}")
 
+# Arrays of the cache folder of a profile (besides its key)
+NACA_CACHE_ARRAYS = ['angles', 'FWing', 'ang0', 'step', 'values', 'error', 'tableError']
+
 class NACACalculator():
     def __init__(self, solver):
         """
@@ -49,15 +53,34 @@ class NACACalculator():
         """
         self._solver = solver
         self.load()
+        self.setQuadrature(Quadrature(NACA_QUADRATURE), NACA_QUADRATURE_NODES)
 
-    def getFluidForce(self, linepf, lengthpf, fluidType, refComp, refFluid, profileType):
+    def getModelDigest(self):
         """
-        Compute the fuild force exerced by a fluid of type <fluidType> on a section
-        All the origin point of the NACA section (i.e. point with the same position 
-        as in COMSOL), are given by the parametric function linepf:
-            x = linepf(t),   for 0 <= t <= 1
-        The length of those section are givent by the paremetric function lengthpf:
-            lentth = lengthpf(t), for 0 <= t <= 1
+        Return the digest of the NACA model
+        """
+        return self.modelDigest
+
+    def setQuadrature(self, method, n):
+        """
+        Set the quadrature used to integrate the forces along the wings (<method> with n nodes)
+        The tables of sections of the components must then be rebuilt (see Solver.setQuadrature)
+        """
+        self.quadrature = (method, n)
+        self.quadNodes, self.quadWeights = getQuadrature(method, n)
+        # The forces depend on the quadrature
+        self.modelDigest = hashlib.sha256(str([self.profilesDigest, method.value, len(self.quadNodes)]).encode()).hexdigest()
+
+    def getQuadrature(self):
+        """
+        Return the quadrature used to integrate the forces along the wings: (method, number of nodes)
+        """
+        return self.quadrature
+
+    def getFluidForce(self, sections, fluidType, refComp, refFluid, profileType):
+        """
+        Compute the fuild force exerced by a fluid of type <fluidType> on a wing
+        The wing is given by its table of sections (see getSections), built once per geometry
 
         refComp    : referential of the wing
         refFluid   : referential of the fluid
@@ -73,32 +96,90 @@ class NACACalculator():
             raise TypeError("Field <refComp> of NACACalculator must be a Referential object")
         
 
-        zeroVector = Vector(self._solver, np.zeros(3), getBaseFomRef(refComp))
-        fluidForce = Force(zeroVector, Moment(zeroVector))
+        baseComp = getBaseFomRef(refComp)
+        pts, lengths, dz = sections
 
-        # perform the integration
-        lastPoint = linepf(0)
-        for t in np.linspace(0, 1, 10):
+        # fluid velocity of all the sections, in the base of the wing
+        fluidV = -PointSpeed.getVelocities(self._solver, pts, Referential.BOAT, refComp, refFluid, baseComp)
+        speed = np.linalg.norm(fluidV, axis=1)
+        # The fluid speed only correspond to the xy plane
+        fspeed2 = fluidV[:,0]**2 + fluidV[:,1]**2
 
-            # compute the section's center coordinate
-            center = linepf(t)
+        # incidence angle of each section (the sections without fluid speed have no force)
+        moving = speed > 0
+        ang = np.zeros(len(speed))
+        ang[moving] = np.arctan2(-fluidV[moving,1], fluidV[moving,0])
+        ang = np.pi + ang
+        ang[ang > np.pi] -= 2*np.pi
 
-            # compute the section height:
-            dz = np.abs((center-lastPoint).valueIn(refComp)[2])
+        # f = 0.5*rhof*length*dz*[Cx,Cy]*u^2
+        scale = np.where(moving, lengths*dz*Fluids.getRho(fluidType)*fspeed2, 0)
+        forces = self.interpolateNACAs(ang, profileType)*scale[:,None]
 
-            # compute the elementary fluid force and sum it
-            fluidForce += self.getElementaryFluidForce(center, lengthpf(t), dz, refComp, refFluid, fluidType, profileType)
+        # Moment at the origin of the boat: sum of OP^f, in the boat base
+        forcesBoat = forces.dot(getPassageMatrix(self._solver, baseComp, Base.BOAT).T)
+        moment = np.cross(pts, forcesBoat).sum(axis=0)
 
-            lastPoint = center
+        return Force(Vector(self._solver, forces.sum(axis=0), baseComp),
+                     Moment(Vector(self._solver, moment, Base.BOAT)))
 
-        return fluidForce
+    def getFluidForces(self, sections, fluidType, fluidV, compToBoat, profileType):
+        """
+        Compute the fluid force exerced by a fluid of type <fluidType> on a wing for N boats (see getFluidForce)
+            - fluidV     : (N, P, 3) velocity of the fluid at the P sections, in the base of the wing
+            - compToBoat : (N, 3, 3) passing matrices from the base of the wing to the boat base
+        Return the forces (N, 3) in the base of the wing and their moments at the origin of the boat (N, 3) in the boat base
+        """
+        if not isinstance(fluidType, Fluids):
+            raise TypeError("Field <fluidType> of NACACalculator must be a Fluid object")
 
+        pts, lengths, dz = sections
+        speed = np.linalg.norm(fluidV, axis=2)
+        # The fluid speed only correspond to the xy plane
+        fspeed2 = fluidV[...,0]**2 + fluidV[...,1]**2
+
+        # incidence angle of each section (the sections without fluid speed have no force)
+        moving = speed > 0
+        ang = np.zeros(speed.shape)
+        ang[moving] = np.arctan2(-fluidV[...,1][moving], fluidV[...,0][moving])
+        ang = np.pi + ang
+        ang[ang > np.pi] -= 2*np.pi
 
-    def getElementaryFluidForce(self, pos, length, dz, refComp, refFluid, fluidType, profileType):
+        # f = 0.5*rhof*length*dz*[Cx,Cy]*u^2
+        scale = np.where(moving, lengths*dz*Fluids.getRho(fluidType)*fspeed2, 0)
+        forces = self.interpolateNACAs(ang.ravel(), profileType).reshape(fluidV.shape)*scale[...,None]
+
+        # Moment at the origin of the boat: sum of OP^f, in the boat base
+        forcesBoat = np.einsum('nij,npj->npi', compToBoat, forces)
+        moments = np.cross(pts, forcesBoat).sum(axis=1)
+        return forces.sum(axis=1), moments
+
+    def getSections(self, linepf, lengthpf):
+        """
+        Return the table of sections of a wing. All the origin point of the NACA section
+        (i.e. point with the same position as in COMSOL), are given by the parametric function linepf:
+            x = linepf(t),   for 0 <= t <= 1
+        The length of those section are givent by the paremetric function lengthpf:
+            lentth = lengthpf(t), for 0 <= t <= 1
+        The table is:
+            - pts    : (N, 3) array of the section's center coordinates (boat referential)
+            - lengths: (N,) array of the section's length
+            - dz     : (N,) array of the section's height
+        The sections are the nodes of the quadrature (see setQuadrature)
+        """
+        pts = np.array([linepf(t).valueIn(Referential.BOAT) for t in self.quadNodes])
+        lengths = np.array([lengthpf(t) for t in self.quadNodes], dtype=float)
+        # The wings only rotate around z: the height is the same in the boat and wing referentials.
+        # z is linear in t, the height of a section is its weight times the height of the wing
+        dz = self.quadWeights*np.abs(linepf(1).valueIn(Referential.BOAT)[2] - linepf(0).valueIn(Referential.BOAT)[2])
+        return pts, lengths, dz
+
+    def getElementaryFluidForce(self, pos, length, dz, refComp, refFluid, fluidType, profileType, fluidV=None):
         """
         Return an elementary force exerced on a section located in <pos>
         <refComp> : referential of the wing
         <refFluid>: referential of the fluid
+        <fluidV>  : velocity of the fluid at <pos> in the base of refComp (None: computed)
         """
         #zeroVector = Vector(self._solver, np.zeros(3), Base.BOAT)
         #return Force(zeroVector, Moment(zeroVector))
@@ -107,7 +188,8 @@ class NACACalculator():
         # we assume that the component velocity is equal to the boat velocity!
 
         # compute   V (pos, refComp/refFluid)
-        fluidV = -PointSpeed.getVelocity(self._solver, pos, refComp, refFluid).getSpeed().valueIn(getBaseFomRef(refComp))
+        if (fluidV is None):
+            fluidV = -PointSpeed.getVelocity(self._solver, pos, refComp, refFluid).getSpeed().valueIn(getBaseFomRef(refComp))
         #fluidV = np.array([1.0,0,0])
         speed = np.linalg.norm(fluidV)
         # The fluid speed only correspond to the xy plane
@@ -165,9 +247,7 @@ class NACACalculator():
         # Pang ,Fang = getFraming(self.model[fluidType.value], angAbs)
         # Fxym = interpolDXXV(self.model[fluidType.value], Pang ,Fang, angAbs)
 
-        Fxym = [self.polyModel[profileType]['x'](angAbs),
-                self.polyModel[profileType]['y'](angAbs),
-                self.polyModel[profileType]['z'](angAbs)]
+        Fxym = self.lookupTable(np.array([angAbs]), profileType)[0]
 
         # Return Fx, Fy and Mz
         if (ang < 0):
@@ -176,47 +256,168 @@ class NACACalculator():
             return Fxym[0], Fxym[1], Fxym[2]
         
 
+    def interpolateNACAs(self, angs, profileType):
+        """
+        Return the simulated [Fx, Fy, Mz] values (N, 3) for the N incidence angles <angs> (see interpolateNACA)
+        """
+        if (profileType not in self.model):
+            raise Exception("Unknow profile type: "+str(profileType)+" for NACA model")
+        
+        if np.any(angs < -np.pi) or np.any(angs > np.pi):
+            raise Exception('i out of bound!')
+        
+        # symetry on the incidence angle
+        Fxym = self.lookupTable(np.abs(angs), profileType)
+        Fxym[angs < 0, 1:] *= -1
+        return Fxym
+
     def load(self):
         """
-        Load the NACA model file
+        Load the NACA model files. The processed model of each profile is cached in a folder
+        of .npy files next to its model file (memory-mapped when loaded), rebuilt when the model file or the simulation parameters change
         """
         self.model = {}
-        rhoSimuled = Fluids.getRho(Fluids.fromName(fluidSimuled))
+        self.table = {}
+        # Digest of the model: simulation parameters and content of the model files
+        digest = hashlib.sha256(str([modelPrefix, fluidSimuled, slength, speedSimu, profileTypesSimuled, NACA_TABLE_STEP]).encode())
+        for profileType in profileTypesSimuled:
+            digest.update(getFileDigest(PATH_NACA_SIMU_FOLDER + modelPrefix + profileType + ".csv").encode())
+        self.profilesDigest = digest.hexdigest()
 
         for profileType in profileTypesSimuled:
-            self.model[profileType] = {}
-            
-            with open(PATH_NACA_SIMU_FOLDER + modelPrefix + profileType + ".csv", newline='') as csvfile:
-                csvReader = csv.reader(csvfile, delimiter=',')
-                for row in csvReader:
-                    if (len(row[0]) > 0) and (row[0][0] == '%'):
-                        continue
-                    Fxyz = np.array([float(r) for r in row[1:]])
-                    # Remove the simulation speed, section length, and fluid volumic mass
-                    Fxyz = Fxyz/(slength*rhoSimuled*speedSimu**2)
-
-                    FxFluid = Fxyz[0]
-                    FyFluid = Fxyz[1]
-                    MzFluid = Fxyz[2]
-
-                    # The incidence angle must be in rad
-                    i = np.deg2rad(float(row[0]))
-                    
-                    # Then we move Fx, Fy back to the wing referential
-                    FxWing = FxFluid*np.cos(i) + FyFluid*np.sin(i)
-                    FyWing = FyFluid*np.cos(i) - FxFluid*np.sin(i)
-
-                    # save
-                    self.model[profileType][i] = np.array([FxWing, FyWing, MzFluid])
-            
-            # then, create the poly interpolation for fast computing
-            self.polyModel = {}
-            for profile in self.model:
-                angles = sorted(self.model[profile].keys())
-                FWing = np.array([self.model[profile][a] for a in angles])
-                self.polyModel[profile] = {'x':np.poly1d(np.polyfit(angles, FWing[:,0], 15)),
-                                         'y':np.poly1d(np.polyfit(angles, FWing[:,1], 15)),
-                                         'z':np.poly1d(np.polyfit(angles, FWing[:,2], 10))}
+            self.loadProfile(profileType)
+
+    def loadProfile(self, profileType):
+        """
+        Load the model and the lookup table of a profile, from its cache if it is up to date
+        """
+        path = PATH_NACA_SIMU_FOLDER + modelPrefix + profileType + ".csv"
+        cachePath = PATH_NACA_SIMU_FOLDER + modelPrefix + profileType + NACA_CACHE_EXT
+        key = hashlib.sha256(str([NACA_CACHE_VERSION, fluidSimuled, slength, speedSimu, NACA_TABLE_STEP,
+                                  getFileDigest(path)]).encode()).hexdigest()
+
+        cache = self.loadCache(cachePath, key)
+        if (cache != None):
+            self.model[profileType] = dict(zip(cache['angles'], cache['FWing']))
+            self.table[profileType] = {'ang0':float(cache['ang0']),
+                                       'step':float(cache['step']),
+                                       # ndarray view of the mapped file: faster indexing than a memmap
+                                       'values':cache['values'].view(np.ndarray),
+                                       'error':cache['error'],
+                                       'tableError':cache['tableError']}
+        else:
+            self.model[profileType] = self.readModelFile(path)
+            self.buildTable(profileType)
+            self.saveCache(cachePath, key, profileType)
+
+        error = self.table[profileType]['error']
+        tableError = self.table[profileType]['tableError']
+        print("[INFO] - NACA table {}: {} angles, relative leave-one-out error of the model interpolation Fx {:.1e}, Fy {:.1e}, Mz {:.1e}, relative error of the table Fx {:.1e}, Fy {:.1e}, Mz {:.1e}".format(
+            profileType, len(self.table[profileType]['values']), error[0], error[1], error[2], tableError[0], tableError[1], tableError[2]))
+
+    def readModelFile(self, path):
+        """
+        Return the model {incidence angle: [Fx, Fy, Mz] in the wing basis} of a model file (COMSOL)
+        """
+        model = {}
+        rhoSimuled = Fluids.getRho(Fluids.fromName(fluidSimuled))
+        with open(path, newline='') as csvfile:
+            csvReader = csv.reader(csvfile, delimiter=',')
+            for row in csvReader:
+                if (len(row[0]) > 0) and (row[0][0] == '%'):
+                    continue
+                Fxyz = np.array([float(r) for r in row[1:]])
+                # Remove the simulation speed, section length, and fluid volumic mass
+                Fxyz = Fxyz/(slength*rhoSimuled*speedSimu**2)
+
+                FxFluid = Fxyz[0]
+                FyFluid = Fxyz[1]
+                MzFluid = Fxyz[2]
+
+                # The incidence angle must be in rad
+                i = np.deg2rad(float(row[0]))
+                
+                # Then we move Fx, Fy back to the wing referential
+                FxWing = FxFluid*np.cos(i) + FyFluid*np.sin(i)
+                FyWing = FyFluid*np.cos(i) - FxFluid*np.sin(i)
+
+                # save
+                model[i] = np.array([FxWing, FyWing, MzFluid])
+        return model
+
+    def loadCache(self, cachePath, key):
+        """
+        Return the arrays of the cache folder of a profile (memory-mapped, read only),
+        or None if it is missing or outdated
+        """
+        try:
+            if (str(np.load(os.path.join(cachePath, "key.npy"))) != key):
+                return None
+            return {name:np.load(os.path.join(cachePath, name + ".npy"), mmap_mode='r') for name in NACA_CACHE_ARRAYS}
+        except FileNotFoundError:
+            return None
+        except Exception as e:
+            print("[ERROR] - Impossible to read the NACA cache {}: {}".format(cachePath, e))
+            return None
+
+    def saveCache(self, cachePath, key, profileType):
+        """
+        Save the model and the lookup table of a profile in its cache folder, one .npy file per array.
+        Each file is replaced atomically and the key is written last: an interrupted save is a cache miss
+        """
+        angles = np.array(sorted(self.model[profileType].keys()))
+        arrays = dict(self.table[profileType])
+        arrays['angles'] = angles
+        arrays['FWing'] = np.array([self.model[profileType][a] for a in angles])
+        arrays['key'] = np.array(key)
+        try:
+            os.makedirs(cachePath, exist_ok=True)
+            keyPath = os.path.join(cachePath, "key.npy")
+            if os.path.exists(keyPath):
+                os.remove(keyPath)
+            for name in NACA_CACHE_ARRAYS + ['key']:
+                path = os.path.join(cachePath, name + ".npy")
+                tmpPath = "{}.{}.tmp".format(path, os.getpid())
+                with open(tmpPath, 'wb') as f:
+                    np.save(f, arrays[name])
+                os.replace(tmpPath, path)
+        except Exception as e:
+            print("[ERROR] - Impossible to save the NACA cache {}: {}".format(cachePath, e))
+
+    def buildTable(self, profileType):
+        """
+        Build the lookup table of a profile: [Fx, Fy, Mz] on a uniform grid of incidence
+        angles (step NACA_TABLE_STEP), sampled from the monotone cubic interpolation of
+        the model points. Its accuracy is estimated by:
+            - error     : relative leave-one-out error of the interpolation on the interior model points
+            - tableError: relative error of the table at the middle of its cells (linear lookup)
+        """
+        angles = np.array(sorted(self.model[profileType].keys()))
+        FWing = np.array([self.model[profileType][a] for a in angles])
+        n = int(np.ceil((angles[-1] - angles[0])/NACA_TABLE_STEP)) + 1
+        tableAngs = np.linspace(angles[0], angles[-1], n)
+        self.table[profileType] = {'ang0':angles[0],
+                                   'step':tableAngs[1] - tableAngs[0],
+                                   'values':monotoneCubicInterpolation(angles, FWing, tableAngs)}
+        scale = np.max(np.abs(FWing), axis=0)
+        loo = np.array([monotoneCubicInterpolation(np.delete(angles, j), np.delete(FWing, j, axis=0), angles[j:j+1])[0]
+                        for j in range(1, len(angles) - 1)])
+        self.table[profileType]['error'] = np.max(np.abs(loo - FWing[1:-1]), axis=0)/scale
+        mids = tableAngs[:-1] + self.table[profileType]['step']/2
+        self.table[profileType]['tableError'] = np.max(np.abs(self.lookupTable(mids, profileType) -
+                                                              monotoneCubicInterpolation(angles, FWing, mids)), axis=0)/scale
+
+    def lookupTable(self, angs, profileType):
+        """
+        Return the [Fx, Fy, Mz] values (N, 3) of the lookup table at the N angles angs
+        (linear interpolation between the angles of the table)
+        """
+        table = self.table[profileType]
+        values = table['values']
+        u = np.clip((angs - table['ang0'])/table['step'], 0, len(values) - 1)
+        i = np.minimum(u.astype(int), len(values) - 2)
+        f = (u - i)[:,None]
+        return values[i]*(1 - f) + values[i + 1]*f
 
     def getModelFileAngs(self, fluid):
         """
@@ -240,18 +441,22 @@ class NACACalculator():
         """
         Plot the loaded model
         """
+        # Imported here to keep the solver usable without matplotlib
+        import matplotlib.pyplot as plt
         i = 0
         for fluid in profileTypesSimuled:
             angles = np.array(sorted(self.model[fluid].keys()))
             plt.subplot(1, 2, 2*i+1)
             plt.plot(angles, [self.model[fluid][ang][0] for ang in angles], 'r', label='FxWing for '+fluid)
             plt.plot(angles, [self.model[fluid][ang][1] for ang in angles], 'b', label='FyWing for '+fluid)
-            plt.plot(angles, self.polyModel[fluid]['x'](angles), 'r*')
-            plt.plot(angles, self.polyModel[fluid]['y'](angles), 'b*')
+            tableAngs = np.linspace(angles[0], angles[-1], 1000)
+            tableValues = self.lookupTable(tableAngs, fluid)
+            plt.plot(tableAngs, tableValues[:,0], 'r--')
+            plt.plot(tableAngs, tableValues[:,1], 'b--')
 
             plt.subplot(1, 2, 2*i+2)
             plt.plot(angles, [self.model[fluid][ang][2] for ang in angles], 'r', label='Mz for '+fluid)
-            plt.plot(angles, self.polyModel[fluid]['z'](angles), 'r*')
+            plt.plot(tableAngs, tableValues[:,2], 'r--')
             
             i += 1
             
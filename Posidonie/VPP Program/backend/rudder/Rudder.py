@@ -43,6 +43,15 @@ class Rudder(PhysicalObject):
         # Get the position of the local referentiel depending on alpha and the hull shape
         self.pos = self._solver.getHull().getBottomHullCoord(self.getGeomP('alpha'))
         self.computeBuoyencyForce()
+        self.computeSections()
+
+    def computeSections(self):
+        """
+        Compute the tables of sections of the rudder and the protect rudder (see NACACalculator.getSections)
+        """
+        nacaCalculator = self._solver.getNACACalculator()
+        self.rudderSections = nacaCalculator.getSections(self.rudderLinepf, self.rudderLengthpf)
+        self.protectRudderSections = nacaCalculator.getSections(self.protectRudderLinepf, self.protectRudderLengthpf)
 
     def getPolygons(self):
         polyr = []
@@ -75,14 +84,14 @@ class Rudder(PhysicalObject):
         return [polyr, polyp]
     
 
-    def getTotalForce(self):
+    def addTotalForce(self, wrench):
         """
         Forces exerced on {rudder}:
             - Hydrodynamic
             - Gravity
             - Buoyency
         """
-        return self.getGravityForce() + self.getBuoyencyForce() + self.getHydrodynamicForce()
+        return wrench.add(self.getGravityForce()).add(self.getBuoyencyForce()).add(self.getHydrodynamicForce())
     
     def getMovingSurface(self):
         """
@@ -165,52 +174,45 @@ class Rudder(PhysicalObject):
         mprudder = self.getProtectRudderVolume()*PHY_RHO_PROTECT_RUDDER
         return mrudder + mprudder
     
+    def rudderLinepf(self, t):
+        """
+        Return the position of the rudder profile for a parametrized coordinate t
+        """
+        # the origin of the rudder (rotative part) is the origin of the component
+        return Point(self._solver, self.pos+t*np.array([0, 0, -self.getGeomP('hr')]), Referential.BOAT)
+
+    def rudderLengthpf(self, t):
+        """
+        Return the length of the rudder profile for a parametrized coordinate t
+        """
+        return self.getGeomP('lr')
+
+    def protectRudderLinepf(self, t):
+        """
+        Return the position of the protect rudder profile for a parametrized coordinate t
+        """
+        epsi = self.getGeomP('epsi')
+        lrp = self.getGeomP('lrp')
+        protectRudderOrigin = self.pos + np.array([1, 0, 0])*(epsi*self.getGeomP('lr') + (1-epsi)*lrp)
+        return Point(self._solver, protectRudderOrigin+t*np.array([-(1-epsi)*lrp, 0, -self.getGeomP('hr')]), Referential.BOAT)
+
+    def protectRudderLengthpf(self, t):
+        """
+        Return the length of the protect rudder profile for a parametrized coordinate t
+        """
+        return self.getGeomP('lrp')*(1-t)
+
     def computeRudderHydrodynamicForce(self):
         """
         Compute the Rudder hydrodynamic force
         """
-        # find the postion of the origin of the rudder (rotative part)
-        rudderOrigin = self.pos.copy()
-        lr = self.getGeomP('lr')
-        hr = self.getGeomP('hr')
-        
-        def linepf(t):
-            """
-            Return the position of the profile for a parametrized coordinate t
-            """
-            return Point(self._solver, rudderOrigin+t*np.array([0, 0, -hr]), Referential.BOAT)
-
-        def lengthpf(t):
-            """
-            Return the length of the profile for a parametrized coordinate t
-            """
-            return lr
-
-        self.rudderForce = self._solver.getNACACalculator().getFluidForce(linepf, lengthpf, Fluids.WATER, Referential.RUDDER,  Referential.SEA, self.getGeomP('rProfile'))
+        self.rudderForce = self._solver.getNACACalculator().getFluidForce(self.rudderSections, Fluids.WATER, Referential.RUDDER,  Referential.SEA, self.getGeomP('rProfile'))
     
     def computeProtectRudderHydrodynamicForce(self):
         """
         Compute the Protect Rudder hydrodynamic force
         """
-        epsi = self.getGeomP('epsi')
-        lr = self.getGeomP('lr')
-        hr = self.getGeomP('hr')
-        lrp = self.getGeomP('lrp')
-        protectRudderOrigin = self.pos.copy() + np.array([1, 0, 0])*(epsi*lr + (1-epsi)*lrp)
-        
-        def linepf(t):
-            """
-            Return the position of the profile for a parametrized coordinate t
-            """
-            return Point(self._solver, protectRudderOrigin+t*np.array([-(1-epsi)*lrp, 0, -hr]), Referential.BOAT)
-
-        def lengthpf(t):
-            """
-            Return the length of the profile for a parametrized coordinate t
-            """
-            return lrp*(1-t)
-
-        self.protectRudderForce = self._solver.getNACACalculator().getFluidForce(linepf, lengthpf, Fluids.WATER, Referential.BOAT,  Referential.SEA, self.getGeomP('prProfile'))
+        self.protectRudderForce = self._solver.getNACACalculator().getFluidForce(self.protectRudderSections, Fluids.WATER, Referential.BOAT,  Referential.SEA, self.getGeomP('prProfile'))
         
     def computeHydrodynamicForce(self):
         """
@@ -236,6 +238,20 @@ class Rudder(PhysicalObject):
     def getProtectRudderHydrodynamicForce(self):
         return self.protectRudderForce
 
+    def addTotalForces(self, wrenches, batch):
+        """
+        Add the forces exerced on this object to the sums of forces <wrenches> of a batch
+        of boats (see addTotalForce and Solver.batchF)
+        """
+        nacaCalculator = self._solver.getNACACalculator()
+        fluidV = -self._solver.getBatchVelocities(batch, self.rudderSections[0], Referential.RUDDER, Referential.SEA, Base.RUDDER)
+        rudderForces, rudderMoments = nacaCalculator.getFluidForces(self.rudderSections, Fluids.WATER, fluidV, batch['P'](Base.RUDDER, Base.BOAT), self.getGeomP('rProfile'))
+        fluidV = -self._solver.getBatchVelocities(batch, self.protectRudderSections[0], Referential.BOAT, Referential.SEA, Base.BOAT)
+        protectForces, protectMoments = nacaCalculator.getFluidForces(self.protectRudderSections, Fluids.WATER, fluidV, batch['P'](Base.BOAT, Base.BOAT), self.getGeomP('prProfile'))
+
+        wrenches.add(self.getGravityForce()).add(self.getBuoyencyForce())
+        return wrenches.addForces(rudderForces, Base.RUDDER, rudderMoments, Base.BOAT).addForces(protectForces, Base.BOAT, protectMoments, Base.BOAT)
+
     def compute(self):
         """
         Compute the force on this component for the current step
@@ -46,6 +46,13 @@ class Sail(PhysicalObject):
         """
         # Return the position of the local referentiel depending on alpha and the hull shape
         self.pos = self._solver.getHull().getTopHullCoord(self.getGeomP('alpha'))
+        self.computeSections()
+
+    def computeSections(self):
+        """
+        Compute the table of sections of the sail (see NACACalculator.getSections)
+        """
+        self.sections = self._solver.getNACACalculator().getSections(self.linepf, self.lengthpf)
 
     def getRotationPoint(self):
         """
@@ -78,18 +85,28 @@ class Sail(PhysicalObject):
         """
         Return the weight of this object
         """
-        ssail = (2*self.getGeomP('he') + self.getGeomP('hms'))*self.getGeomP('ls')
-        hsail = 2*self.getGeomP('he') + self.getGeomP('hms') + self.getGeomP('ds')
+        g = self.geomSI.values
+        ssail = (2*g['he'] + g['hms'])*g['ls']
+        hsail = 2*g['he'] + g['hms'] + g['ds']
         return ssail*PHY_RHOS_SAIL + hsail*PHY_RHOL_MAST
     
-    def getTotalForce(self):
+    def addTotalForce(self, wrench):
         """
         Forces exerced on {sail}:
             - Aerodynamic
             - Gravity
         This object must be computed force
         """
-        return self.getGravityForce() + self.getAerodynamicForce()
+        return wrench.add(self.getGravityForce()).add(self.getAerodynamicForce())
+    
+    def addTotalForces(self, wrenches, batch):
+        """
+        Add the forces exerced on this object to the sums of forces <wrenches> of a batch
+        of boats (see addTotalForce and Solver.batchF)
+        """
+        fluidV = -self._solver.getBatchVelocities(batch, self.sections[0], Referential.SAIL, Referential.WIND, Base.SAIL)
+        forces, moments = self._solver.getNACACalculator().getFluidForces(self.sections, Fluids.AIR, fluidV, batch['P'](Base.SAIL, Base.BOAT), self.getGeomP('profile'))
+        return wrenches.add(self.getGravityForce()).addForces(forces, Base.SAIL, moments, Base.BOAT)
     
     def compute(self):
         """
@@ -101,14 +118,15 @@ class Sail(PhysicalObject):
         """
         Return the position of the center of gravity
         """
-        cdg1_z = self.getGeomP('ds') + self.getGeomP('hms') + self.getGeomP('he')/2 + self.getGeomP('he')*self.getGeomP('lambda')
-        cdg1_x = self.getGeomP('ls')*self.getGeomP('epsi') - self.getGeomP('ls')/2
+        g = self.geomSI.values
+        cdg1_z = g['ds'] + g['hms'] + g['he']/2 + g['he']*g['lambda']
+        cdg1_x = g['ls']*g['epsi'] - g['ls']/2
         cdg1 = np.array([cdg1_x, 0, cdg1_z])
 
-        cdg2_z = self.getGeomP('ds') + self.getGeomP('hms') + self.getGeomP('he')/2
+        cdg2_z = g['ds'] + g['hms'] + g['he']/2
         cdg2 = np.array([cdg1_x, 0, cdg2_z])
 
-        cdg = (cdg1*self.getGeomP('he') + cdg2*(self.getGeomP('he') + self.getGeomP('hms')))/(2*self.getGeomP('he') + self.getGeomP('hms'))
+        cdg = (cdg1*g['he'] + cdg2*(g['he'] + g['hms']))/(2*g['he'] + g['hms'])
         cdg += self.pos
 
         return Point(self._solver, cdg, Referential.SAIL)
@@ -120,7 +138,7 @@ class Sail(PhysicalObject):
         """
         Compute the aerodynamic force on this object
         """
-        self.aeroForce = self._solver.getNACACalculator().getFluidForce(self.linepf, self.lengthpf, Fluids.AIR, Referential.SAIL, Referential.WIND, self.getGeomP('profile'))
+        self.aeroForce = self._solver.getNACACalculator().getFluidForce(self.sections, Fluids.AIR, Referential.SAIL, Referential.WIND, self.getGeomP('profile'))
 
     def linepf(self, t):
         """
@@ -0,0 +1,159 @@
+import time as tm
+import json
+import os
+import argparse
+
+import sys
+import pathlib
+_parentdir = pathlib.Path(__file__).parent.parent.resolve()
+_2parentdir = pathlib.Path(__file__).parent.parent.parent.resolve()
+sys.path.insert(0, str(_parentdir))
+sys.path.insert(0, str(_2parentdir))
+
+from config.Config import *
+from utils.Utils import *
+from backend.solver.Solver import *
+from backend.solver.EDOSolver import *
+from backend.solver.Navigator import *
+from backend.solver.ResultCache import *
+from backend.solver.Profiler import *
+
+"""
+    Headless batch runner: run the simulation of App save files without any GUI
+    Usage (from the 'VPP Program' folder):
+        python -m backend.solver.BatchRunner save1.json [save2.json ...] [options]
+"""
+
+def loadSaveFile(path):
+    """
+    Return the save dictionnary of an App save file
+    """
+    with open(path, 'r') as f:
+        return json.load(f)
+
+def getSaveFinalTime(save):
+    """
+    Return the duration of the target functions of a save
+    """
+    editors = save['navController']['editors']
+    return max([editors[tname]['fct']['tf'] for tname in editors])
+
+def buildSolvers(geom, modelPath, TFct=None):
+    """
+    Return a solver and an EDO solver built from:
+        - geom     : geometry dictionnary (missing parameters are set to default)
+        - modelPath: buoyency model file
+        - TFct     : target function of the navigator (None: constant default target)
+    """
+    solver = Solver()
+    solver.getHull().loadBuoyencyModel(modelPath)
+    solver.updateGlobalGeom(fillMissingGeom(geom))
+
+    navigator = solver.getNavigator()
+    if (TFct != None):
+        navigator.setTargetFct(TFct)
+
+    edoSolver = EDOSolver(solver.getX0(),
+                          solver.F,
+                          navigator.Fu,
+                          navigator.T,
+                          navigator.getS0(),
+                          navigator.getU0(),
+                          navigator.getEpsi0())
+    return solver, edoSolver
+
+def buildSolversFromSave(save, modelPath=None):
+    """
+    Return a solver and an EDO solver built from an App save dictionnary:
+        - the geometry of the geometry editor
+        - the buoyency model of the hull buoyency editor (or modelPath if != None)
+        - the target functions of the navigation controller
+    """
+    if (modelPath == None):
+        modelPath = save['hullBuoyencyEditor']['modelpath']
+    editors = save['navController']['editors']
+    return buildSolvers(deserializeGeom(save['geomEditor']['geom']),
+                        modelPath,
+                        buildTargetFct({tname:editors[tname]['fct']['str'] for tname in editors}))
+
+def runSave(path, outPath, tf=None, dt=DEFAULT_DT_SIM, method=IntegrationMethod.RK4, hold=False, modelPath=None, log=False, checkpoint=False, resume=False, stopCapsize=False, cache=True, profile=False):
+    """
+    Run the simulation of an App save file and write the results in a simulation file
+    (the format loaded by Run). If tf == None, the duration of the target functions is used.
+    If checkpoint, the simulation is checkpointed in <outPath>.ckpt (removed once done),
+    if resume, it continues from this checkpoint.
+    If stopCapsize, the simulation stops when the roll reaches CRITICAL_ROLL.
+    If cache, the trajectory is searched in the result cache first.
+    If profile, the profile of the run is saved in <outPath>.profile.json
+    """
+    save = loadSaveFile(path)
+    solver, edoSolver = buildSolversFromSave(save, modelPath)
+    edoSolver.setMethod(method)
+    edoSolver.setCommandHold(hold)
+    if stopCapsize:
+        edoSolver.setEvents([getCapsizeEvent()])
+
+    if (tf == None):
+        tf = getSaveFinalTime(save)
+
+    if cache:
+        editors = save['navController']['editors']
+        key = getCacheKey('transient', getSolverDigest(solver),
+                          {'targets':{tname:editors[tname]['fct']['str'] for tname in editors}, 'tf':tf},
+                          dict(edoSolver.getIntegratorSettings(), dt=dt, stopCapsize=stopCapsize))
+        cached = ResultCache().get(key)
+        if (cached != None):
+            recorder, eventLog = cached
+            saveSimuFile(outPath, recorder, solver)
+            for name, t in eventLog:
+                print("[INFO] - Event '{}' at t={:.3f}s".format(name, t))
+            print("[INFO] - {} found in the result cache -> {}".format(path, outPath))
+            return outPath
+
+    print("[INFO] - Running {} ({:.1f}s, dt={}s, {})".format(path, tf, dt, method.value))
+    startTime = tm.time()
+    checkpointPath = (outPath + ".ckpt") if (checkpoint or resume) else None
+    if profile:
+        profiler = Profiler()
+        profiler.enable(solver, edoSolver)
+    recorder = edoSolver.transient(tf, dt=dt, log=log, checkpointPath=checkpointPath, resume=resume)
+    if profile:
+        profiler.disable()
+        profiler.printSummary()
+        profiler.save(outPath + ".profile.json")
+    saveSimuFile(outPath, recorder, solver)
+    if cache:
+        ResultCache().put(key, (recorder, edoSolver.getEventLog()))
+    for name, t in edoSolver.getEventLog():
+        print("[INFO] - Event '{}' at t={:.3f}s".format(name, t))
+    if (checkpointPath != None) and os.path.exists(checkpointPath):
+        os.remove(checkpointPath)
+    print("[INFO] - {} done in {:.1f}s -> {}".format(path, tm.time()-startTime, outPath))
+    return outPath
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description="Run the simulation of App save files without GUI")
+    parser.add_argument('saves', nargs='+', help="App save files (.json)")
+    parser.add_argument('--out', default='.', help="Output folder of the simulation files")
+    parser.add_argument('--tf', type=float, default=None, help="Duration of the simulation (s). Default: duration of the target functions")
+    parser.add_argument('--dt', type=float, default=DEFAULT_DT_SIM, help="Time step (s)")
+    parser.add_argument('--method', default=IntegrationMethod.RK4.value, choices=[m.value for m in IntegrationMethod], help="Integration method")
+    parser.add_argument('--hold', action='store_true', help="Zero-order hold of the command during a step")
+    parser.add_argument('--model', default=None, help="Buoyency model file, overrides the one of the save")
+    parser.add_argument('--log', action='store_true', help="Display the progress of each simulation")
+    parser.add_argument('--checkpoint', action='store_true', help="Checkpoint the simulations (<out>/<name>_simu.json.ckpt)")
+    parser.add_argument('--resume', action='store_true', help="Resume the simulations from their checkpoint")
+    parser.add_argument('--stop-capsize', action='store_true', help="Stop the simulations when the roll reaches the critical roll")
+    parser.add_argument('--no-cache', action='store_true', help="Do not use the result cache")
+    parser.add_argument('--profile', action='store_true', help="Profile the simulations (<out>/<name>_simu.json.profile.json)")
+    args = parser.parse_args()
+
+    os.makedirs(args.out, exist_ok=True)
+    for path in args.saves:
+        name = os.path.splitext(os.path.basename(path))[0]
+        try:
+            runSave(path, os.path.join(args.out, name + "_simu.json"), args.tf, args.dt,
+                    IntegrationMethod(args.method), args.hold, args.model, args.log,
+                    args.checkpoint, args.resume, args.stop_capsize, not args.no_cache, args.profile)
+        except Exception as e:
+            print("[ERROR] - {} failed: {}".format(path, e))
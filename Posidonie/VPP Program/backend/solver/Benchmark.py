@@ -0,0 +1,328 @@
+import time as tm
+import json
+import os
+import platform
+import tempfile
+import argparse
+
+import sys
+import pathlib
+_parentdir = pathlib.Path(__file__).parent.parent.resolve()
+_2parentdir = pathlib.Path(__file__).parent.parent.parent.resolve()
+sys.path.insert(0, str(_parentdir))
+sys.path.insert(0, str(_2parentdir))
+
+from config.Config import *
+from utils.Utils import *
+from backend.solver.Solver import *
+from backend.solver.EDOSolver import *
+from backend.solver.BatchRunner import *
+from backend.solver.PolarEngine import *
+
+"""
+    Benchmarks of the physics hot paths (micro) and of complete simulations (macro).
+    The results are compared to a json baseline, a slow down larger than
+    BENCHMARK_REGRESSION_THRESHOLD (or than the measured spread) is reported as a regression.
+    The times are compared relatively to a calibration workload timed on the same machine,
+    and the simulations also compare their number of loaded state vectors (evaluations of F),
+    so a baseline saved on another machine can be used.
+    A micro benchmark is measured BENCHMARK_SAMPLES times, each just after a calibration,
+    the median of the ratios is compared
+    Usage (from the 'VPP Program' folder):
+        python -m backend.solver.Benchmark [--save save.json] [--only F RK4Step ...] [--update-baseline]
+"""
+
+BENCHMARK_BUOYENCY_MODEL = PATH_3DMODEL_FOLDER + "rowing.buoyModel"
+# Geometry of the benchmarks (the default geometry is not stable with the rowing hull)
+BENCHMARK_SAVE = projectFolder + "finalChoice.json"
+BENCHMARK_TARGET = {'target':0,
+                    'wang':np.deg2rad(120),
+                    'wspeed':noeud2ms(10)}
+
+def benchmarkTarget(X, S, t):
+    return BENCHMARK_TARGET, S
+
+def buildBenchmarkSolvers(savePath=None):
+    """
+    Return a solver and an EDO solver for the benchmark.
+    If savePath != None, the geometry of the save file is used
+    """
+    solver = Solver()
+    solver.getHull().loadBuoyencyModel(BENCHMARK_BUOYENCY_MODEL)
+    geom = None
+    if (savePath != None):
+        with open(savePath, 'r') as f:
+            geom = deserializeGeom(json.load(f)['geomEditor']['geom'])
+    solver.updateGlobalGeom(geom)
+
+    edoSolver = EDOSolver(solver.getX0(),
+                          solver.F,
+                          solver.getNavigator().Fu,
+                          benchmarkTarget,
+                          solver.getNavigator().getS0(),
+                          solver.getNavigator().getU0(),
+                          solver.getNavigator().getEpsi0())
+    return solver, edoSolver
+
+def benchmarkCommandHold(solver, edoSolver, tf=10, dt=DEFAULT_DT_SIM):
+    """
+    Compare the number of state vector loaded per step with and without
+    the zero-order hold of the command
+    """
+    results = {}
+    for hold in [False, True]:
+        edoSolver.setCommandHold(hold)
+        nLoad = solver.getLoadCount()
+        startTime = tm.time()
+        recorder = edoSolver.transient(tf, dt=dt)
+        nstep = len(recorder) - 1
+        results['hold' if hold else 'stage'] = {
+            'loadPerStep':(solver.getLoadCount() - nLoad)/nstep,
+            'timePerStep':(tm.time() - startTime)/nstep,
+            'final':recorder.getState(-1, solver).info()}
+    edoSolver.setCommandHold(False)
+
+    for name in results:
+        print("[INFO] - Command {}: {:.1f} loadStateVector per step, {:.2f} ms per step".format(
+            name, results[name]['loadPerStep'], 1000*results[name]['timePerStep']))
+        print("         final state:", {key: round(float(value), 3) for key, value in results[name]['final'].items()})
+    return results
+
+def timeCall(fct, n, repeat=BENCHMARK_REPEAT):
+    """
+    Return the best and the median time of one call of fct (s), over repeat runs of n calls
+    """
+    times = []
+    for r in range(repeat):
+        startTime = tm.perf_counter()
+        for i in range(n):
+            fct()
+        times.append((tm.perf_counter() - startTime)/n)
+    return {'time':min(times), 'median':float(np.median(times)), 'n':n, 'repeat':repeat}
+
+def calibrationWorkload():
+    """
+    Fixed workload of small numpy operations, like the physics of the boat
+    """
+    M = np.eye(3)
+    v = np.ones(3)
+    for i in range(100):
+        M = np.matmul(getMatRot(Dir.Z, 0.1), M)
+        v = np.cross(M.dot(v), v) + v/np.linalg.norm(v)
+    return v
+
+def getCalibrationTime():
+    """
+    Return the time of the calibration workload on this machine (s)
+    """
+    return timeCall(calibrationWorkload, 10, 4*BENCHMARK_REPEAT)['time']
+
+def getBenchmarkContext(savePath=None):
+    """
+    Return the solvers and the state used by the micro benchmarks: the state of the
+    boat after 10s at the benchmark target
+    """
+    solver, edoSolver = buildBenchmarkSolvers(savePath)
+    edoSolver.setMethod(IntegrationMethod.RK4)
+    recorder = edoSolver.transient(10, dt=DEFAULT_DT_SIM)
+    X = recorder.getState(-1, solver)
+    U = recorder.getCommand(-1)
+    solver.F(X, U)
+    return {'solver':solver,
+            'edoSolver':edoSolver,
+            'X':X,
+            'U':U,
+            'recorder':recorder,
+            'savePath':savePath}
+
+def benchF(ctx):
+    """
+    Evaluation of the EDO function
+    """
+    solver, X, U = ctx['solver'], ctx['X'], ctx['U']
+    return timeCall(lambda: solver.F(X, U), 20)
+
+def benchRK4Step(ctx):
+    """
+    One RK4 step (4 evaluations of F and of the command)
+    """
+    solver, X, U = ctx['solver'], ctx['X'], ctx['U']
+    navigator = solver.getNavigator()
+    Epsi = navigator.getEpsi0()
+    buffers = (X.copy(), X.copy())
+    return timeCall(lambda: RK4Step(X, solver.F, navigator.Fu, BENCHMARK_TARGET, Epsi, U, DEFAULT_DT_SIM, buffers), 5)
+
+def benchFluidForce(ctx):
+    """
+    Fluid force on the drift (NACA model)
+    """
+    solver = ctx['solver']
+    drift = solver.getDrift()
+    nc = solver.getNACACalculator()
+    profile = drift.getGeomP('profile')
+    return timeCall(lambda: nc.getFluidForce(drift.sections, Fluids.WATER, Referential.BOAT, Referential.SEA, profile), 20)
+
+def benchBuoyency(ctx):
+    """
+    Interpolation of the buoyency model at the attitude of the boat
+    """
+    solver = ctx['solver']
+    hbc = solver.getHull().getHullBuoyencyCalculator()
+    ang = solver.getBoatAng()
+    roll, pitch, z = ang[ROLL_AXIS], -ang[PITCH_AXIS], -solver.getBoatPos()[2]
+    return timeCall(lambda: hbc.getValueAt(roll, pitch, z), 200)
+
+def benchSimuFile(ctx):
+    """
+    Save then load the simulation file of the 10s trajectory
+    """
+    solver, recorder = ctx['solver'], ctx['recorder']
+    path = os.path.join(tempfile.gettempdir(), "benchmark_simu.json")
+    def saveLoad():
+        saveSimuFile(path, recorder, solver)
+        loadSimuFile(path, solver)
+    result = timeCall(saveLoad, 1)
+    os.remove(path)
+    return result
+
+def benchTransient(ctx):
+    """
+    60s transient at the benchmark target (RK4)
+    """
+    solver, edoSolver = buildBenchmarkSolvers(ctx['savePath'])
+    nLoad = solver.getLoadCount()
+    startTime = tm.perf_counter()
+    recorder = edoSolver.transient(60, dt=DEFAULT_DT_SIM)
+    return {'time':tm.perf_counter() - startTime,
+            'n':len(recorder) - 1,
+            'repeat':1,
+            'loads':solver.getLoadCount() - nLoad}
+
+def benchPolar(ctx):
+    """
+    5 headings polar at 10 knt (simulated points, no result cache)
+    """
+    geom = {}
+    if (ctx['savePath'] != None):
+        geom = deserializeGeom(loadSaveFile(ctx['savePath'])['geomEditor']['geom'])
+    solver, edoSolver = buildSolvers(geom, BENCHMARK_BUOYENCY_MODEL)
+    setup = getDefaultPolarSetup()
+    setup['cache'] = False
+    nLoad = solver.getLoadCount()
+    startTime = tm.perf_counter()
+    results = [simulatePolarPoint(solver, edoSolver, 10, heading, setup) for heading in np.linspace(45, 170, 5)]
+    return {'time':tm.perf_counter() - startTime,
+            'n':len(results),
+            'repeat':1,
+            'loads':solver.getLoadCount() - nLoad,
+            'converged':sum([r['converged'] for r in results])}
+
+# Simulation benchmarks, too long to be measured several times
+MACRO_BENCHMARKS = ['transient60s', 'polar5']
+
+# Benchmarks: name -> function of the context
+BENCHMARKS = {'F':benchF,
+              'RK4Step':benchRK4Step,
+              'getFluidForce':benchFluidForce,
+              'getValueAt':benchBuoyency,
+              'simuFile':benchSimuFile,
+              'transient60s':benchTransient,
+              'polar5':benchPolar}
+
+def runBenchmarks(names=None, savePath=BENCHMARK_SAVE):
+    """
+    Run the benchmarks (all if names == None), return the results dictionnary
+    """
+    if (names == None):
+        names = list(BENCHMARKS.keys())
+    ctx = getBenchmarkContext(savePath)
+    results = {}
+    for name in names:
+        samples = []
+        for i in range(1 if (name in MACRO_BENCHMARKS) else BENCHMARK_SAMPLES):
+            # The calibration is timed just before each measure, the speed of the machine can drift
+            calibration = getCalibrationTime()
+            result = BENCHMARKS[name](ctx)
+            result['relative'] = result['time']/calibration
+            samples.append(result)
+        # Median of the ratios to the calibration, and their spread (max/min)
+        relatives = [sample['relative'] for sample in samples]
+        results[name] = samples[int(np.argsort(relatives)[len(relatives)//2])]
+        results[name]['samples'] = len(samples)
+        results[name]['spread'] = max(relatives)/min(relatives)
+        print("[INFO] - Benchmark {:<14}: {:.3f} ms (x{:.2f} calibration, spread x{:.2f} over {} samples)".format(
+            name, 1000*results[name]['time'], results[name]['relative'], results[name]['spread'], len(samples)))
+    return {'info':{'python':platform.python_version(),
+                    'numpy':np.__version__,
+                    'machine':platform.machine(),
+                    'processor':platform.processor(),
+                    'date':tm.strftime("%Y-%m-%d %H:%M:%S")},
+            'results':results}
+
+def compareToBaseline(run, baseline, threshold=BENCHMARK_REGRESSION_THRESHOLD, loadsThreshold=BENCHMARK_LOADS_THRESHOLD):
+    """
+    Print the ratio of each benchmark to the baseline, return the names of the regressions.
+    The median times relative to the calibration are compared, a slow down is a regression
+    if it is larger than the threshold and than the spread measured in the run and in the
+    baseline. The number of loaded state vectors of the simulations is compared with loadsThreshold
+    """
+    regressions = []
+    for name, result in run['results'].items():
+        if (name not in baseline['results']):
+            continue
+        if ('spread' not in baseline['results'][name]):
+            raise Exception("[ERROR] - The baseline has no calibrated samples, update it with --update-baseline")
+        ratio = result['relative']/baseline['results'][name]['relative']
+        limit = max(1 + threshold, result['spread'], baseline['results'][name]['spread'])
+        regression = (ratio > limit)
+        msg = "[INFO] - {:<14}: {:>10.3f} ms, x{:.2f} baseline (limit x{:.2f})".format(name, 1000*result['time'], ratio, limit)
+        if ('loads' in result) and ('loads' in baseline['results'][name]):
+            loadRatio = result['loads']/baseline['results'][name]['loads']
+            regression = regression or (loadRatio > 1 + loadsThreshold)
+            msg += ", {} loads x{:.2f} baseline".format(result['loads'], loadRatio)
+        print(msg + (" REGRESSION" if regression else ""))
+        if regression:
+            regressions.append(name)
+    return regressions
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description="Benchmarks of the physics hot paths and of complete simulations")
+    parser.add_argument('--save', default=BENCHMARK_SAVE, help="App save file of the geometry of the benchmarks")
+    parser.add_argument('--only', nargs='+', default=None, choices=list(BENCHMARKS.keys()), help="Benchmarks to run")
+    parser.add_argument('--baseline', default=PATH_BENCHMARK_BASELINE, help="Baseline file (json)")
+    parser.add_argument('--update-baseline', action='store_true', help="Save the results as the new baseline")
+    parser.add_argument('--out', default=None, help="Save the results in this file (json)")
+    parser.add_argument('--threshold', type=float, default=BENCHMARK_REGRESSION_THRESHOLD, help="Relative slow down reported as a regression")
+    parser.add_argument('--loads-threshold', type=float, default=BENCHMARK_LOADS_THRESHOLD, help="Relative increase of the loaded state vectors reported as a regression")
+    parser.add_argument('--hold', action='store_true', help="Compare the command hold modes instead")
+    args = parser.parse_args()
+
+    if args.hold:
+        solver, edoSolver = buildBenchmarkSolvers(args.save)
+        benchmarkCommandHold(solver, edoSolver)
+        sys.exit(0)
+
+    run = runBenchmarks(args.only, args.save)
+    if (args.out != None):
+        with open(args.out, 'w') as f:
+            json.dump(run, f, indent=4)
+
+    regressions = []
+    if os.path.exists(args.baseline) and not args.update_baseline:
+        with open(args.baseline, 'r') as f:
+            regressions = compareToBaseline(run, json.load(f), args.threshold, args.loads_threshold)
+    
+    if args.update_baseline:
+        baseline = {'info':run['info'], 'results':{}}
+        if os.path.exists(args.baseline):
+            # Keep the results of the benchmarks not run
+            with open(args.baseline, 'r') as f:
+                baseline['results'] = json.load(f)['results']
+        baseline['results'].update(run['results'])
+        with open(args.baseline, 'w') as f:
+            json.dump(baseline, f, indent=4)
+        print("[INFO] - Baseline saved -> {}".format(args.baseline))
+
+    if (len(regressions) > 0):
+        print("[ERROR] - Regressions: {}".format(", ".join(regressions)))
+        sys.exit(1)
@@ -0,0 +1,78 @@
+import pickle
+import copy
+import os
+import numpy as np
+
+import sys
+import pathlib
+_parentdir = pathlib.Path(__file__).parent.parent.resolve()
+_2parentdir = pathlib.Path(__file__).parent.parent.parent.resolve()
+sys.path.insert(0, str(_parentdir))
+sys.path.insert(0, str(_2parentdir))
+
+from config.Config import *
+from backend.solver.TrajectoryRecorder import *
+
+"""
+    Checkpoints of a simulation: state of the EDO solver, recorded trajectory
+    and extra data of the caller, saved in a single pickle file
+"""
+
+CHECKPOINT_VERSION = 1
+
+def packSolverState(X, U, S, Epsi, t, h, jacobian=None, jacobianAge=0):
+    """
+    Return the dictionnary of the state of an EDO solver (copy):
+        - X, U  : state vector and command vector
+        - S     : state vector of the target function
+        - Epsi  : integrated error
+        - t, h  : simulation time and proposed step size (RK45)
+        - jacobian, jacobianAge: jacobian of the implicit components (ROS2)
+    """
+    return {'X':X.getArray().copy(),
+            'U':U.toArray(),
+            'S':copy.deepcopy(S),
+            'Epsi':np.array(Epsi, dtype=float),
+            't':t,
+            'h':h,
+            'jacobian':None if (jacobian is None) else jacobian.copy(),
+            'jacobianAge':jacobianAge}
+
+def saveCheckpoint(path, state, recorder=None, extra=None):
+    """
+    Save a checkpoint file. The file is replaced at once, a crash while
+    writing keeps the previous checkpoint
+        - state   : state of the EDO solver (see packSolverState)
+        - recorder: trajectory (TrajectoryRecorder) or None
+        - extra   : dictionnary of data of the caller or None
+    """
+    trajectory = None
+    if (recorder != None):
+        trajectory = {'targetNames':recorder.getTargetNames(),
+                      'data':recorder.getData()}
+    tmpPath = path + '.tmp'
+    with open(tmpPath, 'wb') as f:
+        pickle.dump({'version':CHECKPOINT_VERSION,
+                     'state':state,
+                     'trajectory':trajectory,
+                     'extra':extra}, f, protocol=pickle.HIGHEST_PROTOCOL)
+    os.replace(tmpPath, path)
+
+def loadCheckpoint(path):
+    """
+    Load a checkpoint file, return the state of the EDO solver, the
+    trajectory (TrajectoryRecorder or None) and the extra data
+    """
+    with open(path, 'rb') as f:
+        ckpt = pickle.load(f)
+    if (ckpt['version'] != CHECKPOINT_VERSION):
+        raise Exception(f"[ERROR] - Unsupported checkpoint version: {ckpt['version']}")
+
+    recorder = None
+    if (ckpt['trajectory'] != None):
+        names = ckpt['trajectory']['targetNames']
+        data = ckpt['trajectory']['data']
+        recorder = TrajectoryRecorder.fromArrays(data['t'], data['X'], data['U'],
+                                                 {names[j]:data['T'][:,j] for j in range(len(names))},
+                                                 data['err'])
+    return ckpt['state'], recorder, ckpt['extra']
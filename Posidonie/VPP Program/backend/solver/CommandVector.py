@@ -1,4 +1,7 @@
+import numpy as np
 
+# Layout of the packed command vector: [sail, rudder, wang, wspeed]
+COMMAND_SIZE = 4
 
 class CommandVector():
     # Command vector of the boat
@@ -15,6 +18,18 @@ class CommandVector():
         """
         return CommandVector(self._u_sail, self._u_rudder, self._u_wang, self._u_wspeed)
     
+    def toArray(self):
+        """
+        Return the packed array of the command vector
+        """
+        return np.array([self._u_sail, self._u_rudder, self._u_wang, self._u_wspeed], dtype=float)
+    
+    def fromArray(u):
+        """
+        Return a command vector from a packed array
+        """
+        return CommandVector(u[0], u[1], u[2], u[3])
+    
     def toJSON(self):
         """
         Serialize this object to a JSON format
@@ -1,5 +1,7 @@
 import time as tm
+import os
 import copy
+from enum import Enum
 
 import sys
 import pathlib
@@ -10,6 +12,8 @@ sys.path.insert(0, str(_2parentdir))
 
 from config.Config import *
 from utils.Utils import *
+from backend.solver.Checkpoint import *
+from backend.solver.Events import *
 
 """
     Solve the boat's EDO
@@ -27,13 +31,145 @@ class ResetSimuException(SimulatorException):
     def __init__(self, *args):
         super().__init__(*args)
 
-def RK4Step(X, F, Fu, T, Epsi, U, dt):
+def ZOHCommand(X, Epsi, T, U):
+    """
+    Zero-order hold command: the command stays equal to the last command U during a step
+    """
+    return U, np.zeros(len(Epsi))
+
+def RK4Step(X, F, Fu, T, Epsi, U, dt, buffers=None):
+    """
+    Return the RK4 increment of the state vector X.
+    The stage state vectors are updated in place in <buffers> (two copies of X)
+    """
     #return F(X, Fu(X, Epsi, T, U)[0])*dt
-    k1 = F(X, Fu(X, Epsi, T, U)[0])*dt
-    k2 = F(X + k1/2, Fu(X + k1/2, Epsi, T, U)[0])*dt
-    k3 = F(X + k2/2, Fu(X + k2/2, Epsi, T, U)[0])*dt
-    k4 = F(X + k3, Fu(X + k2, Epsi, T, U)[0])*dt
-    return (k1 + (k2 + k3)*2 + k4)/6
+    if (buffers == None):
+        buffers = (X.copy(), X.copy())
+    Xk, Xu = buffers
+    k1 = F(X, Fu(X, Epsi, T, U)[0])
+    Xk.assignAxpy(X, dt/2, k1)
+    k2 = F(Xk, Fu(Xk, Epsi, T, U)[0])
+    Xk.assignAxpy(X, dt/2, k2)
+    k3 = F(Xk, Fu(Xk, Epsi, T, U)[0])
+    Xk.assignAxpy(X, dt, k3)
+    Xu.assignAxpy(X, dt, k2)
+    k4 = F(Xk, Fu(Xu, Epsi, T, U)[0])
+    # k1 <- (k1 + 2*k2 + 2*k3 + k4)*dt/6
+    k1.axpy(2, k2).axpy(2, k3).axpy(1, k4)
+    k1.getArray()[:] *= dt/6
+    return k1
+
+# L-stable ROS2 coefficient
+ROS2_GAMMA = 1 + 1/np.sqrt(2)
+
+def finiteDifferenceJacobian(X, F, U, idx, f0, Xk):
+    """
+    Return the jacobian d(F_i)/d(X_j) for i, j in idx, with a forward finite difference
+    around X at a fixed command U.
+        - f0 : packed derivative at X
+        - Xk : state vector used for the perturbed states
+    """
+    x = X.getArray()
+    J = np.zeros((len(idx), len(idx)))
+    for j in range(len(idx)):
+        eps = JACOBIAN_FD_EPS*max(1, abs(x[idx[j]]))
+        Xk.assign(X)
+        Xk.getArray()[idx[j]] += eps
+        J[:,j] = (F(Xk, U).getArray()[idx] - f0[idx])/eps
+    return J
+
+def ROS2Step(X, F, Fu, T, Epsi, U, dt, Winv, idx, buffers):
+    """
+    Return the increment of a linearly implicit Rosenbrock step (ROS2) of the state vector X.
+    Winv is the inverse of (I - gamma*dt*J) for the components idx, the other components
+    are explicit (the method reduces to Heun's method for them)
+        k1 = W^-1 F(X)
+        k2 = W^-1 (F(X + dt*k1) - 2*k1)
+        X' = X + dt*(3*k1 + k2)/2
+    """
+    Xk = buffers[0]
+    k1 = F(X, Fu(X, Epsi, T, U)[0])
+    k1.getArray()[idx] = Winv.dot(k1.getArray()[idx])
+    Xk.assignAxpy(X, dt, k1)
+    k2 = F(Xk, Fu(Xk, Epsi, T, U)[0])
+    k2.axpy(-2, k1)
+    k2.getArray()[idx] = Winv.dot(k2.getArray()[idx])
+    # k1 <- dt*(3*k1 + k2)/2
+    k1.getArray()[:] *= 3
+    k1.axpy(1, k2)
+    k1.getArray()[:] *= dt/2
+    return k1
+
+class IntegrationMethod(Enum):
+    RK4  = "RK4"  # Fixed step Runge-Kutta 4
+    RK45 = "RK45" # Adaptive step Dormand-Prince 5(4)
+    ROS2 = "ROS2" # Fixed step linearly implicit Rosenbrock, implicit on IMPLICIT_STATE_IDX
+
+# Dormand-Prince coefficients
+DP_A = [np.array([]),
+        np.array([1/5]),
+        np.array([3/40, 9/40]),
+        np.array([44/45, -56/15, 32/9]),
+        np.array([19372/6561, -25360/2187, 64448/6561, -212/729]),
+        np.array([9017/3168, -355/33, 46732/5247, 49/176, -5103/18656])]
+DP_B = np.array([35/384, 0, 500/1113, 125/192, -2187/6784, 11/84])
+# Difference between the 5th and 4th order solutions
+DP_E = np.array([-71/57600, 0, 71/16695, -71/1920, 17253/339200, -22/525, 1/40])
+# Coefficients of the 4th order dense output (powers 1 to 4 of theta)
+DP_P = np.array([
+    [1, -8048581381/2820520608, 8663915743/2820520608, -12715105075/11282082432],
+    [0, 0, 0, 0],
+    [0, 131558114200/32700410799, -68118460800/10900136933, 87487479700/32700410799],
+    [0, -1754552775/470086768, 14199869525/1410260304, -10690763975/1880347072],
+    [0, 127303824393/49829197408, -318862633887/49829197408, 701980252875/199316789632],
+    [0, -282668133/205662961, 2019193451/616988883, -1453857185/822651844],
+    [0, 40617522/29380423, -110615467/29380423, 69997945/29380423]])
+
+def DP45Step(X, F, Fu, T, Epsi, U, h, Xnew, Xk, K, KE):
+    """
+    Perform a trial Dormand-Prince step of size h from X. The integrated error Epsi of
+    the command is integrated with the stages (it stays constant with the zero-order hold).
+        - Xnew : state vector where the 5th order solution is written
+        - Xk   : state vector used for the stages
+        - K    : (7, N) array where the stage derivatives are written
+        - KE   : (7, len(Epsi)) array where the stage derivatives of Epsi are written
+    K[0] and KE[0] must already hold the derivatives at X (first stage).
+    Return the estimation of the local error (array) and Epsi at the end of the step
+    """
+    x = X.getArray()
+    for i in range(1, 6):
+        Xk.getArray()[:] = x + h*DP_A[i].dot(K[:i])
+        u, KE[i] = Fu(Xk, Epsi + h*DP_A[i].dot(KE[:i]), T, U)
+        K[i] = F(Xk, u).getArray()
+    Xnew.getArray()[:] = x + h*DP_B.dot(K[:6])
+    EpsiNew = Epsi + h*DP_B.dot(KE[:6])
+    u, KE[6] = Fu(Xnew, EpsiNew, T, U)
+    K[6] = F(Xnew, u).getArray()
+    return h*DP_E.dot(K), EpsiNew
+
+def DPDenseOutput(x, h, K, theta):
+    """
+    Return the packed state at t + theta*h (0 <= theta <= 1), using the stages
+    K of the step of size h starting at the packed state x
+    """
+    return x + h*K.T.dot(DP_P).dot(theta**np.arange(1, 5))
+
+def errorNorm(err, x, xnew, atol, rtol):
+    """
+    Return the RMS norm of the local error, scaled by the tolerance of each component
+    """
+    scale = atol + rtol*np.maximum(np.abs(x), np.abs(xnew))
+    return np.sqrt(np.mean((err/scale)**2))
+
+def hermiteInterpolation(x0, f0, x1, f1, h, theta):
+    """
+    Return the cubic Hermite interpolation at t + theta*h of a step of size h
+    from the packed state x0 (derivative f0) to x1 (derivative f1)
+    """
+    theta2 = theta*theta
+    theta3 = theta2*theta
+    return (2*theta3 - 3*theta2 + 1)*x0 + (theta3 - 2*theta2 + theta)*h*f0 \
+           + (3*theta2 - 2*theta3)*x1 + (theta3 - theta2)*h*f1
 
 class EDOSolver():
     def __init__(self, X0, F, Fu, T, S0, U0, Epsi0):
@@ -51,6 +187,7 @@ class EDOSolver():
         self._Fu = Fu
         self._T = T
         self._X = self._X0.copy()
+        self._buffers = (self._X0.copy(), self._X0.copy())
         self._t = 0
         self._S0 = S0
         self._S = copy.deepcopy(S0)
@@ -60,20 +197,43 @@ class EDOSolver():
         self._Epsi0 = Epsi0
         self._Epsi = self._Epsi0.copy()
 
+        # Integration method
+        self._method = IntegrationMethod.RK4
+        self._commandHold = False
+        self._rtol = DEFAULT_RTOL_SIM
+        self._atol = DEFAULT_ATOL_SIM
+        self._h = DEFAULT_DT_SIM
+        self._K = np.zeros((7, len(X0.getArray())))
+        self._KE = np.zeros((7, len(Epsi0)))
+        # End of the last accepted RK45 step (state, Epsi and target): its last stage is the
+        # first stage of the next step if it starts from there (first same as last)
+        self._fsal = None
+        self._lastErr = np.nan # Error norm of the last accepted RK45 step
+        self.setEvents([])
+        self.resetJacobian()
+        self.resetStepStats()
+
         # For live computation:
         """self._Xs = []
         self._Us = []
         self._Ts = []"""
 
 
-    def transient(self, tf, ti=0, dt=0.1, log=False):
+    def transient(self, tf, ti=0, dt=0.1, log=False, checkpointPath=None, resume=False):
         """
         Solve the transient response with the RK4 Method
             - tf : Final time of the simulation
             - ti : Initial time
             - dt : Time step size
             - log: If log are displayed
+            - checkpointPath: if != None, a checkpoint is saved every CHECKPOINT_PERIOD seconds
+            - resume: continue from the checkpoint if it exists
+        In RK45 mode, dt is the sampling step of the results
+        Return the trajectory (TrajectoryRecorder)
         """
+        if (self._method == IntegrationMethod.RK45):
+            return self.transientRK45(tf, ti, dt, log, checkpointPath, resume)
+        
         if (tf < 0):
             # Compute until the maximum time
             time = np.arange(ti, 1000, dt)
@@ -85,12 +245,26 @@ class EDOSolver():
         S = self._S0.copy()
         U = self._U0.copy()
         Epsi = self._Epsi0.copy()
-        Xs = [X.copy()]
-        Us = [self._U0.copy()]
-        Ts = [self._T(X, S, 0)[0]]
-        ts = [0]
-
-        for i in range(len(time)):
+        buffers = (X.copy(), X.copy())
+        self.resetJacobian()
+        T0 = self._T(X, S, 0)[0]
+        recorder = TrajectoryRecorder(T0.keys(), len(time) + 1)
+        recorder.append(0, X, U, T0)
+        if self._commandHold:
+            # The command of the first step
+            U = self._Fu(X, Epsi, T0, U)[0]
+
+        i0 = 0
+        if resume and (checkpointPath != None) and os.path.exists(checkpointPath):
+            state, recorder, extra = loadCheckpoint(checkpointPath)
+            X, U, S, Epsi = self.unpackState(state, X)
+            recorder.reserve(len(time) + 1)
+            i0 = extra['i']
+            print("[INFO] - Resume from the checkpoint at t={:.2f}s".format(state['t']))
+        self.startEvents(time[i0] if (i0 < len(time)) else ti, X)
+        checkpointTime = tm.time()
+
+        for i in range(i0, len(time)):
             loopTime = tm.time()
             t = time[i]
             try:
@@ -100,19 +274,32 @@ class EDOSolver():
             except SimuFinishedException:
                 break
             
+            tEvent = None
             try:
-                X += RK4Step(X, self._F, self._Fu, T, Epsi, U, dt)
+                if (self._events != None):
+                    x0 = X.getArray().copy()
+                X += self.fixedStep(X, T, Epsi, U, dt, buffers)
+                if (self._events != None):
+                    tEvent = self.checkEvents(t, x0, dt, X, self.getStepInterpolant(x0, X, dt, T, Epsi, U, buffers[1]))
             except Exception as e:
                 print(e)
                 print("An error occured! Return partial results...")
                 break
 
             U, dEpsi = self._Fu(X, Epsi, T, U)
+            if (tEvent != None):
+                # Terminal event: the simulation stops at the time of the event
+                Epsi += dEpsi*(tEvent - t)
+                recorder.append(tEvent, X, U, T)
+                break
             Epsi += dEpsi*dt
-            Ts.append(T)
-            Xs.append(X.copy())
-            Us.append(U.copy())
-            ts.append(t+dt)
+            recorder.append(t+dt, X, U, T)
+
+            if (checkpointPath != None) and (tm.time() - checkpointTime > CHECKPOINT_PERIOD):
+                saveCheckpoint(checkpointPath,
+                               packSolverState(X, U, S, Epsi, t+dt, dt, self._jacobian, self._jacobianAge),
+                               recorder, {'i':i+1})
+                checkpointTime = tm.time()
 
             # Computation time
             ctime.append(tm.time()-loopTime)
@@ -120,111 +307,330 @@ class EDOSolver():
             if (log):
                 print("{:.1f}% ({:.1f}s / {:.1f}s)".format(100*i/len(time), t, tf))
 
-        Xs = np.array(Xs)
-        Us = np.array(Us)
-        Ts = np.array(Ts)
-        ts = np.array(ts)
-
         ctime = np.mean(np.array(ctime))
         print("Average computation time (ms): {:.2f}".format(1000*ctime))
 
-        return ts, Xs, Us, Ts
+        return recorder
     
-    def solve_stationnary(self, T):
+    def fixedStep(self, X, T, Epsi, U, dt, buffers):
         """
-        Find a stationnay solution, given:
-            - A target dictionnary T
-
-        We init the solution with:
-            - Boat heading = target - drift ang
-            - Boat speed = wind speed / 3
-            - roll, pitch = 0
+        Return the increment of the state vector X for a fixed step method (RK4 or ROS2)
         """
-        Xs = []
-        Us = []
-        Ts = []
-        ts = []
+        if (self._method == IntegrationMethod.ROS2):
+            return ROS2Step(X, self._F, self.getStageFu(), T, Epsi, U, dt, self.getImplicitMatrix(X, T, Epsi, U, dt, buffers[1]), IMPLICIT_STATE_IDX, buffers)
+        return RK4Step(X, self._F, self.getStageFu(), T, Epsi, U, dt, buffers)
+    
+    def getImplicitMatrix(self, X, T, Epsi, U, dt, Xk):
+        """
+        Return the inverse of (I - gamma*dt*J) for the implicit components.
+        The jacobian J is computed by finite difference every JACOBIAN_UPDATE_SIM steps
+        """
+        if (self._jacobian is None) or (self._jacobianAge >= JACOBIAN_UPDATE_SIM):
+            u = self.getStageFu()(X, Epsi, T, U)[0]
+            f0 = self._F(X, u).getArray().copy()
+            self._jacobian = finiteDifferenceJacobian(X, self._F, u, IMPLICIT_STATE_IDX, f0, Xk)
+            self._jacobianAge = 0
+            self._Winv = None
+            self._stepStats['jacobian'] += 1
+        
+        if (self._Winv is None) or (self._Winvdt != dt):
+            W = np.eye(len(IMPLICIT_STATE_IDX)) - ROS2_GAMMA*dt*self._jacobian
+            self._Winv = np.linalg.inv(W)
+            self._Winvdt = dt
+
+        self._jacobianAge += 1
+        return self._Winv
+
+    def transientRK45(self, tf, ti=0, dt=0.1, log=False, checkpointPath=None, resume=False):
+        """
+        Solve the transient response with the adaptive Dormand-Prince method.
+        The results are sampled every dt with the dense output of the method
+        """
+        if (tf < 0):
+            # Compute until the maximum time
+            tf = 1000
+        # Reset the state vector
+        X = self._X0.copy()
+        Xnew = X.copy()
+        Xk = X.copy()
+        S = self._S0.copy()
+        U = self._U0.copy()
+        Epsi = self._Epsi0.copy()
+        T0 = self._T(X, S, 0)[0]
+        recorder = TrajectoryRecorder(T0.keys(), int((tf - ti)/dt) + 2)
+        recorder.append(ti, X, U, T0)
+        if self._commandHold:
+            # The command of the first step
+            U = self._Fu(X, Epsi, T0, U)[0]
+        self.resetStepStats()
+        Xout = X.copy()
+        startTime = tm.time()
+
+        t = ti
+        h = self._h
+        nout = 1
+        if resume and (checkpointPath != None) and os.path.exists(checkpointPath):
+            state, recorder, extra = loadCheckpoint(checkpointPath)
+            X, U, S, Epsi = self.unpackState(state, X)
+            recorder.reserve(int((tf - ti)/dt) + 2)
+            t, h, nout = state['t'], state['h'], extra['nout']
+            print("[INFO] - Resume from the checkpoint at t={:.2f}s".format(t))
+        self.startEvents(t, X)
+        checkpointTime = tm.time()
+
+        while (t < tf):
+            try:
+                T, S = self._T(X, S, t)
+            except ResetSimuException:
+                self.reset()
+            except SimuFinishedException:
+                break
 
-        # Construct the initial vector
-        target = T['target']
-        wang   = T['wang']
-        wspeed = T['wspeed']
+            try:
+                hdone, h, EpsiNew = self.RK45Step(X, T, Epsi, U, min(h, tf - t), Xnew, Xk)
+            except Exception as e:
+                print(e)
+                print("An error occured! Return partial results...")
+                break
 
-        previousSpeed = wspeed/3
+            tEvent = None
+            if (self._events != None):
+                x0 = X.getArray()
+                tEvent = self.checkEvents(t, x0, hdone, Xnew, lambda theta: DPDenseOutput(x0, hdone, self._K, theta))
+            tEnd = t + hdone if (tEvent == None) else tEvent
+
+            # Sample the results in the step with the dense output
+            while (ti + nout*dt <= tEnd + 1e-9*dt):
+                Xout.getArray()[:] = DPDenseOutput(X.getArray(), hdone, self._K, min(1, (ti + nout*dt - t)/hdone))
+                recorder.append(ti + nout*dt, Xout, U, T, self._lastErr)
+                nout += 1
+
+            X.assign(Xnew)
+            Epsi, U = self.getStepCommand(X, T, Epsi, U, EpsiNew, hdone, tEnd - t)
+            t = tEnd
+            if (tEvent != None):
+                # Terminal event: the simulation stops at the time of the event
+                recorder.append(t, X, U, T, self._lastErr)
+                break
 
-        if (getAngleDif(target, wang) > 0):
-            # Set the drift
-            driftAng = np.deg2rad(8)
-        else:
-            driftAng = -np.deg2rad(8)
+            if (checkpointPath != None) and (tm.time() - checkpointTime > CHECKPOINT_PERIOD):
+                saveCheckpoint(checkpointPath, packSolverState(X, U, S, Epsi, t, h), recorder, {'nout':nout})
+                checkpointTime = tm.time()
 
-        X = self._X0.copy()
-        # Modify the heading
-        X._x_ang   = np.array([0, 0, target + driftAng])
-        # Modify the speed
-        speedDir = np.array([np.cos(target), -np.sin(target), 0])
-        speedv = speedDir*previousSpeed
-        solver = X._x_speed.getSpeed().getSolver()
-        X._x_speed.setSpeed(Vector(solver, speedv, Base.SEA))
+            if (log):
+                print("{:.1f}% ({:.1f}s / {:.1f}s)".format(100*(t-ti)/(tf-ti), t, tf))
 
-        # Construct the initial command
-        U = CommandVector(getOptimalSailAng(solver, X, np.deg2rad(15)), 0, wang, wspeed)
+        print("[INFO] - RK45: {} accepted steps, {} rejected steps, {} evaluations of F ({:.2f}s)".format(
+            self._stepStats['accepted'], self._stepStats['rejected'], self._stepStats['F'], tm.time()-startTime))
 
-        pointSpeed   = X._x_speed
-        angularSpeed = X._x_omega
-        # Solve the equation, and wait for convergence of the speed
-        for i in range(1000):
+        return recorder
+    
+    def RK45Step(self, X, T, Epsi, U, h, Xnew, Xk):
+        """
+        Perform one adaptive Dormand-Prince step from X. The new state is written in Xnew,
+        Xk is used for the stages. The stages of the step are kept for the dense output.
+        Return the size of the step done, the size proposed for the next step and Epsi at the end of the step
+        """
+        h = min(h, DEFAULT_DT_MAX_SIM)
+        # First stage, shared by the trials of the step: the last stage of the previous step if
+        # this step starts at its end with the same target
+        fsal = self._fsal
+        if (fsal != None) and (fsal[2] == T) and np.array_equal(fsal[0], X.getArray()) and np.array_equal(fsal[1], Epsi):
+            self._K[0] = self._K[6]
+            self._KE[0] = self._KE[6]
+        else:
+            u, self._KE[0] = self.getStageFu()(X, Epsi, T, U)
+            self._K[0] = self._F(X, u).getArray()
+            self._stepStats['F'] += 1
+        self._fsal = None
+        while True:
+            self._stepStats['F'] += 6
+            try:
+                err, EpsiNew = DP45Step(X, self._F, self.getStageFu(), T, Epsi, U, h, Xnew, Xk, self._K, self._KE)
+                errn = errorNorm(err, X.getArray(), Xnew.getArray(), self._atol, self._rtol)
+            except SimulatorException as e:
+                raise e
+            except Exception as e:
+                # The step can be too large to be computed (e.g. out of the buoyency model)
+                if (h <= DEFAULT_DT_MIN_SIM):
+                    raise e
+                errn = np.inf
+
+            if (errn <= 1):
+                self._stepStats['accepted'] += 1
+                self._lastErr = errn
+                if not self._commandHold:
+                    self._fsal = (Xnew.getArray().copy(), EpsiNew, T)
+                factor = 10 if (errn == 0) else min(10, 0.9*errn**(-1/5))
+                return h, min(h*factor, DEFAULT_DT_MAX_SIM), EpsiNew
             
-            # Save the angular and translation speed
-            angularSpeed = X._x_omega.copy()
-            pointSpeed   = X._x_speed.copy()
+            self._stepStats['rejected'] += 1
+            if (h <= DEFAULT_DT_MIN_SIM):
+                raise Exception("[ERROR] - RK45: step size too small")
+            factor = 0.2 if (not np.isfinite(errn)) else max(0.2, 0.9*errn**(-1/5))
+            h = max(h*factor, DEFAULT_DT_MIN_SIM)
 
-            speedv = X._x_speed.getSpeed().getNorm()
-            # The steady vector have a speed vector of angle target
-            X._x_speed.setSpeed(Vector(solver, speedv*speedDir, Base.SEA))
-            # The steady vector have a angular speed equal to 0
-            X._x_omega.setOmega(Vector(solver, np.zeros(3), Base.SEA))
-
-            dX = self._F(X, self._Fu(X, self._Epsi0, T, U)[0])
-            
-            # Re-inject the angular and translation speed
-            dX._x_ang = angularSpeed
-            dX._x_pos = pointSpeed
-            
-            print("Ang =",X._x_ang)
-            print("Pos =",X._x_pos)
-            print("Rud =",U._u_rudder)
+    def getStepCommand(self, X, T, Epsi, U, EpsiNew, hdone, dt):
+        """
+        Return Epsi and the command at the time dt of an accepted RK45 step of size hdone,
+        X being the state at this time. With the zero-order hold, Epsi is updated once per step,
+        else it was integrated with the stages (EpsiNew at the end of the step)
+        """
+        if self._commandHold:
+            U, dEpsi = self._Fu(X, Epsi, T, U)
+            return Epsi + dEpsi*dt, U
+        if (abs(dt - hdone) > 1e-9*hdone):
+            # Step cut by an event
+            EpsiNew = Epsi + (EpsiNew - Epsi)*dt/hdone
+        Epsi = EpsiNew
+        return Epsi, self._Fu(X, Epsi, T, U)[0]
+
+    def getSteadyStateInit(self, T):
+        """
+        Return the initial guess of the steady state unknowns (see steadyState), given
+        a target dictionnary T:
+            - Boat speed = wind speed / 3
+            - Leeway = 8 deg, on the side of the wind
+            - roll, pitch, heave, rudder = 0
+        """
+        leeway = np.deg2rad(8)
+        if (getAngleDif(T['target'], T['wang']) <= 0):
+            leeway = -leeway
+        return np.array([T['wspeed']/3, leeway, 0, 0, self._X0.getArray()[STATE_POS][2], 0])
 
-            # If the boat want to turn, we act with the rudder
-            zmoment = dX._x_omega[2]
+    def steadyState(self, p, T, i=np.deg2rad(15)):
+        """
+        Return the state vector and the command of a steady state, given:
+            - p : unknowns [speed, leeway, roll, pitch, heave, rudder]
+            - T : target dictionnary. The speed vector has the heading T['target']
+            - i : target wind incidence of the sail (the sail is trimmed as the navigator does)
+        """
+        heading = T['target']
+        speedDir = np.array([np.cos(heading), -np.sin(heading), 0])
 
-            rudder = U._u_rudder + zmoment*0.01
-            U._u_rudder = np.clip(rudder, -np.deg2rad(30), np.deg2rad(30))
+        X = self._X0.copy()
+        X.setPos(np.array([0, 0, p[4]]))
+        X.setAng(np.array([p[2], p[3], heading + p[1]]))
+        solver = X._x_speed.getSpeed().getSolver()
+        X.setSpeed(Vector(solver, p[0]*speedDir, Base.SEA))
+        X.setOmega(Vector(solver, np.zeros(3), Base.SEA))
 
-            Ts.append(T)
-            Xs.append(X.copy())
-            Us.append(U.copy())
-            ts.append(i*0.01)
+        # The apparent wind does not depend on the sail angle
+        U = CommandVector(0, p[5], T['wang'], T['wspeed'])
+        solver.loadStateVector(X, U)
+        U._u_sail = getOptimalSailAng(solver, X, i)
+        return X, U
 
-            X += dX*0.05
+    def steadyStateResidual(self, p, T, i=np.deg2rad(15)):
+        """
+        Return the force and moment balance of a steady state (acceleration
+        and rotation acceleration, see steadyState)
+        """
+        X, U = self.steadyState(p, T, i)
+        dx = self._F(X, U).getArray()
+        return np.concatenate((dx[STATE_SPEED], dx[STATE_OMEGA]))
 
-        Xs = np.array(Xs)
-        Us = np.array(Us)
-        Ts = np.array(Ts)
-        ts = np.array(ts)
+    def solveSteadyState(self, T, p0=None, i=np.deg2rad(15), tol=STEADY_TOL, maxIter=STEADY_MAX_ITER, log=False):
+        """
+        Find a steady state (VPP equilibrium) with a damped Newton (Levenberg-Marquardt)
+        method and a finite difference jacobian, given:
+            - T  : target dictionnary (the heading of the speed vector is T['target'])
+            - p0 : initial unknowns [speed, leeway, roll, pitch, heave, rudder] (warm start),
+                   None to use getSteadyStateInit
+            - i  : target wind incidence of the sail
+            - tol: tolerance on the residual (m/s2 and rad/s2)
+        Return the state vector, the command, the unknowns and a dictionnary
+        {'converged', 'iter', 'F', 'residual'}
+        """
+        if (p0 is None):
+            p0 = self.getSteadyStateInit(T)
+        p = np.array(p0, dtype=float)
+        r = self.steadyStateResidual(p, T, i)
+        nF = 1
+        lam = STEADY_LM_LAMBDA
+        converged = False
+        it = 0
+        while (it < maxIter):
+            if (np.max(np.abs(r)) < tol):
+                converged = True
+                break
+            it += 1
+
+            # Forward finite difference jacobian
+            J = np.zeros((len(r), len(p)))
+            for j in range(len(p)):
+                eps = JACOBIAN_FD_EPS*max(1, abs(p[j]))
+                pk = p.copy()
+                pk[j] += eps
+                J[:,j] = (self.steadyStateResidual(pk, T, i) - r)/eps
+            nF += len(p)
+
+            # Damped step, the damping is increased until the residual decreases
+            A = J.T.dot(J)
+            g = J.T.dot(r)
+            cost = r.dot(r)
+            accepted = False
+            for k in range(STEADY_LM_MAX_TRY):
+                dp = np.linalg.solve(A + lam*np.diag(np.diag(A) + 1e-12), -g)
+                pn = p + dp
+                pn[5] = np.clip(pn[5], -STEADY_MAX_RUDDER, STEADY_MAX_RUDDER)
+                rn = self.steadyStateResidual(pn, T, i)
+                nF += 1
+                if np.all(np.isfinite(rn)) and (rn.dot(rn) < cost):
+                    p, r = pn, rn
+                    lam = max(lam/3, 1e-9)
+                    accepted = True
+                    break
+                lam *= 4
+            
+            if (log):
+                print("[INFO] - Steady state iteration {}: residual = {:.2e}, lambda = {:.1e}".format(it, np.max(np.abs(r)), lam))
+            if not accepted:
+                # No descent direction: stuck in a local minimum
+                break
 
-        return ts, Xs, Us, Ts
+        X, U = self.steadyState(p, T, i)
+        return X, U, p, {'converged':converged,
+                         'iter':it,
+                         'F':nF,
+                         'residual':float(np.max(np.abs(r)))}
 
-    
     def step(self, dt):
         """
         Perform a step in the RK4 method
+        In RK45 mode, the step dt is divided in adaptive sub-steps
         """
         self._Tvec, self._S = self._T(self._X, self._S, self._t)
+        if (self._method == IntegrationMethod.RK45):
+            tf = self._t + dt
+            Xk, Xnew = self._buffers
+            while (tf - self._t > 1e-9*dt):
+                hdone, self._h, EpsiNew = self.RK45Step(self._X, self._Tvec, self._Epsi, self._U, min(self._h, tf - self._t), Xnew, Xk)
+                tEvent = None
+                if (self._events != None):
+                    x0 = self._X.getArray()
+                    tEvent = self.checkEvents(self._t, x0, hdone, Xnew, lambda theta: DPDenseOutput(x0, hdone, self._K, theta))
+                self._X.assign(Xnew)
+                self._Epsi, self._U = self.getStepCommand(self._X, self._Tvec, self._Epsi, self._U, EpsiNew, hdone, hdone)
+                self._t += hdone
+                if (tEvent != None):
+                    self._t = tEvent
+                    raise SimuFinishedException(self._eventLog[-1][0])
+            self._t = tf
+            return
+        
         self._U, dEpsi = self._Fu(self._X, self._Epsi, self._Tvec, self._U)
         self._Epsi += dEpsi*dt
-        self._X += RK4Step(self._X, self._F, self._Fu, self._Tvec, self._Epsi, self._U, dt)
+        if (self._events != None):
+            x0 = self._X.getArray().copy()
+        self._X += self.fixedStep(self._X, self._Tvec, self._Epsi, self._U, dt, self._buffers)
         self._t += dt
+        if (self._events != None):
+            tEvent = self.checkEvents(self._t - dt, x0, dt, self._X,
+                                      self.getStepInterpolant(x0, self._X, dt, self._Tvec, self._Epsi, self._U, self._buffers[1]))
+            if (tEvent != None):
+                self._t = tEvent
+                raise SimuFinishedException(self._eventLog[-1][0])
         # Update the traces:
         """self._Xs.append(self._X.copy())
         self._Us.append(self._U.copy())
@@ -235,13 +641,208 @@ class EDOSolver():
         Reset the state of the EDO solver
         """
         self._X = self._X0.copy()
+        self._buffers = (self._X0.copy(), self._X0.copy())
         if resetTargetFct:
             self._S = copy.deepcopy(self._S0)
         self._U = self._U0.copy()
         self._t = 0
         self._Epsi = self._Epsi0.copy()
+        self._h = DEFAULT_DT_SIM
+        self._fsal = None
+        self.resetJacobian()
+        self.resetStepStats()
+        self.startEvents(0, self._X)
         #print(self._X.toJSON())
 
+    def setMethod(self, method, rtol=None, atol=None):
+        """
+        Set the integration method (IntegrationMethod) and the tolerances of the adaptive method
+            - rtol : relative tolerance
+            - atol : absolute tolerance (scalar or array, one value per component of the state vector)
+        """
+        self._method = method
+        if (rtol != None):
+            self._rtol = rtol
+        if (atol is not None):
+            self._atol = atol
+
+    def setEvents(self, events):
+        """
+        Set the events checked after each accepted step (list of SimuEvent, see Events).
+        The simulation stops at the first terminal event
+        """
+        self._events = EventSet(events) if (len(events) > 0) else None
+        self._eventLog = []
+        self._eventG = None
+        if (self._events != None):
+            self.startEvents(self._t, self._X)
+
+    def getEvents(self):
+        """
+        Return the events checked (EventSet) or None
+        """
+        return self._events
+
+    def getEventLog(self):
+        """
+        Return the events found since the start of the simulation: list of (name, time)
+        """
+        return self._eventLog
+
+    def startEvents(self, t, X):
+        """
+        Initialize the events at the start of a simulation (time t, state vector X)
+        """
+        self._eventLog = []
+        if (self._events != None):
+            self._events.reset(t, X.getArray())
+            self._eventG = self._events.values(t, X.getArray())
+
+    def checkEvents(self, t0, x0, h, X, stateAt):
+        """
+        Check the events in the accepted step of size h from the packed state x0 (time t0)
+        to the state vector X. stateAt(theta) returns the packed state at t0 + theta*h.
+        The events found are logged. If a terminal event is found, X is set to the state of
+        the first terminal event and its time is returned, else None
+        """
+        x = X.getArray()
+        self._events.updateSteady(t0 + h, x)
+        g0 = self._eventG
+        g = self._events.values(t0 + h, x)
+        self._eventG = g
+        crossings = self._events.getCrossings(g0, g)
+        if (len(crossings) == 0):
+            return None
+
+        thetas = [self._events.locate(k, t0, h, g0[k], g[k], stateAt) for k in crossings]
+        for j in np.argsort(thetas, kind='stable'):
+            k = crossings[j]
+            tEvent = float(t0 + thetas[j]*h)
+            self._eventLog.append((self._events.getEvent(k).getName(), tEvent))
+            if self._events.isTerminal(k):
+                x[:] = stateAt(thetas[j])
+                return tEvent
+        return None
+
+    def getStepInterpolant(self, x0, X, h, T, Epsi, U, Xk):
+        """
+        Return the function theta -> packed state of a fixed step of size h from the packed state x0
+        to X (cubic Hermite interpolation). Nothing is computed until an event is located inside
+        the step: the derivatives are computed at the first call with 0 < theta < 1, Xk is overwritten.
+        If F cannot be computed at the ends of the step (e.g. out of the buoyency model), the
+        interpolation is linear
+        """
+        x1 = []
+        ends = []
+        def stateAt(theta):
+            if (len(x1) == 0):
+                # The state at the end of the step is kept: X is overwritten by a terminal event
+                x1.append(X.getArray().copy())
+            if (theta <= 0):
+                return x0.copy()
+            if (theta >= 1):
+                return x1[0].copy()
+            if (len(ends) == 0):
+                try:
+                    Xk.getArray()[:] = x0
+                    ends.append(self._F(Xk, self.getStageFu()(Xk, Epsi, T, U)[0]).getArray().copy())
+                    Xk.getArray()[:] = x1[0]
+                    ends.append(self._F(Xk, self.getStageFu()(Xk, Epsi, T, U)[0]).getArray().copy())
+                except SimulatorException as e:
+                    raise e
+                except Exception:
+                    ends[:] = [None, None]
+            if (ends[0] is None):
+                return (1 - theta)*x0 + theta*x1[0]
+            return hermiteInterpolation(x0, ends[0], x1[0], ends[1], h, theta)
+        return stateAt
+
+    def resetJacobian(self):
+        """
+        Force the update of the jacobian at the next implicit step
+        """
+        self._jacobian = None
+        self._jacobianAge = 0
+        self._Winv = None
+        self._Winvdt = None
+
+    def setCommandHold(self, hold):
+        """
+        If hold is True, the command is computed once per step and kept constant
+        during the stages of the step (zero-order hold).
+        Otherwise, the command is re-computed at each stage
+        """
+        self._commandHold = hold
+
+    def getCommandHold(self):
+        """
+        Return True if the command is hold during a step
+        """
+        return self._commandHold
+    
+    def getStageFu(self):
+        """
+        Return the command function used in the stages of a step
+        """
+        if self._commandHold:
+            return ZOHCommand
+        return self._Fu
+
+    def getMethod(self):
+        """
+        Return the integration method
+        """
+        return self._method
+
+    def getIntegratorSettings(self):
+        """
+        Return the settings of the integration method: method, command hold and tolerances
+        """
+        return {'method':self._method.value,
+                'hold':self._commandHold,
+                'rtol':self._rtol,
+                'atol':np.atleast_1d(self._atol).tolist()}
+
+    def resetStepStats(self):
+        """
+        Reset the statistics of the integration steps
+        """
+        self._stepStats = {'accepted':0, 'rejected':0, 'F':0, 'jacobian':0}
+
+    def getStepStats(self):
+        """
+        Return the statistics of the integration steps:
+        number of accepted and rejected steps, evaluation of F (RK45)
+        and number of jacobian updates (ROS2)
+        """
+        return self._stepStats
+
+    def unpackState(self, state, X):
+        """
+        Restore a state packed by packSolverState: X is overwritten and the jacobian is restored.
+        Return the state vector, the command, the state of the target function and the integrated error
+        """
+        X.getArray()[:] = state['X']
+        self._jacobian = state['jacobian']
+        self._jacobianAge = state['jacobianAge']
+        self._Winv = None
+        return X, CommandVector.fromArray(state['U']), copy.deepcopy(state['S']), state['Epsi'].copy()
+
+    def getCheckpointState(self):
+        """
+        Return the packed state of the live simulation (see packSolverState)
+        """
+        return packSolverState(self._X, self._U, self._S, self._Epsi, self._t, self._h, self._jacobian, self._jacobianAge)
+
+    def loadCheckpointState(self, state):
+        """
+        Restore the live simulation from a packed state (see packSolverState)
+        """
+        self.setX(self._X0)
+        self._X, self._U, self._S, self._Epsi = self.unpackState(state, self._X)
+        self._t = state['t']
+        self._h = state['h']
+
     def setX0(self, X0):
         """
         Set the initial default state vector
@@ -253,6 +854,8 @@ class EDOSolver():
         Overide the value of the state vector
         """
         self._X = X.copy()
+        self._buffers = (X.copy(), X.copy())
+        self.resetJacobian()
 
     def resetS(self):
         """
@@ -0,0 +1,210 @@
+import numpy as np
+
+import sys
+import pathlib
+_parentdir = pathlib.Path(__file__).parent.parent.resolve()
+_2parentdir = pathlib.Path(__file__).parent.parent.parent.resolve()
+sys.path.insert(0, str(_parentdir))
+sys.path.insert(0, str(_2parentdir))
+
+from config.Config import *
+from backend.solver.StateVector import *
+
+"""
+    Events of a simulation. An event is the zero crossing of an event function g(t, x)
+    of the time and of the packed state vector x. The events are checked after each
+    accepted step and the time of the crossing is located by root finding
+"""
+
+class SimuEvent():
+    def __init__(self, name, terminal=True, direction=0):
+        """
+        Event of a simulation:
+            - name     : name of the event
+            - terminal : if the simulation stops at the event
+            - direction: crossing direction detected, 1: g becomes >= 0, -1: g becomes <= 0, 0: both
+        """
+        self.name = name
+        self.terminal = terminal
+        self.direction = direction
+
+    def getName(self):
+        return self.name
+
+    def isTerminal(self):
+        return self.terminal
+
+    def getDirection(self):
+        return self.direction
+
+class ThresholdEvent(SimuEvent):
+    def __init__(self, name, idx, threshold, absolute=True, terminal=True, direction=1):
+        """
+        Event g = x[idx] - threshold (or |x[idx]| - threshold if absolute)
+        """
+        super().__init__(name, terminal, direction)
+        self.idx = idx
+        self.threshold = threshold
+        self.absolute = absolute
+
+class TimeLimitEvent(SimuEvent):
+    def __init__(self, name, tmax, terminal=True):
+        """
+        Event g = t - tmax
+        """
+        super().__init__(name, terminal, 1)
+        self.tmax = tmax
+
+class HeadingEvent(SimuEvent):
+    def __init__(self, name, heading, tolerance, terminal=True):
+        """
+        Event raised when the true heading enters the interval heading +/- tolerance
+        g = |true heading - heading| - tolerance
+        """
+        super().__init__(name, terminal, -1)
+        self.heading = heading
+        self.tolerance = tolerance
+
+class SteadyEvent(SimuEvent):
+    def __init__(self, name, window, tolerance, heading=True, terminal=True):
+        """
+        Event raised when the true heading and the angles of the boat did not move by more
+        than tolerance during window seconds (criterion of the convergence block).
+        If not heading, only the roll and the pitch are checked (R+P convergence block)
+        g = (t - time of the last move) - window
+        """
+        super().__init__(name, terminal, 1)
+        self.window = window
+        self.tolerance = tolerance
+        self.heading = heading
+
+def getCapsizeEvent(terminal=True):
+    """
+    Return the event of the roll crossing CRITICAL_ROLL
+    """
+    return ThresholdEvent('capsize', STATE_ANG.start + ROLL_AXIS, CRITICAL_ROLL, True, terminal)
+
+def getTrueHeadings(x):
+    """
+    Return the true heading of packed state vector(s) x
+    """
+    return -np.arctan2(x[...,STATE_SPEED.start+1], x[...,STATE_SPEED.start])
+
+class EventSet():
+    def __init__(self, events):
+        """
+        Set of events, evaluated at once: the events of the same kind are stored in arrays
+        """
+        self.events = list(events)
+        self.terminal = np.array([e.isTerminal() for e in self.events], dtype=bool)
+        self.direction = np.array([e.getDirection() for e in self.events])
+
+        # Threshold events
+        self.iThr = np.array([i for i, e in enumerate(self.events) if isinstance(e, ThresholdEvent)], dtype=int)
+        self.thrIdx = np.array([self.events[i].idx for i in self.iThr], dtype=int)
+        self.thr = np.array([self.events[i].threshold for i in self.iThr])
+        self.thrAbs = np.array([self.events[i].absolute for i in self.iThr], dtype=bool)
+
+        # Time limit events
+        self.iTime = np.array([i for i, e in enumerate(self.events) if isinstance(e, TimeLimitEvent)], dtype=int)
+        self.tmax = np.array([self.events[i].tmax for i in self.iTime])
+
+        # Heading events
+        self.iHead = np.array([i for i, e in enumerate(self.events) if isinstance(e, HeadingEvent)], dtype=int)
+        self.headings = np.array([self.events[i].heading for i in self.iHead])
+        self.headTol = np.array([self.events[i].tolerance for i in self.iHead])
+
+        # Steady events: reference heading and angles, and time of the last move
+        self.iSteady = np.array([i for i, e in enumerate(self.events) if isinstance(e, SteadyEvent)], dtype=int)
+        self.window = np.array([self.events[i].window for i in self.iSteady])
+        self.steadyTol = np.array([self.events[i].tolerance for i in self.iSteady])
+        self.steadyHeading = np.array([self.events[i].heading for i in self.iSteady], dtype=bool)
+        # Angles checked: roll, pitch and yaw if the heading is checked
+        self.steadyAngMask = np.ones((len(self.iSteady), 3))
+        self.steadyAngMask[~self.steadyHeading, 2] = 0
+        self.refHeading = np.zeros(len(self.iSteady))
+        self.refAng = np.zeros((len(self.iSteady), 3))
+        self.lastMove = np.zeros(len(self.iSteady))
+
+    def __len__(self):
+        return len(self.events)
+
+    def reset(self, t, x):
+        """
+        Reset the references of the steady events at the state x (time t)
+        """
+        self.refHeading[:] = getTrueHeadings(x)
+        self.refAng[:] = x[STATE_ANG]
+        self.lastMove[:] = t
+
+    def values(self, t, x):
+        """
+        Return the values of the event functions at the time t and packed state vector x
+        """
+        g = np.empty(len(self.events))
+        v = x[self.thrIdx]
+        g[self.iThr] = np.where(self.thrAbs, np.abs(v), v) - self.thr
+        g[self.iTime] = t - self.tmax
+        dif = np.mod(getTrueHeadings(x) - self.headings + np.pi, 2*np.pi) - np.pi
+        g[self.iHead] = np.abs(dif) - self.headTol
+        g[self.iSteady] = (t - self.lastMove) - self.window
+        return g
+
+    def updateSteady(self, t, x):
+        """
+        Update the references of the steady events with the state x at the end of a step (time t)
+        """
+        if (len(self.iSteady) == 0):
+            return
+        heading = getTrueHeadings(x)
+        dif = np.mod(heading - self.refHeading + np.pi, 2*np.pi) - np.pi
+        moved = (self.steadyHeading & (np.abs(dif) > self.steadyTol)) | \
+                (np.linalg.norm((x[STATE_ANG] - self.refAng)*self.steadyAngMask, axis=1) > self.steadyTol)
+        self.refHeading[moved] = heading
+        self.refAng[moved] = x[STATE_ANG]
+        self.lastMove[moved] = t
+
+    def getCrossings(self, g0, g1):
+        """
+        Return the index of the events whose function crossed zero between g0 and g1
+        """
+        up = (g0 < 0) & (g1 >= 0) & (self.direction >= 0)
+        down = (g0 > 0) & (g1 <= 0) & (self.direction <= 0)
+        return np.nonzero(up | down)[0]
+
+    def locate(self, k, t0, h, g0, g1, stateAt):
+        """
+        Return the fraction theta of the step [t0, t0+h] where the event k crosses zero,
+        with the Illinois method. stateAt(theta) returns the packed state inside the step
+        """
+        if (k in self.iSteady):
+            # The steady event function is linear in the time
+            return min(1, max(0, -g0/(g1 - g0)))
+        a, b = 0, 1
+        ga, gb = g0, g1
+        side = 0
+        for i in range(EVENT_MAX_ITER):
+            if ((b - a)*h < EVENT_TOL_SIM):
+                break
+            theta = (a*gb - b*ga)/(gb - ga)
+            g = self.values(t0 + theta*h, stateAt(theta))[k]
+            if (np.sign(g) == np.sign(gb)) or (g == 0):
+                b, gb = theta, g
+                if (side == 1):
+                    ga /= 2
+                side = 1
+            else:
+                a, ga = theta, g
+                if (side == -1):
+                    gb /= 2
+                side = -1
+        return b
+
+    def getEvent(self, k):
+        """
+        Return the event number k
+        """
+        return self.events[k]
+
+    def isTerminal(self, k):
+        return self.terminal[k]
@@ -0,0 +1,114 @@
+from concurrent.futures import ProcessPoolExecutor
+import os
+
+import sys
+import pathlib
+_parentdir = pathlib.Path(__file__).parent.parent.resolve()
+_2parentdir = pathlib.Path(__file__).parent.parent.parent.resolve()
+sys.path.insert(0, str(_parentdir))
+sys.path.insert(0, str(_2parentdir))
+
+from config.Config import *
+from utils.Utils import *
+from backend.solver.Solver import *
+from backend.solver.BatchRunner import *
+
+"""
+    Linearization of the boat's EDO around a state: dX/dt = A dX + B dU.
+    The eigenvalues of A give the dynamic modes of the boat (roll, pitch, yaw, heave)
+"""
+
+# Components of the packed state vector of each degree of freedom: (position, speed)
+LINEAR_DOFS = {'surge':(0, 3),
+               'sway' :(1, 4),
+               'heave':(2, 5),
+               'roll' :(6, 9),
+               'pitch':(7, 10),
+               'yaw'  :(8, 11)}
+
+# Modes returned by getModes
+LINEAR_MODES = ['roll', 'pitch', 'yaw', 'heave']
+
+def getParticipations(vec, eig):
+    """
+    Return the participation of each degree of freedom (LINEAR_DOFS) in the
+    mode of eigenvector vec and eigenvalue eig (the fractions sum to 1)
+    """
+    part = {}
+    for dof, (ipos, ispeed) in LINEAR_DOFS.items():
+        part[dof] = np.abs(vec[ipos]) + np.abs(vec[ispeed])/max(np.abs(eig), LINEAR_MODE_MIN_EIG)
+    total = sum(part.values())
+    return {dof:float(part[dof]/total) for dof in part}
+
+def getModes(A):
+    """
+    Return the dynamic modes of the jacobian A = dF/dX. For each mode of LINEAR_MODES, the
+    eigenvalue whose eigenvector has the largest participation of the degree of freedom:
+        - eig      : eigenvalue (1/s)
+        - omega    : natural pulsation |eig| (rad/s)
+        - damping  : damping ratio -Re(eig)/|eig| (1: aperiodic, < 0: unstable)
+        - vector   : eigenvector
+        - participation: participation of each degree of freedom
+    The neutral modes (|eig| < LINEAR_MODE_MIN_EIG) are discarded
+    """
+    eigs, vecs = np.linalg.eig(A)
+    candidates = [j for j in range(len(eigs)) if (np.abs(eigs[j]) >= LINEAR_MODE_MIN_EIG)]
+    participations = {j:getParticipations(vecs[:,j], eigs[j]) for j in candidates}
+
+    modes = {}
+    for mode in LINEAR_MODES:
+        if (len(candidates) == 0):
+            break
+        # Largest participation, the eigenvalue with a positive imaginary part of a pair
+        j = max(candidates, key=lambda j: (round(participations[j][mode], 9), eigs[j].imag))
+        modes[mode] = {'eig':complex(eigs[j]),
+                       'omega':float(np.abs(eigs[j])),
+                       'damping':float(-eigs[j].real/np.abs(eigs[j])),
+                       'vector':vecs[:,j],
+                       'participation':participations[j]}
+    return modes
+
+def linearize(solver, X, U):
+    """
+    Return the jacobians A = dF/dX, B = dF/dU and the modes (see getModes) of the boat at (X, U)
+    """
+    A, B = solver.jacobian(X, U)
+    return A, B, getModes(A)
+
+# Solver of a worker process, built once by initLinearizationWorker
+_linearizationWorker = {}
+
+def initLinearizationWorker(geomSave, modelPath):
+    """
+    Build the solver of a worker process from a serialized geometry
+    """
+    _linearizationWorker['solver'] = buildSolvers(deserializeGeom(geomSave), modelPath)[0]
+
+def runLinearizations(xs, us):
+    """
+    Return the jacobians (A, B) at the packed state vectors xs and commands us, with the solver
+    of the worker process (one batchF for all the points, see Solver.jacobians)
+    """
+    return _linearizationWorker['solver'].jacobians(xs, us)
+
+def computeLinearizations(geomSave, modelPath, points, maxWorkers=None):
+    """
+    Linearize the boat at several points in a pool of processes
+        - geomSave  : serialized geometry (see serializeGeom)
+        - modelPath : buoyency model file
+        - points    : list of (packed state vector, packed command vector)
+        - maxWorkers: number of processes (None: number of processors)
+    The points are split in one chunk per process, the perturbed derivatives of a chunk
+    are computed along the batch axis of batchF.
+    Return the list of (A, B, modes) of each point
+    """
+    nChunks = min(len(points), maxWorkers or os.cpu_count() or 1)
+    chunks = [chunk for chunk in np.array_split(np.arange(len(points)), nChunks) if (len(chunk) > 0)]
+    with ProcessPoolExecutor(max_workers=len(chunks),
+                             initializer=initLinearizationWorker,
+                             initargs=(geomSave, modelPath)) as executor:
+        results = executor.map(runLinearizations,
+                               [[points[i][0] for i in chunk] for chunk in chunks],
+                               [[points[i][1] for i in chunk] for chunk in chunks])
+        jacobians = [AB for result in results for AB in result]
+    return [(A, B, getModes(A)) for A, B in jacobians]
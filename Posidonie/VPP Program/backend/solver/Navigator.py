@@ -43,9 +43,36 @@ Epsi0 = np.zeros(2)
 def T0Fct(X, S, t):
     return defaultT0, S
 
+def getTargetFctFromStr(fctStr):
+    """
+    Return a target function from its str definition (see NavController.getStrFunctionOfTarget)
+    """
+    scope = dict(globals())
+    exec(fctStr, scope)
+    return scope['signal']
+
+def buildTargetFct(fctStrs, app=None, t0=0):
+    """
+    Return the target function of the navigator, giving the str definition
+    of the function of each target (dic: target name -> str).
+        - app : application object given to the functions (None when headless)
+        - t0  : starting time of the functions
+    """
+    Tpartials = {tname:getTargetFctFromStr(fctStrs[tname]) for tname in fctStrs}
+
+    def Tfct(X, S, t):
+        T = {}
+        for tname in Tpartials:
+            Tp, S[tname] = Tpartials[tname](app, X, S[tname], t-t0)
+            T[tname] = T0Units[tname]['f'](Tp)
+        return T, S
+    
+    return Tfct
+
 class Navigator():
     def __init__(self, solver):
         self._solver = solver
+        self.geomSI = None # Values of the geometry in the SI system (see GeomSnapshot)
         self.updateGeom(navigatorDefaultGeom)
         self._TFct = T0Fct # Constant target by default
 
@@ -78,12 +105,13 @@ class Navigator():
         Update the geometry of this component (= the parameters)
         """
         self.geom = geom
+        self.geomSI = GeomSnapshot(geom, self.geomSI)
 
     def getGeomP(self, name):
         """
-        Return the value of the geometric parameter named 'name'
+        Return the value of the geometric parameter named 'name' (SI system)
         """
-        return Units.toSI(self.geom[name]['value'], self.geom[name]['unit'])
+        return self.geomSI.values[name]
 
     def T(self, X, S, t):
         """
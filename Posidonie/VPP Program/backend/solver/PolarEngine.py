@@ -0,0 +1,302 @@
+import time as tm
+import json
+import os
+import argparse
+from concurrent.futures import ProcessPoolExecutor, as_completed
+
+import sys
+import pathlib
+_parentdir = pathlib.Path(__file__).parent.parent.resolve()
+_2parentdir = pathlib.Path(__file__).parent.parent.parent.resolve()
+sys.path.insert(0, str(_parentdir))
+sys.path.insert(0, str(_2parentdir))
+
+from config.Config import *
+from utils.Utils import *
+from backend.solver.Solver import *
+from backend.solver.EDOSolver import *
+from backend.solver.BatchRunner import *
+from backend.solver.ResultCache import *
+
+"""
+    Parallel polar engine: each (wind speed, heading) point is an independent
+    simulation run until convergence in a pool of processes
+    Usage (from the 'VPP Program' folder):
+        python -m backend.solver.PolarEngine save.json --wspeeds 5 10 15 --n 20 [options]
+"""
+
+# Version of the convergence criterion of the simulated polar points (see simulatePolarPoint),
+# part of their key in the result cache
+POLAR_POINT_CRITERION_VERSION = 2
+
+def getDefaultPolarSetup():
+    """
+    Return the default setup of a polar point simulation
+    """
+    return {'steadyTime':3,               # Minimum steady time (s)
+            'steadyAng':1,                # Max. steady variation (deg)
+            'targetError':5,              # Max. heading error (deg)
+            'dt':DEFAULT_DT_SIM,          # Time step (s)
+            'tmax':POLAR_MAX_TIME_SIM,    # Maximum simulated time (s)
+            'method':IntegrationMethod.RK4,
+            'hold':False,
+            'steady':False,               # Solve the steady state instead of simulating
+            'cache':True}                 # Reuse the results of the result cache
+
+def getPolarPointTarget(wspeed, heading):
+    """
+    Return a constant target function: target heading 0, wind angle heading (deg)
+    and wind speed wspeed (knt)
+    """
+    T = {'target':0,
+         'wang':np.deg2rad(heading),
+         'wspeed':noeud2ms(wspeed)}
+    def Tfct(X, S, t):
+        return T, S
+    return Tfct
+
+# Solvers of a worker process, built once by initPolarWorker
+_polarWorker = {}
+
+def initPolarWorker(geomSave, modelPath):
+    """
+    Build the solvers of a worker process from a serialized geometry
+    """
+    solver, edoSolver = buildSolvers(deserializeGeom(geomSave), modelPath)
+    _polarWorker['solver'] = solver
+    _polarWorker['edoSolver'] = edoSolver
+    _polarWorker['digest'] = getSolverDigest(solver)
+
+def getPolarPointKey(kind, solverDigest, edoSolver, wspeed, heading, setup):
+    """
+    Return the key of a polar point in the result cache
+    """
+    settings = getSerializableSetup(setup)
+    del settings['cache']
+    if setup['steady']:
+        settings['steadySolver'] = [STEADY_TOL, STEADY_MAX_ITER, STEADY_LM_LAMBDA, STEADY_LM_MAX_TRY, STEADY_MAX_RUDDER]
+    else:
+        settings['rtol'] = edoSolver.getIntegratorSettings()['rtol']
+        settings['atol'] = edoSolver.getIntegratorSettings()['atol']
+        settings['criterion'] = POLAR_POINT_CRITERION_VERSION
+    return getCacheKey(kind, solverDigest, {'wspeed':wspeed, 'heading':heading}, settings)
+
+def simulatePolarPoint(solver, edoSolver, wspeed, heading, setup):
+    """
+    Simulate the boat at a constant target until the heading and the angles of the
+    boat are steady (steady event, same criterion as the convergence block of the navigation controller)
+    and the heading error is below setup['targetError']. A steady stop with a larger heading
+    error (slow drift of the heading) rearms the steady event and the simulation goes on,
+    until a steady stop where the heading did not move since the previous one
+    Return the result dictionnary of the point
+    """
+    solver.getNavigator().setTargetFct(getPolarPointTarget(wspeed, heading))
+    edoSolver.setMethod(setup['method'])
+    edoSolver.setCommandHold(setup['hold'])
+    edoSolver.setEvents([SteadyEvent('steady', setup['steadyTime'], np.deg2rad(setup['steadyAng']))])
+    edoSolver.reset()
+
+    error = None
+    converged = False
+    steadyHeading = None # Heading of the last steady stop
+    try:
+        while (edoSolver.getTime() < setup['tmax']):
+            try:
+                edoSolver.step(setup['dt'])
+            except SimuFinishedException:
+                boatHeading = edoSolver.getState().getTrueHeading()
+                if (np.abs(boatHeading) <= np.deg2rad(setup['targetError'])):
+                    converged = True
+                    break
+                if (steadyHeading != None) and (np.abs(getAngleDif(boatHeading, steadyHeading)) <= np.deg2rad(setup['steadyAng'])):
+                    # Steady away from the target
+                    break
+                # The heading is still drifting towards the target
+                steadyHeading = boatHeading
+                edoSolver.startEvents(edoSolver.getTime(), edoSolver.getState())
+    except Exception as e:
+        error = str(e)
+    edoSolver.setEvents([])
+
+    X = edoSolver.getState()
+    if (steadyHeading != None) and not converged and (error == None):
+        error = "the heading did not converge"
+
+    return {'wspeed':wspeed,
+            'heading':heading,
+            'ang':np.deg2rad(heading),
+            'speed':float(X.getBoatSpeedNorm()),
+            'roll':float(np.abs(X.getBoatRoll())),
+            'pitch':float(X.getBoatPitch()),
+            'converged':converged,
+            'time':edoSolver.getTime(),
+            'error':error}
+
+def solvePolarSweep(edoSolver, wspeed, headings, setup, solverDigest=None):
+    """
+    Solve the steady state of each heading of a wind speed, each solution
+    is the initial guess (warm start) of the next heading.
+    If solverDigest != None and setup['cache'], the points are searched in the result cache first
+    Return the list of the result dictionnary of each point
+    """
+    results = []
+    p = None
+    cache = ResultCache() if (setup['cache'] and (solverDigest != None)) else None
+    for heading in headings:
+        if (cache != None):
+            key = getPolarPointKey('steadyPoint', solverDigest, edoSolver, wspeed, heading, setup)
+            cached = cache.get(key)
+            if (cached != None):
+                result, pn = cached
+                if result['converged']:
+                    p = pn
+                results.append(result)
+                continue
+        T = {'target':0,
+             'wang':np.deg2rad(heading),
+             'wspeed':noeud2ms(wspeed)}
+        X, U, pn, info = edoSolver.solveSteadyState(T, p0=p)
+        if not info['converged'] and (p is not None):
+            # Retry from the default initial guess
+            X, U, pn, info = edoSolver.solveSteadyState(T)
+        if info['converged']:
+            p = pn
+        results.append({'wspeed':wspeed,
+                        'heading':heading,
+                        'ang':np.deg2rad(heading),
+                        'speed':float(X.getBoatSpeedNorm()),
+                        'roll':float(np.abs(X.getBoatRoll())),
+                        'pitch':float(X.getBoatPitch()),
+                        'converged':info['converged'],
+                        'time':0,
+                        'error':None if info['converged'] else "residual = {:.2e}".format(info['residual'])})
+        if (cache != None):
+            cache.put(key, (results[-1], pn))
+    return results
+
+def runPolarSweep(wspeed, headings, setup):
+    """
+    Solve the steady states of a wind speed with the solvers of the worker process
+    """
+    return solvePolarSweep(_polarWorker['edoSolver'], wspeed, headings, setup, _polarWorker['digest'])
+
+def runPolarPoint(wspeed, heading, setup):
+    """
+    Simulate a polar point with the solvers of the worker process
+    (the result is searched in the result cache first if setup['cache'])
+    """
+    if not setup['cache']:
+        return simulatePolarPoint(_polarWorker['solver'], _polarWorker['edoSolver'], wspeed, heading, setup)
+
+    cache = ResultCache()
+    key = getPolarPointKey('polarPoint', _polarWorker['digest'], _polarWorker['edoSolver'], wspeed, heading, setup)
+    result = cache.get(key)
+    if (result == None):
+        result = simulatePolarPoint(_polarWorker['solver'], _polarWorker['edoSolver'], wspeed, heading, setup)
+        cache.put(key, result)
+    return result
+
+def computePolar(geomSave, modelPath, wspeeds, headings, setup=None, maxWorkers=None, progressFct=None):
+    """
+    Simulate every (wind speed, heading) point in a pool of processes. If setup['steady'],
+    the steady states of each wind speed are solved in a sweep instead
+        - geomSave   : serialized geometry (see serializeGeom)
+        - modelPath  : buoyency model file
+        - wspeeds    : wind speeds (knt)
+        - headings   : wind angles (deg)
+        - setup      : setup of the simulations (see getDefaultPolarSetup)
+        - maxWorkers : number of processes (None: number of processors)
+        - progressFct: called with (nb of points done, nb of points)
+    Return the list of the result dictionnary of each point
+    """
+    if (setup == None):
+        setup = getDefaultPolarSetup()
+    points = [(wspeed, heading) for wspeed in wspeeds for heading in headings]
+    results = []
+    with ProcessPoolExecutor(max_workers=maxWorkers,
+                             initializer=initPolarWorker,
+                             initargs=(geomSave, modelPath)) as executor:
+        if setup['steady']:
+            futures = [executor.submit(runPolarSweep, wspeed, headings, setup) for wspeed in wspeeds]
+        else:
+            futures = [executor.submit(runPolarPoint, wspeed, heading, setup) for wspeed, heading in points]
+        for future in as_completed(futures):
+            result = future.result()
+            if isinstance(result, list):
+                results += result
+            else:
+                results.append(result)
+            if (progressFct != None):
+                progressFct(len(results), len(points))
+    return results
+
+def assemblePolarTraces(results, setup=None, geomStamp=None):
+    """
+    Return the save dictionnary of a polar trace (see PolarTrace.getSaveDic) for
+    each wind speed, from the results of computePolar. The points that did not
+    converge are discarded
+    """
+    traces = []
+    for wspeed in sorted(set([r['wspeed'] for r in results])):
+        points = sorted([r for r in results if r['wspeed'] == wspeed], key=lambda r: r['ang'])
+        for r in points:
+            if not r['converged']:
+                print("[INFO] - Polar point w={}knt, ang={:.1f}deg did not converge ({})".format(wspeed, r['heading'], r['error']))
+        points = [r for r in points if r['converged']]
+        traces.append({'wspeed':wspeed,
+                       'angs':[r['ang'] for r in points],
+                       'speeds':[r['speed'] for r in points],
+                       'rolls':[r['roll'] for r in points],
+                       'pitchs':[r['pitch'] for r in points],
+                       'setup':setup,
+                       'geomStamp':geomStamp})
+    return traces
+
+def getSerializableSetup(setup):
+    """
+    Return a setup that can be saved in a json file
+    """
+    setup = setup.copy()
+    setup['method'] = setup['method'].value
+    return setup
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description="Compute the polar of the geometry of an App save file in parallel")
+    parser.add_argument('save', help="App save file (.json)")
+    parser.add_argument('--wspeeds', type=float, nargs='+', default=[15], help="Wind speeds (knt)")
+    parser.add_argument('--n', type=int, default=5, help="Number of headings")
+    parser.add_argument('--angmin', type=float, default=45, help="Minimum wind angle (deg)")
+    parser.add_argument('--angmax', type=float, default=170, help="Maximum wind angle (deg)")
+    parser.add_argument('--out', default='polar.json', help="Output file (polar generator save)")
+    parser.add_argument('--workers', type=int, default=None, help="Number of processes")
+    parser.add_argument('--dt', type=float, default=DEFAULT_DT_SIM, help="Time step (s)")
+    parser.add_argument('--method', default=IntegrationMethod.RK4.value, choices=[m.value for m in IntegrationMethod], help="Integration method")
+    parser.add_argument('--hold', action='store_true', help="Zero-order hold of the command during a step")
+    parser.add_argument('--model', default=None, help="Buoyency model file, overrides the one of the save")
+    parser.add_argument('--steady', action='store_true', help="Solve the steady states instead of simulating")
+    parser.add_argument('--no-cache', action='store_true', help="Do not use the result cache")
+    args = parser.parse_args()
+
+    save = loadSaveFile(args.save)
+    modelPath = args.model
+    if (modelPath == None):
+        modelPath = save['hullBuoyencyEditor']['modelpath']
+
+    setup = getDefaultPolarSetup()
+    setup['dt'] = args.dt
+    setup['method'] = IntegrationMethod(args.method)
+    setup['hold'] = args.hold
+    setup['steady'] = args.steady
+    setup['cache'] = not args.no_cache
+
+    def logProgress(n, N):
+        print("[INFO] - {}/{} polar points done".format(n, N))
+
+    startTime = tm.time()
+    results = computePolar(save['geomEditor']['geom'], modelPath, args.wspeeds,
+                           np.linspace(args.angmin, args.angmax, args.n), setup,
+                           args.workers, logProgress)
+    traces = assemblePolarTraces(results, getSerializableSetup(setup))
+    with open(args.out, 'w') as f:
+        json.dump({'traces':traces}, f)
+    print("[INFO] - Polar computed in {:.1f}s -> {}".format(tm.time()-startTime, args.out))
@@ -0,0 +1,163 @@
+import time as tm
+import json
+
+import sys
+import pathlib
+_parentdir = pathlib.Path(__file__).parent.parent.resolve()
+_2parentdir = pathlib.Path(__file__).parent.parent.parent.resolve()
+sys.path.insert(0, str(_parentdir))
+sys.path.insert(0, str(_2parentdir))
+
+from config.Config import *
+from utils.Utils import *
+
+"""
+    Profiling of a simulation: time spent in each component of the EDO function,
+    number of evaluations of F and number of objects created. The methods are wrapped
+    when the profiler is enabled and restored when it is disabled, so that a solver
+    without profiler has no overhead
+"""
+
+# Classes whose instances are counted
+PROFILER_ALLOC_CLASSES = [Point, Vector, Moment, Force, Matrix, AngularSpeed,
+                          PointSpeed, PointAcceleration, StateVector,
+                          StateVectorDerivative, CommandVector]
+
+class Profiler():
+    def __init__(self):
+        self._wrapped = []    # (object, attribute, original value, original is an attribute of the object)
+        self._classes = []    # (class, original __init__ or None)
+        self.sections = {}    # name -> [number of calls, time (s)]
+        self.allocations = {} # class name -> number of objects created
+        self.reset()
+
+    def reset(self):
+        """
+        Reset the counters
+        """
+        for section in self.sections.values():
+            section[0] = 0
+            section[1] = 0
+        for name in self.allocations:
+            self.allocations[name] = 0
+        self.startTime = tm.perf_counter()
+
+    def timed(self, name, fct):
+        """
+        Return fct wrapped to count its calls and time in the section name
+        """
+        section = self.sections.setdefault(name, [0, 0])
+        def wrapper(*args, **kwargs):
+            startTime = tm.perf_counter()
+            try:
+                return fct(*args, **kwargs)
+            finally:
+                section[0] += 1
+                section[1] += tm.perf_counter() - startTime
+        return wrapper
+
+    def wrap(self, obj, attr, name):
+        """
+        Replace the method attr of obj by a timed method (section name)
+        """
+        original = getattr(obj, attr)
+        self._wrapped.append((obj, attr, original, attr in vars(obj)))
+        setattr(obj, attr, self.timed(name, original))
+
+    def countInstances(self, cls):
+        """
+        Count the objects of class cls created
+        """
+        original = cls.__dict__.get('__init__')
+        init = cls.__init__
+        allocations = self.allocations
+        allocations.setdefault(cls.__name__, 0)
+        def countedInit(obj, *args, **kwargs):
+            if (type(obj) is cls):
+                allocations[cls.__name__] += 1
+            init(obj, *args, **kwargs)
+        self._classes.append((cls, original))
+        cls.__init__ = countedInit
+
+    def enable(self, solver, edoSolver=None):
+        """
+        Instrument a solver (and the EDO solver using it)
+        """
+        if self.isEnabled():
+            self.disable()
+        self.wrap(solver.getSail(), 'compute', 'Sail.compute')
+        self.wrap(solver.getDrift(), 'compute', 'Drift.compute')
+        self.wrap(solver.getRudder(), 'compute', 'Rudder.compute')
+        self.wrap(solver.getHull(), 'compute', 'Hull.compute')
+        self.wrap(solver, 'loadStateVector', 'Solver.loadStateVector')
+        self.wrap(solver, 'computeLikageForce', 'Solver.computeLikageForce')
+        self.wrap(solver, 'F', 'Solver.F')
+        self.wrap(solver.getNavigator(), 'Fu', 'Navigator.Fu')
+        if (edoSolver != None):
+            # The EDO solver keeps the functions given at its creation
+            self.wrap(edoSolver, '_F', 'Solver.F')
+            self.wrap(edoSolver, '_Fu', 'Navigator.Fu')
+        for cls in PROFILER_ALLOC_CLASSES:
+            self.countInstances(cls)
+        self.reset()
+
+    def disable(self):
+        """
+        Restore the methods of the instrumented objects
+        """
+        for obj, attr, original, isOwn in reversed(self._wrapped):
+            if isOwn:
+                setattr(obj, attr, original)
+            else:
+                delattr(obj, attr)
+        for cls, original in reversed(self._classes):
+            if (original == None):
+                del cls.__init__
+            else:
+                cls.__init__ = original
+        self._wrapped = []
+        self._classes = []
+
+    def isEnabled(self):
+        return len(self._wrapped) > 0
+
+    def getSummary(self):
+        """
+        Return the summary of the run since the last reset:
+            - wallTime   : time since the last reset (s)
+            - nF         : number of evaluations of F
+            - sections   : calls, total time, mean time and share of the wall time of each section
+            - allocations: number of objects created per class
+        """
+        wallTime = tm.perf_counter() - self.startTime
+        nF = self.sections['Solver.F'][0] if ('Solver.F' in self.sections) else 0
+        sections = {}
+        for name, (calls, time) in self.sections.items():
+            sections[name] = {'calls':calls,
+                              'time':time,
+                              'mean':time/calls if (calls > 0) else 0,
+                              'share':time/wallTime if (wallTime > 0) else 0}
+        nAlloc = sum(self.allocations.values())
+        return {'wallTime':wallTime,
+                'nF':nF,
+                'sections':sections,
+                'allocations':dict(self.allocations),
+                'allocationsPerF':nAlloc/nF if (nF > 0) else 0}
+
+    def save(self, path):
+        """
+        Save the summary of the run in a json file
+        """
+        with open(path, 'w') as f:
+            json.dump(self.getSummary(), f, indent=4)
+
+    def printSummary(self):
+        """
+        Print the summary of the run
+        """
+        summary = self.getSummary()
+        print("[INFO] - Profile: {:.2f}s, {} evaluations of F, {:.0f} objects per F".format(
+            summary['wallTime'], summary['nF'], summary['allocationsPerF']))
+        for name, section in sorted(summary['sections'].items(), key=lambda item: -item[1]['time']):
+            print("         {:<28} {:>8} calls {:>9.3f}s {:>8.3f}ms {:>5.1f}%".format(
+                name, section['calls'], section['time'], 1000*section['mean'], 100*section['share']))
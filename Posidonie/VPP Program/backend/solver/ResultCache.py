@@ -0,0 +1,156 @@
+import pickle
+import hashlib
+import json
+import os
+from enum import Enum
+
+import sys
+import pathlib
+_parentdir = pathlib.Path(__file__).parent.parent.resolve()
+_2parentdir = pathlib.Path(__file__).parent.parent.parent.resolve()
+sys.path.insert(0, str(_parentdir))
+sys.path.insert(0, str(_2parentdir))
+
+from config.Config import *
+from utils.Utils import *
+
+"""
+    Content-addressed cache of simulation results on disk. The key of a result is a
+    digest of the geometry, the buoyency and NACA models, the scenario (targets)
+    and the settings of the solver. The least recently used results are removed
+    when the size of the cache exceeds RESULT_CACHE_MAX_SIZE
+"""
+
+RESULT_CACHE_VERSION = 2
+RESULT_CACHE_EXT = ".pkl"
+
+def jsonDefault(o):
+    """
+    Return a json serializable value of o (numpy arrays, enums)
+    """
+    if isinstance(o, Enum):
+        return o.value
+    if hasattr(o, 'tolist'):
+        return o.tolist()
+    return str(o)
+
+def getDigest(obj):
+    """
+    Return a stable digest of a json-like object
+    """
+    return hashlib.sha256(json.dumps(obj, sort_keys=True, default=jsonDefault).encode()).hexdigest()
+
+def getSolverDigest(solver):
+    """
+    Return the digest of the boat of a solver: global geometry, buoyency model and NACA model
+    """
+    return getDigest({'geom':serializeGeom(solver.getGlobalGeom()),
+                      'buoyencyModel':solver.getHull().getHullBuoyencyCalculator().getModelDigest(),
+                      'nacaModel':solver.getNACACalculator().getModelDigest()})
+
+def getCacheKey(kind, solverDigest, scenario, settings):
+    """
+    Return the key of a result:
+        - kind        : kind of result (e.g. 'polarPoint', 'transient')
+        - solverDigest: digest of the boat (see getSolverDigest)
+        - scenario    : definition of the targets (json-like)
+        - settings    : settings of the solver (json-like)
+    """
+    return getDigest({'version':RESULT_CACHE_VERSION,
+                      'kind':kind,
+                      'solver':solverDigest,
+                      'scenario':scenario,
+                      'settings':settings})
+
+class ResultCache():
+    def __init__(self, folder=PATH_RESULT_CACHE, maxSize=RESULT_CACHE_MAX_SIZE):
+        """
+        Cache of results in <folder>, one file per result
+        """
+        self.folder = folder
+        self.maxSize = maxSize
+
+    def getPath(self, key):
+        """
+        Return the file of a result
+        """
+        return os.path.join(self.folder, key + RESULT_CACHE_EXT)
+
+    def get(self, key):
+        """
+        Return the result of a key, or None if it is not in the cache
+        """
+        path = self.getPath(key)
+        try:
+            with open(path, 'rb') as f:
+                value = pickle.load(f)
+            # The access time is the modification time (least recently used eviction)
+            os.utime(path)
+        except FileNotFoundError:
+            return None
+        except Exception as e:
+            print("[ERROR] - Impossible to read the cached result {}: {}".format(key, e))
+            return None
+        return value
+
+    def put(self, key, value):
+        """
+        Save the result of a key, then remove the least recently used results if the cache is too large
+        """
+        os.makedirs(self.folder, exist_ok=True)
+        path = self.getPath(key)
+        tmpPath = "{}.{}.tmp".format(path, os.getpid())
+        with open(tmpPath, 'wb') as f:
+            pickle.dump(value, f, protocol=pickle.HIGHEST_PROTOCOL)
+        os.replace(tmpPath, path)
+        self.evict()
+
+    def getEntries(self):
+        """
+        Return the list of (last access time, size, path) of the results, oldest first
+        """
+        entries = []
+        if not os.path.isdir(self.folder):
+            return entries
+        for name in os.listdir(self.folder):
+            if not name.endswith(RESULT_CACHE_EXT):
+                continue
+            path = os.path.join(self.folder, name)
+            try:
+                stat = os.stat(path)
+            except FileNotFoundError:
+                # Removed by another process
+                continue
+            entries.append((stat.st_mtime, stat.st_size, path))
+        return sorted(entries)
+
+    def getSize(self):
+        """
+        Return the size of the cache (bytes)
+        """
+        return sum([size for atime, size, path in self.getEntries()])
+
+    def evict(self):
+        """
+        Remove the least recently used results until the size of the cache is below maxSize
+        """
+        entries = self.getEntries()
+        size = sum([size for atime, size, path in entries])
+        for atime, s, path in entries:
+            if (size <= self.maxSize):
+                break
+            try:
+                os.remove(path)
+            except FileNotFoundError:
+                pass
+            size -= s
+
+    def clear(self):
+        """
+        Remove all the results
+        """
+        for atime, size, path in self.getEntries():
+            try:
+                os.remove(path)
+            except FileNotFoundError:
+                pass
@@ -18,10 +18,8 @@ class Run():
         self.timer = time.time()
         self.play = False # Variable to play or not the annimation
         self.simuTime = 0 # simulation time
-        self.Xs = []
-        self.Us = []
+        self.recorder = None # Trajectory (TrajectoryRecorder)
         self.ts = []
-        self.Ts = []
         self.loaded = False
         self.playbackSpeed = 1
 
@@ -29,7 +27,8 @@ class Run():
         """
         Load simulation results form a file
         """
-        self.ts, self.Xs, self.Us, self.Ts = loadSimuFile(path, solver)
+        self.recorder = loadSimuFile(path, solver)
+        self.ts = self.recorder.getTimes()
         self.ti = self.ts[0]
         self.tf = self.ts[-1]
         self.loaded = True
@@ -40,14 +39,14 @@ class Run():
         """
         if not self.loaded:
             return
-        # get the closer index in the time
-        #idx = getCloserIdx(self.simuTime, self.ts)
-        i1, i2 = getBeforeAfterIdx(self.simuTime, self.ts)
+        # get the samples before and after the simulation time
+        i2 = min(max(np.searchsorted(self.ts, self.simuTime, side='right'), 1), len(self.ts)-1)
+        i1 = i2 - 1
         alpha = (self.simuTime - self.ts[i1])/(self.ts[i2] - self.ts[i1])
-        # Linear interpollation
-        X = self.Xs[i1] + (self.Xs[i2] - self.Xs[i1])*alpha
-        solver.loadStateVector(X, self.Us[i1])
-        #solver.loadStateVector(self.Xs[idx], self.Us[idx])
+        # Linear interpollation of the packed state vectors
+        xs = self.recorder.getStates()
+        x = xs[i1] + (xs[i2] - xs[i1])*alpha
+        solver.loadStateVector(StateVector.fromArray(x, solver, solver.getBoatCdg()), self.recorder.getCommand(i1))
 
     def updateAnim(self, solver):
         """
@@ -117,21 +116,34 @@ class Run():
     def getTime(self):
         return self.ts
     
+    def getRecorder(self):
+        """
+        Return the trajectory of the simulation (TrajectoryRecorder)
+        """
+        return self.recorder
+    
     def getCurves(self):
         """
         Return a dictionnary of the relevent curves to plot
         """
-        if (len(self.Xs) == 0):
+        if (self.recorder == None) or (len(self.recorder) == 0):
             return {}
         curves = {}
 
         # First, the curve relative to the state vector
-        for name in self.Xs[0].getParamNames():
-            curves[name] = np.array([X.get(name) for X in self.Xs])
+        xs = self.recorder.getStates()
+        curves['pos']   = xs[:,STATE_POS]
+        curves['speed'] = xs[:,STATE_SPEED]
+        curves['ang']   = xs[:,STATE_ANG]
+        # The angular speed in the sea base
+        angs = xs[:,STATE_ANG]
+        M = np.matmul(getMatRots(Dir.Z, angs[:,2]), getMatRots(Dir.X, angs[:,0]))
+        M = np.matmul(M, getMatRots(Dir.Y, angs[:,1]))
+        curves['omega'] = np.einsum('nij,nj->ni', M, xs[:,STATE_OMEGA])
 
         # Then the one of the target vector
-        for name in self.Ts[0]:
-            curves[name] = np.array([T[name] for T in self.Ts])
+        for name in self.recorder.getTargetNames():
+            curves[name] = self.recorder.getTargets(name)
 
         return curves
     
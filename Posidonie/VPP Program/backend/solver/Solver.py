@@ -1,4 +1,5 @@
 import time
+import copy
 
 import sys
 import pathlib
@@ -13,6 +14,7 @@ from backend.hull.Hull import *
 from backend.rudder.Rudder import *
 from backend.solver.Navigator import *
 from backend.solver.StateVector import *
+from backend.solver.CommandVector import *
 from backend.Wind import *
 from utils.Force import *
 from config.Config import *
@@ -21,6 +23,28 @@ from utils.Utils import *
 
 solverDefaultGeom = {'maxRudderAng':{'value':30, 'unit':Units.deg, 'info':'Maximum rudder angle'}}
 
+globalDefaultGeom = {'sail':sailDefaultGeom,
+                     'drift':driftDefaultGeom,
+                     'rudder':rudderDefaultGeom,
+                     'solver':solverDefaultGeom,
+                     'wind':windDefaultGeom,
+                     'navigator':navigatorDefaultGeom}
+
+def fillMissingGeom(geom):
+    """
+    Fill the missing parameter of a geom dic
+    """
+    for comp in globalDefaultGeom:
+        if (comp not in geom):
+            geom[comp] = copy.deepcopy(globalDefaultGeom[comp])
+        
+        else:
+            # check every sub item
+            for elm in globalDefaultGeom[comp]:
+                if elm not in geom[comp]:
+                    geom[comp][elm] = copy.deepcopy(globalDefaultGeom[comp][elm])
+    return geom
+
 
 """
 
@@ -47,8 +71,29 @@ class Solver():
     """
 
     def __init__(self):
+        # Step counter: the base conversions memoized by the Vector and Point objects
+        # are valid until it changes (new state vector or geometry)
+        self.step = 0
+
+        # Values of the geometry in the SI system (see GeomSnapshot)
+        self.geomSI = None
         self.updateGeom(solverDefaultGeom)
 
+        # Number of state vector loaded (benchmark)
+        self.nLoad = 0
+
+        # Passing matrices of every pair of basis, and angles of the cached sail and rudder matrices
+        self.passingMatrices = {(base, base):np.eye(3) for base in Base}
+        self.passingSailAng = None
+        self.passingRudderAng = None
+
+        # Sum of the forces exerced on the boat
+        self.boatWrench = Wrench(self)
+
+        # Velocity and acceleration fields, built at the first load then updated in place
+        self.boatVelocityField = None
+        self.accelerationField = None
+
         # For the linkage forces:
         self.FhullToComp = {}
         self.MhullToComp = {}
@@ -101,19 +146,19 @@ class Solver():
         self.compute()
         
         # Compute the acceleration and rotation acceleration
-        forceAndMoment = self.getBoatForceAndMoment()
+        wrench = self.getBoatWrench()
 
-        force  = forceAndMoment.getVec()
-        moment = forceAndMoment.getOriginMoment().getVec()
+        force  = wrench.getForce(Base.SEA)
+        moment = wrench.getMoment(Base.BOAT)
         
         # FIRST, SOLVE NEWTON EQUATION
-        accel = force/self.mass
+        accel = Vector(self, force/self.mass, Base.SEA)
         self.boatAcceleration = PointAcceleration(accel, self.getBoatCdg(), Referential.BOAT, Referential.SEA)
 
         # THEN THE EULER EQUATION FOR ANGLES
         momentSum = (self.getBoatOrigin() - self.getBoatCdg()).vectorial(self.boatAcceleration.getAccel())*(-self.mass)
         #momentSum = moment
-        momentSum = -momentSum.valueIn(Base.BOAT) -moment.valueIn(Base.BOAT) - self.getBoatRotSpeed().getOmega().valueIn(Base.BOAT)*self.alphaRotation
+        momentSum = -momentSum.valueIn(Base.BOAT) -moment - self.getBoatRotSpeed().getOmega().valueIn(Base.BOAT)*self.alphaRotation
         boatRotAcceleration = np.matmul(self.invInertia, momentSum)
 
         # Return the state vector (each component is the derivative or the original state vector)
@@ -127,6 +172,156 @@ class Solver():
         
         return newX
     
+    def batchF(self, Xs, Us):
+        """
+        Compute the derivative of N boats in one vectorized pass, giving:
+            - Xs : (N, STATE_SIZE) array of packed state vectors
+            - Us : (N, COMMAND_SIZE) array of packed command vectors
+        Return a (N, STATE_SIZE) array of packed state vector derivatives (same as F).
+        The forces of the components are computed along the batch axis (see getBatch and the
+        addTotalForces of the components), the loaded state of the solver is not modified
+        """
+        Xs = np.atleast_2d(Xs)
+        Us = np.atleast_2d(Us)
+        batch = self.getBatch(Xs, Us)
+        P = batch['P']
+
+        wrenches = Wrenches(len(Xs))
+        self.getHull().addTotalForces(wrenches, batch)
+        self.getSail().addTotalForces(wrenches, batch)
+        self.getDrift().addTotalForces(wrenches, batch)
+        self.getRudder().addTotalForces(wrenches, batch)
+        forces  = wrenches.getForces(Base.SEA, P)
+        moments = wrenches.getMoments(Base.BOAT, P)
+
+        # FIRST, SOLVE NEWTON EQUATION
+        accel = forces/self.mass
+        accelBoat = np.einsum('nij,nj->ni', P(Base.SEA, Base.BOAT), accel)
+
+        # THEN THE EULER EQUATION FOR ANGLES
+        omega = batch['omega']
+        OG = (self.getBoatOrigin() - self.getBoatCdg()).valueIn(Referential.BOAT)
+        momentSum = np.cross(OG, accelBoat)*self.mass - moments - omega*self.alphaRotation
+        boatRotAcceleration = momentSum.dot(self.invInertia.T)
+
+        # Pack the derivatives (same convention as StateVectorDerivative)
+        dXs = np.empty((len(Xs), STATE_SIZE))
+        dXs[:,STATE_POS]   = batch['speed']
+        dXs[:,STATE_SPEED] = accel
+        dXs[:,STATE_ANG]   = np.einsum('nij,nj->ni', P(Base.BOAT, Base.SEA), omega)
+        dXs[:,STATE_OMEGA] = np.einsum('nij,nj->ni', P(Base.SEA, Base.BOAT), boatRotAcceleration)
+        return dXs
+
+    def getBatch(self, Xs, Us):
+        """
+        Return the dictionnary of a batch of N boats (see batchF), giving the packed state
+        vectors Xs (N, STATE_SIZE) and command vectors Us (N, COMMAND_SIZE):
+            - 'pos', 'speed', 'ang', 'omega': (N, 3) arrays of the state vectors
+            - 'wind': (N, 3) wind velocity relative to the sea, in the sea base
+            - 'P'   : function (from_, to) -> (N, 3, 3) passing matrices (see getBatchPassingMatrices)
+        """
+        rudderAngs = np.clip(Us[:,1], -self.getGeomP('maxRudderAng'), self.getGeomP('maxRudderAng'))
+        return {'pos':Xs[:,STATE_POS],
+                'speed':Xs[:,STATE_SPEED],
+                'ang':Xs[:,STATE_ANG],
+                'omega':Xs[:,STATE_OMEGA],
+                'wind':self.getWind().getSpeedVecs(Us[:,2], Us[:,3]),
+                'P':self.getBatchPassingMatrices(Xs[:,STATE_ANG], Us[:,0], rudderAngs)}
+
+    def getBatchPassingMatrices(self, angs, sailAngs, rudderAngs):
+        """
+        Return the function (from_, to) -> (N, 3, 3) passing matrices of N boats, giving their
+        angles (N, 3), sail angles (N,) and rudder angles (N,) (same matrices as computePassingMatrix).
+        The products are computed once per pair of basis
+        """
+        cr, cp, cy = np.cos(angs).T
+        sr, sp, sy = np.sin(angs).T
+        boatToSea = np.moveaxis(np.array([[cy*cp + sy*sr*sp, sy*cr, sy*sr*cp - cy*sp],
+                                          [cy*sr*sp - sy*cp, cy*cr, sy*sp + cy*sr*cp],
+                                          [cr*sp,            -sr,   cr*cp]]), -1, 0)
+        # Passing matrices from each basis to the boat basis
+        toBoat = {Base.BOAT:np.broadcast_to(np.eye(3), boatToSea.shape),
+                  Base.SEA:np.swapaxes(boatToSea, 1, 2),
+                  Base.SAIL:getMatRots(Dir.Z, sailAngs),
+                  Base.RUDDER:getMatRots(Dir.Z, rudderAngs)}
+        table = {}
+        def passingMatrices(from_, to):
+            if ((from_, to) not in table):
+                if (to == Base.BOAT):
+                    table[(from_, to)] = toBoat[from_]
+                else:
+                    # Othogonal matrices: the transposed one is equal to the inverse
+                    table[(from_, to)] = np.matmul(np.swapaxes(toBoat[to], 1, 2), toBoat[from_])
+            return table[(from_, to)]
+        return passingMatrices
+
+    def getBatchVelocities(self, batch, pts, R1, R2, base):
+        """
+        Return V(A in R1 / R2) of the P points A of coordinates pts (P, 3) in the boat referential,
+        for the N boats of a batch, as an array (N, P, 3) expressed in the base <base> (see PointSpeed.getVelocities)
+        """
+        return self.getBatchVelocityField(batch, pts, R1, base) - self.getBatchVelocityField(batch, pts, R2, base)
+
+    def getBatchVelocityField(self, batch, pts, R, base):
+        """
+        Return V(A in R / Sea) of the P points A of coordinates pts (P, 3) in the boat referential,
+        for the N boats of a batch, as an array (N, P, 3) expressed in the base <base> (see computeVelocityField)
+        """
+        P = batch['P']
+        if (R == Referential.BOAT) or (R == Referential.SAIL) or (R == Referential.RUDDER):
+            # Field of the boat: V(B, R/R0) = V(cdg, R/R0) - (cdg - B)^Omega(R/R0) (see VelocityField.atArray)
+            dif = np.cross(self.getBoatCdg().getPt() - pts, batch['omega'][:,None,:])
+            return np.einsum('nij,nj->ni', P(Base.SEA, base), batch['speed'])[:,None,:] - np.einsum('nij,npj->npi', P(Base.BOAT, base), dif)
+        
+        if (R == Referential.WIND):
+            # Uniform field
+            wind = np.einsum('nij,nj->ni', P(Base.SEA, base), -batch['wind'])
+            return np.repeat(wind[:,None,:], len(pts), axis=1)
+        
+        if (R == Referential.SEA):
+            return np.zeros((len(batch['ang']), len(pts), 3))
+        
+        raise Exception("Unable to found a VelocityField for the ref: "+str(R.value))
+
+    def jacobian(self, X, U, eps=LINEARIZATION_EPS):
+        """
+        Return the jacobians of F at the state vector X and the command U, by central differences:
+            - A = dF/dX : (STATE_SIZE, STATE_SIZE) array
+            - B = dF/dU : (STATE_SIZE, COMMAND_SIZE) array
+        The 2*(STATE_SIZE + COMMAND_SIZE) perturbed derivatives are computed at once with batchF
+        """
+        return self.jacobians([X.getArray()], [U.toArray()], eps)[0]
+
+    def jacobians(self, xs, us, eps=LINEARIZATION_EPS):
+        """
+        Return the list of jacobians (A, B) of F (see jacobian) at several packed state vectors xs
+        and command vectors us. The perturbed derivatives of all the points are computed in one batchF
+        """
+        n, m = STATE_SIZE, COMMAND_SIZE
+        Xs, Us, steps = [], [], []
+        for x, u in zip(xs, us):
+            step = eps*np.maximum(1, np.abs(np.concatenate((x, u))))
+            # Perturbed states and commands: +e_j then -e_j for each variable j
+            pXs = np.tile(np.asarray(x, dtype=float), (2*(n + m), 1))
+            pUs = np.tile(np.asarray(u, dtype=float), (2*(n + m), 1))
+            for j in range(n + m):
+                for k, sign in enumerate([1, -1]):
+                    if (j < n):
+                        pXs[2*j + k, j] += sign*step[j]
+                    else:
+                        pUs[2*j + k, j - n] += sign*step[j]
+            Xs.append(pXs)
+            Us.append(pUs)
+            steps.append(step)
+
+        dXs = self.batchF(np.concatenate(Xs), np.concatenate(Us))
+        jacobians = []
+        for i, step in enumerate(steps):
+            dX = dXs[2*(n + m)*i:2*(n + m)*(i + 1)]
+            J = ((dX[0::2] - dX[1::2])/(2*step[:,np.newaxis])).T
+            jacobians.append((J[:,:n], J[:,n:]))
+        return jacobians
+
     def compute(self):
         """
         Compute the force for each components
@@ -148,6 +343,8 @@ class Solver():
 
         # define the state vector
         self.X = X
+        self.nLoad += 1
+        self.step += 1
 
         # Compute the Passing Matrix
         self.computePassingMatrix()
@@ -158,25 +355,47 @@ class Solver():
         # Compute the acceleration field
         self.computeAccelerationField()
 
+    def getLoadCount(self):
+        """
+        Return the number of state vector loaded since the creation of the solver
+        """
+        return self.nLoad
+
+    def getStep(self):
+        """
+        Return the step counter (see Vector.valueIn)
+        """
+        return self.step
+
     def getCapsizingMoment(self):
         """
         Return the moments reponsibles for capsizing
         """
-        moment = self.getSail().getTotalForce()
-        moment  +=  self.getHull().getTotalForce()
-        moment += self.getRudder().getTotalForce()
-        moment += self.getDrift().getTotalForce()
-        return  moment.getOriginMoment()
+        return self.getBoatForceAndMoment().getOriginMoment()
+
+    def getBoatWrench(self):
+        """
+        Return the sum of the forces exerced on the boat (Wrench updated in place).
+        The Wrench of each component stays available (see getForceBreakdown)
+        """
+        wrench = self.boatWrench.reset()
+        wrench.addWrench(self.getHull().getTotalWrench())
+        wrench.addWrench(self.getSail().getTotalWrench())
+        wrench.addWrench(self.getDrift().getTotalWrench())
+        wrench.addWrench(self.getRudder().getTotalWrench())
+        return wrench
 
     def getBoatForceAndMoment(self):
         """
         Return the total Force And Moment exerced on the boat
         """
-        force =  self.getHull().getTotalForce()
-        force += self.getSail().getTotalForce()
-        force += self.getDrift().getTotalForce()
-        force += self.getRudder().getTotalForce()
-        return force
+        return self.getBoatWrench().toForce()
+
+    def getForceBreakdown(self):
+        """
+        Return the total Force of each component, computed by the last getBoatWrench
+        """
+        return {cname:self.getComponentByName(cname).totalWrench.toForce() for cname in ['hull', 'sail', 'drift', 'rudder']}
     
     def getBoatMass(self):
         """
@@ -228,11 +447,13 @@ class Solver():
         Update the 'geometry' of the solver
         """
         self.geom = geom
+        self.geomSI = GeomSnapshot(geom, self.geomSI)
 
     def updateGlobalGeom(self, geom=None):
         """
         Update the geometry of the boat + solver
         """
+        self.step += 1
         if (geom != None):
             # Update the geometry of the components
             if ('sail' in geom):
@@ -409,7 +630,17 @@ class Solver():
         Return the NACA calculator
         """
         return self.NACACalculator
-    
+
+    def setQuadrature(self, method, n):
+        """
+        Set the quadrature of the forces along the wings (see NACACalculator.setQuadrature)
+        and rebuild the tables of sections of the components
+        """
+        self.getNACACalculator().setQuadrature(method, n)
+        self.getSail().computeSections()
+        self.getDrift().computeSections()
+        self.getRudder().computeSections()
+
     def getNavigator(self):
         """
         Return the navigator object
@@ -428,28 +659,34 @@ class Solver():
     
     def computeVelocityField(self):
         """
-        Compute all the velocity field at this step
+        Compute all the velocity field at this step. The fields are built once,
+        then updated in place from the state vector and the wind
         """
-        # Compute the BOAT velocity field
-        self.boatVelocityField = VelocityField(self.getBoatSpeed(), self.getBoatRotSpeed())
-        
-        # Compute the SAIL velocity field
-        # We neglect the dynamic of the sail rotation
-        self.sailVelocityField = self.getVelocityField(Referential.BOAT)
-        
-        # Compute the RUDDER velocity field
-        # We neglect the dynamic of the rudder rotation
-        self.rudderVelocityField = self.getVelocityField(Referential.BOAT)
-        
-        # Compute the WIND velocity field
-        windPointSpeed = PointSpeed(self.getBoatOrigin(), self.getWind().getSpeedVec()*(-1), Referential.WIND, Referential.SEA)
-        windAngSpeed   = AngularSpeed(Vector(self, np.zeros(3), Base.SEA), Referential.WIND, Referential.SEA)
-        self.windVelocityField = VelocityField(windPointSpeed, windAngSpeed)
-        
-        # Compute the SEA velocity field
-        seaPointSpeed = PointSpeed(self.getBoatOrigin(), Vector(self, np.zeros(3), Base.SEA), Referential.SEA, Referential.SEA)
-        seaAngSpeed   = AngularSpeed(Vector(self, np.zeros(3), Base.SEA), Referential.SEA, Referential.SEA)
-        self.seaVelocityField = VelocityField(seaPointSpeed, seaAngSpeed)
+        if (self.boatVelocityField == None):
+            origin = self.getBoatOrigin()
+
+            # Compute the BOAT velocity field
+            self.boatVelocityField = VelocityField(self.getBoatSpeed(), self.getBoatRotSpeed())
+
+            # The SAIL and RUDDER velocity fields are the BOAT one
+            # We neglect the dynamic of the sail and rudder rotation
+            self.sailVelocityField = self.boatVelocityField
+            self.rudderVelocityField = self.boatVelocityField
+
+            # The WIND velocity field (the speed is updated below)
+            self.windPointSpeed = PointSpeed(origin, Vector(self, np.zeros(3), Base.SEA), Referential.WIND, Referential.SEA)
+            windAngSpeed = AngularSpeed(Vector(self, np.zeros(3), Base.SEA), Referential.WIND, Referential.SEA)
+            self.windVelocityField = VelocityField(self.windPointSpeed, windAngSpeed)
+
+            # The SEA velocity field is constant
+            seaPointSpeed = PointSpeed(origin, Vector(self, np.zeros(3), Base.SEA), Referential.SEA, Referential.SEA)
+            seaAngSpeed   = AngularSpeed(Vector(self, np.zeros(3), Base.SEA), Referential.SEA, Referential.SEA)
+            self.seaVelocityField = VelocityField(seaPointSpeed, seaAngSpeed)
+        else:
+            self.boatVelocityField.updatePointSpeed(self.getBoatSpeed())
+            self.boatVelocityField.updateAngSpeed(self.getBoatRotSpeed())
+
+        self.windPointSpeed.getSpeed().setValue(-self.getWind().wind)
     
     def getVelocityField(self, R):
         """
@@ -476,7 +713,10 @@ class Solver():
         """
         Compute the boat's acceleration field
         """
-        self.accelerationField = AccelerationField(self.boatAcceleration, self.getBoatRotSpeed())
+        if (self.accelerationField == None):
+            self.accelerationField = AccelerationField(self.boatAcceleration, self.getBoatRotSpeed())
+        else:
+            self.accelerationField.update(self.boatAcceleration, self.getBoatRotSpeed())
 
     def getAccelerationField(self):
         """
@@ -537,26 +777,57 @@ class Solver():
             
     def computePassingMatrix(self):
         """
-        Compute all the passing matrix
+        Compute the passing matrices of every pair of basis. The boat to sea matrix
+        Rz(yaw).Rx(roll).Ry(pitch) is computed in closed form, the sail and rudder
+        matrices are only computed again when their angle changed
         """
-        M = getMatRot(Dir.Z, self.getBoatAng()[2])
-        M = np.matmul(M, getMatRot(Dir.X, self.getBoatAng()[0]))
-        M = np.matmul(M, getMatRot(Dir.Y, self.getBoatAng()[1]))
-
-        self.boatToSeaMatrix = M
+        table = self.passingMatrices
+        cr, cp, cy = np.cos(self.getBoatAng())
+        sr, sp, sy = np.sin(self.getBoatAng())
+        boatToSea = np.array([[cy*cp + sy*sr*sp, sy*cr, sy*sr*cp - cy*sp],
+                              [cy*sr*sp - sy*cp, cy*cr, sy*sp + cy*sr*cp],
+                              [cr*sp,            -sr,   cr*cp]])
         # Othogonal matrices: the transposed one is equal to the inverse
-        self.seaToBoatMatrix = np.transpose(self.boatToSeaMatrix)
-        #self.seaToBoatMatrix = np.linalg.inv(self.boatToSeaMatrix)
-
-        self.sailToBoatMatrix = getMatRot(Dir.Z, self.getSailAng())
-        self.boatToSailMatrix = np.transpose(self.sailToBoatMatrix)
-        #self.boatToSailMatrix = np.linalg.inv(self.sailToBoatMatrix)
-
-        self.rudderToBoatMatrix = getMatRot(Dir.Z, self.getRudderAng())
-        self.boatToRudderMatrix = np.transpose(self.rudderToBoatMatrix)
-        #self.boatToRudderMatrix = np.linalg.inv(self.rudderToBoatMatrix)
-
-        self.seaToSailMatrix = np.matmul(self.boatToSailMatrix, self.seaToBoatMatrix)
+        table[(Base.BOAT, Base.SEA)] = boatToSea
+        table[(Base.SEA, Base.BOAT)] = boatToSea.T
+
+        sailAng = self.getSailAng()
+        rudderAng = self.getRudderAng()
+        surfaceChanged = False
+        if (sailAng != self.passingSailAng):
+            self.passingSailAng = sailAng
+            table[(Base.SAIL, Base.BOAT)] = getMatRot(Dir.Z, sailAng)
+            table[(Base.BOAT, Base.SAIL)] = table[(Base.SAIL, Base.BOAT)].T
+            surfaceChanged = True
+        if (rudderAng != self.passingRudderAng):
+            self.passingRudderAng = rudderAng
+            table[(Base.RUDDER, Base.BOAT)] = getMatRot(Dir.Z, rudderAng)
+            table[(Base.BOAT, Base.RUDDER)] = table[(Base.RUDDER, Base.BOAT)].T
+            surfaceChanged = True
+        if surfaceChanged:
+            table[(Base.SAIL, Base.RUDDER)] = np.matmul(table[(Base.BOAT, Base.RUDDER)], table[(Base.SAIL, Base.BOAT)])
+            table[(Base.RUDDER, Base.SAIL)] = table[(Base.SAIL, Base.RUDDER)].T
+
+        # Sea to sail and sea to rudder in one product
+        seaToSurfaces = np.matmul(np.array([table[(Base.BOAT, Base.SAIL)], table[(Base.BOAT, Base.RUDDER)]]), boatToSea.T)
+        table[(Base.SEA, Base.SAIL)] = seaToSurfaces[0]
+        table[(Base.SEA, Base.RUDDER)] = seaToSurfaces[1]
+        table[(Base.SAIL, Base.SEA)] = seaToSurfaces[0].T
+        table[(Base.RUDDER, Base.SEA)] = seaToSurfaces[1].T
+
+        self.boatToSeaMatrix = boatToSea
+        self.seaToBoatMatrix = table[(Base.SEA, Base.BOAT)]
+        self.sailToBoatMatrix = table[(Base.SAIL, Base.BOAT)]
+        self.boatToSailMatrix = table[(Base.BOAT, Base.SAIL)]
+        self.rudderToBoatMatrix = table[(Base.RUDDER, Base.BOAT)]
+        self.boatToRudderMatrix = table[(Base.BOAT, Base.RUDDER)]
+        self.seaToSailMatrix = table[(Base.SEA, Base.SAIL)]
+
+    def getPassingMatrix(self, from_, to):
+        """
+        Return the passing matrix from the basis from_ to the basis to
+        """
+        return self.passingMatrices[(from_, to)]
 
     def getBoatToSeaMatrix(self):
         """
@@ -605,6 +876,6 @@ class Solver():
     
     def getGeomP(self, name):
         """
-        Return the value of the geometric parameter named 'name'
+        Return the value of the geometric parameter named 'name' (SI system)
         """
-        return Units.toSI(self.geom[name]['value'], self.geom[name]['unit'])
\ No newline at end of file
+        return self.geomSI.values[name]
\ No newline at end of file
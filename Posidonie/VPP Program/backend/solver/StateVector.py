@@ -11,6 +11,32 @@ sys.path.insert(0, str(_2parentdir))
 from utils.Force import *
 from utils.Utils import *
 
+# Layout of the packed state vector
+#   [pos (sea) | speed of the cdg (sea) | ang (roll, pitch, yaw) | omega (boat)]
+STATE_POS   = slice(0, 3)
+STATE_SPEED = slice(3, 6)
+STATE_ANG   = slice(6, 9)
+STATE_OMEGA = slice(9, 12)
+STATE_SIZE  = 12
+
+class PackedVector(Vector):
+    """
+    Vector sharing the memory of a packed array. The array is modified in place
+    (integration step), so the conversions are not memoized
+    """
+    __slots__ = ()
+
+    def valueIn(self, base):
+        if (base == self._base):
+            return self._vec
+        return getPassageMatrix(self._solver, self._base, base).dot(self._vec)
+
+def packedVector(solver, vec, base):
+    """
+    Return a Vector sharing the memory of the array <vec> (no copy)
+    """
+    return PackedVector(solver, vec, base)
+
 class StateVector():
     # State vector of the boat
     def __init__(self, pos0, speed0, ang0, omega0):
@@ -26,11 +52,87 @@ class StateVector():
         if not isinstance(omega0, AngularSpeed):
             raise TypeError()
         
-        # Prefix 'x' for state vector
-        self._x_pos   = pos0
-        self._x_speed = speed0
-        self._x_ang   = ang0
-        self._x_omega = omega0
+        x = np.empty(STATE_SIZE)
+        x[STATE_POS]   = pos0
+        x[STATE_SPEED] = speed0.getSpeed().valueIn(Base.SEA)
+        x[STATE_ANG]   = ang0
+        x[STATE_OMEGA] = omega0.getOmega().valueIn(Base.BOAT)
+        self.bind(x, speed0.getSpeed().getSolver(), speed0.getPt())
+
+    def bind(self, x, solver, pt):
+        """
+        Use the array <x> as the packed state, and build the views on it
+        """
+        self._x = x
+        self._solver = solver
+        self._pt = pt
+        # Prefix 'x' for state vector. Each field is a view of the packed array
+        self._x_pos   = x[STATE_POS]
+        self._x_speed = PointSpeed(pt, packedVector(solver, x[STATE_SPEED], Base.SEA), 
+                                   Referential.BOAT, Referential.SEA)
+        self._x_ang   = x[STATE_ANG]
+        self._x_omega = AngularSpeed(packedVector(solver, x[STATE_OMEGA], Base.BOAT), 
+                                     Referential.BOAT, Referential.SEA)
+
+    def fromArray(x, solver, pt):
+        """
+        Return a state vector using the packed array <x> (no copy)
+        """
+        X = StateVector.__new__(StateVector)
+        X.bind(x, solver, pt)
+        return X
+    
+    def getArray(self):
+        """
+        Return the packed array of the state vector
+        """
+        return self._x
+
+    def setPos(self, pos):
+        """
+        Set the position of the boat (sea base)
+        """
+        self._x[STATE_POS] = pos
+
+    def setSpeed(self, speed):
+        """
+        Set the speed of the boat (Vector)
+        """
+        self._x[STATE_SPEED] = speed.valueIn(Base.SEA)
+
+    def setAng(self, ang):
+        """
+        Set the angles (roll, pitch, yaw) of the boat
+        """
+        self._x[STATE_ANG] = ang
+
+    def setOmega(self, omega):
+        """
+        Set the angular speed of the boat (Vector)
+        """
+        self._x[STATE_OMEGA] = omega.valueIn(Base.BOAT)
+
+    def axpy(self, a, dX):
+        """
+        In place update: X <- X + a*dX, where dX is a StateVectorDerivative
+        """
+        self._x += a*dX._dx
+        return self
+    
+    def assignAxpy(self, X, a, dX):
+        """
+        In place update: self <- X + a*dX, where dX is a StateVectorDerivative
+        """
+        np.multiply(dX._dx, a, out=self._x)
+        self._x += X._x
+        return self
+
+    def assign(self, X):
+        """
+        In place copy of the state vector X
+        """
+        self._x[:] = X._x
+        return self
 
     def getParamNames(self):
         """
@@ -118,35 +220,32 @@ class StateVector():
                            AngularSpeed.fromJSON(dic['omega'], solver))
 
     def copy(self):
-        return StateVector(self._x_pos.copy(),
-                           self._x_speed.copy(),
-                           self._x_ang.copy(),
-                           self._x_omega.copy())
+        return StateVector.fromArray(self._x.copy(), self._solver, self._pt)
     
     def __add__(self, b):
         """
         Add Two State vector
         """
         if isinstance(b, StateVector):
-            return StateVector(self._x_pos + b._x_pos,
-                               self._x_speed + b._x_speed,
-                               self._x_ang + b._x_ang,
-                               self._x_omega + b._x_omega)
+            return StateVector.fromArray(self._x + b._x, self._solver, self._pt)
         
         elif isinstance(b, StateVectorDerivative):
-            solver = self._x_omega.getOmega().getSolver()
-            newSpeed = self._x_speed.copy()
-            newOmegaSpeed = self._x_omega.copy()
-            newOmegaSpeed._speed += Vector(solver, b._rotAccel, Base.SEA)
-            newSpeed._speed += b._accel.getAccel()
-            return StateVector(self._x_pos + b._speed.getSpeed().valueIn(Base.SEA),
-                               newSpeed,
-                               self._x_ang + b._omega.getOmega().valueIn(Base.SEA),
-                               newOmegaSpeed)
+            return StateVector.fromArray(self._x + b._dx, self._solver, self._pt)
 
         else:
             raise TypeError()
         
+    def __iadd__(self, b):
+        """
+        In place addition of a State vector or of a State vector derivative
+        """
+        if isinstance(b, StateVector):
+            self._x += b._x
+        elif isinstance(b, StateVectorDerivative):
+            self._x += b._dx
+        else:
+            raise TypeError()
+        return self
 
     def __mul__(self, b):
         """
@@ -155,10 +254,7 @@ class StateVector():
         if not (isinstance(b, int) or isinstance(b, float)):
             raise TypeError()
         
-        return StateVector(self._x_pos*b,
-                           self._x_speed*b,
-                           self._x_ang*b,
-                           self._x_omega*b)
+        return StateVector.fromArray(self._x*b, self._solver, self._pt)
     
     def __sub__(self, b):
         """
@@ -174,7 +270,8 @@ class StateVector():
     
 class StateVectorDerivative():
     """
-    Derivative of a state vector
+    Derivative of a state vector. It is packed with the layout of the state vector:
+        [speed (sea) | acceleration (sea) | omega (sea) | rotation acceleration (boat)]
     """
     def __init__(self, speed0, accel0, omega0, rotAccel0):
         if not isinstance(speed0, PointSpeed):
@@ -189,10 +286,39 @@ class StateVectorDerivative():
         if not isinstance(rotAccel0, np.ndarray):
             raise TypeError()
         
-        self._speed = speed0
-        self._accel = accel0
-        self._omega = omega0
-        self._rotAccel = rotAccel0
+        # The rotation acceleration is given in the sea base
+        # (expressed in the boat base with the current passing matrix).
+        # It is converted with the passing matrix of the state where the derivative is
+        # evaluated: a derivative only depends on its own state. Before the packed layout,
+        # it was converted when the derivatives were added, with the last loaded state
+        # (e.g. the 4th stage of a RK4 step for every stage), so the results slightly differ
+        solver = omega0.getOmega().getSolver()
+        self._dx = np.empty(STATE_SIZE)
+        self._dx[STATE_POS]   = speed0.getSpeed().valueIn(Base.SEA)
+        self._dx[STATE_SPEED] = accel0.getAccel().valueIn(Base.SEA)
+        self._dx[STATE_ANG]   = omega0.getOmega().valueIn(Base.SEA)
+        self._dx[STATE_OMEGA] = getPassageMatrix(solver, Base.SEA, Base.BOAT).dot(rotAccel0)
+
+    def fromArray(dx):
+        """
+        Return a state vector derivative using the packed array <dx> (no copy)
+        """
+        dX = StateVectorDerivative.__new__(StateVectorDerivative)
+        dX._dx = dx
+        return dX
+    
+    def getArray(self):
+        """
+        Return the packed array of the derivative
+        """
+        return self._dx
+    
+    def axpy(self, a, b):
+        """
+        In place update: dX <- dX + a*b
+        """
+        self._dx += a*b._dx
+        return self
 
     def __mul__(self, b):
         """
@@ -201,10 +327,7 @@ class StateVectorDerivative():
         if not (isinstance(b, int) or isinstance(b, float)):
             raise TypeError()
         
-        return StateVectorDerivative(self._speed*b,
-                                     self._accel*b,
-                                     self._omega*b,
-                                     self._rotAccel*b)
+        return StateVectorDerivative.fromArray(self._dx*b)
     
     def __truediv__(self, b):
         """
@@ -217,10 +340,7 @@ class StateVectorDerivative():
         Add Two StateVectorDerivative object
         """
         if isinstance(b, StateVectorDerivative):
-            return StateVectorDerivative(self._speed + b._speed,
-                                         self._accel + b._accel,
-                                         self._omega + b._omega,
-                                         self._rotAccel + b._rotAccel)
+            return StateVectorDerivative.fromArray(self._dx + b._dx)
 
         else:
-            TypeError()
\ No newline at end of file
+            raise TypeError()
@@ -0,0 +1,143 @@
+import numpy as np
+
+import sys
+import pathlib
+_parentdir = pathlib.Path(__file__).parent.parent.resolve()
+_2parentdir = pathlib.Path(__file__).parent.parent.parent.resolve()
+sys.path.insert(0, str(_parentdir))
+sys.path.insert(0, str(_2parentdir))
+
+from config.Config import *
+from backend.solver.StateVector import *
+from backend.solver.CommandVector import *
+
+class TrajectoryRecorder():
+    """
+    Record the trajectory of a simulation in a preallocated structured array, with
+    one row per sample: time, packed state vector, packed command vector, targets
+    and local error estimate of the integrator (nan if the method has none).
+    The array grows by chunks of TRAJECTORY_CHUNK_SIZE rows
+    """
+    def __init__(self, targetNames, capacity=TRAJECTORY_CHUNK_SIZE):
+        self._targetNames = list(targetNames)
+        self._dtype = np.dtype([('t', 'f8'),
+                                ('X', 'f8', (STATE_SIZE,)),
+                                ('U', 'f8', (COMMAND_SIZE,)),
+                                ('T', 'f8', (len(self._targetNames),)),
+                                ('err', 'f8')])
+        self._data = np.empty(max(1, capacity), dtype=self._dtype)
+        self._n = 0
+
+    def append(self, t, X, U, T, err=np.nan):
+        """
+        Record a sample: time t, state vector X, command vector U and target dictionnary T
+        """
+        if (self._n == len(self._data)):
+            self.reserve(self._n + TRAJECTORY_CHUNK_SIZE)
+        row = self._data[self._n]
+        row['t'] = t
+        row['X'] = X.getArray()
+        row['U'] = (U._u_sail, U._u_rudder, U._u_wang, U._u_wspeed)
+        row['T'] = [T[name] for name in self._targetNames]
+        row['err'] = err
+        self._n += 1
+
+    def reserve(self, capacity):
+        """
+        Grow the preallocated array to hold at least capacity samples
+        """
+        if (capacity <= len(self._data)):
+            return
+        data = np.empty(capacity, dtype=self._dtype)
+        data[:self._n] = self._data[:self._n]
+        self._data = data
+
+    def fromArrays(ts, xs, us, Ts, errs=None):
+        """
+        Return a recorder holding the samples given by:
+            - ts  : times (N)
+            - xs  : packed state vectors (N, STATE_SIZE)
+            - us  : packed command vectors (N, COMMAND_SIZE)
+            - Ts  : dictionnary target name -> values (N)
+            - errs: local error estimates (N), nan if None
+        """
+        recorder = TrajectoryRecorder(list(Ts.keys()), len(ts))
+        n = len(ts)
+        data = recorder._data
+        data['t'][:n] = ts
+        data['X'][:n] = xs
+        data['U'][:n] = us
+        data['T'][:n] = np.array([Ts[name] for name in Ts], dtype=float).reshape(len(Ts), n).T
+        data['err'][:n] = np.nan if (errs is None) else np.array(errs, dtype=float)
+        recorder._n = n
+        return recorder
+
+    def __len__(self):
+        return self._n
+
+    def getData(self):
+        """
+        Return the structured array of the samples (view, no copy)
+        """
+        return self._data[:self._n]
+
+    def getTimes(self):
+        """
+        Return the times of the samples
+        """
+        return self._data['t'][:self._n]
+
+    def getStates(self):
+        """
+        Return the (N, STATE_SIZE) array of the packed state vectors
+        """
+        return self._data['X'][:self._n]
+
+    def getCommands(self):
+        """
+        Return the (N, COMMAND_SIZE) array of the packed command vectors
+        """
+        return self._data['U'][:self._n]
+
+    def getTargetNames(self):
+        """
+        Return the names of the target columns
+        """
+        return self._targetNames
+
+    def getTargets(self, name):
+        """
+        Return the values of the target named name
+        """
+        return self._data['T'][:self._n, self._targetNames.index(name)]
+
+    def getErrors(self):
+        """
+        Return the local error estimates of the integrator
+        """
+        return self._data['err'][:self._n]
+
+    def getState(self, i, solver):
+        """
+        Return the state vector of the sample i (copy)
+        """
+        return StateVector.fromArray(self.getStates()[i].copy(), solver, solver.getBoatCdg())
+
+    def getCommand(self, i):
+        """
+        Return the command vector of the sample i
+        """
+        return CommandVector.fromArray(self.getCommands()[i])
+
+    def getTarget(self, i):
+        """
+        Return the target dictionnary of the sample i
+        """
+        T = self._data['T'][:self._n][i]
+        return {name:T[j] for j, name in enumerate(self._targetNames)}
+
+    def getNbytes(self):
+        """
+        Return the memory used by the preallocated array (bytes)
+        """
+        return self._data.nbytes
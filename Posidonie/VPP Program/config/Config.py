@@ -36,6 +36,8 @@ PATH_REPORT_IMGFOLDER   = projectFolder + "reports" + FOLDER_SEP_CHR + "img" + F
 PATH_GHOSTSCRIPT        = r'C:\Program Files\gs\gs10.05.1\bin\gswin64c'
 PATH_EXPORT_STL         = projectFolder + "export" + FOLDER_SEP_CHR + "goodOrientation.stl"
 PATH_CONFIG_FILE        = projectFolder + "config" + FOLDER_SEP_CHR + "dynamicConfig.json"
+PATH_RESULT_CACHE       = projectFolder + "cache" + FOLDER_SEP_CHR
+PATH_BENCHMARK_BASELINE = projectFolder + "backend" + FOLDER_SEP_CHR + "solver" + FOLDER_SEP_CHR + "benchmarkBaseline.json"
 
 
 COLOR_BG_BOAT_VIEWVER    = "#FFFBE6"
@@ -132,6 +134,53 @@ PHY_RHO_PROTECT_RUDDER = PHY_RHO_RUDDER # Masse volumique matériaux protège sa
 PHY_RHOS_SAIL = 0.082*(80*PHY_RHO_PUR + 4*PHY_RHO_FIBERGLASS)/84 # Masse surfacique de la voile
 
 DEFAULT_DT_SIM = 0.05
+TRAJECTORY_CHUNK_SIZE = 4096 # Number of samples preallocated at once by the trajectory recorder
+PLOT_MAX_SAMPLES      = 1000 # Maximum number of samples of a trajectory displayed by the plot viewver
+CHECKPOINT_PERIOD     = 60   # Time between two checkpoints of a simulation (s, wall clock)
+RESULT_CACHE_MAX_SIZE = 500e6 # Maximum size of the result cache on disk (bytes), the least recently used results are removed
+BENCHMARK_REPEAT      = 5    # Number of runs of a micro benchmark, the best run is kept
+BENCHMARK_SAMPLES     = 7    # Number of calibrated measures of a micro benchmark, the median is compared to the baseline
+BENCHMARK_REGRESSION_THRESHOLD = 1.0 # Relative slow down from the baseline reported as a regression (above the noise of the machine)
+BENCHMARK_LOADS_THRESHOLD = 0.05 # Relative increase of the number of loaded state vectors reported as a regression (deterministic)
+
+# Adaptive integration (Dormand-Prince RK45)
+DEFAULT_RTOL_SIM   = 1e-3
+# Absolute tolerance for each component of the state vector: pos, speed, ang, omega
+DEFAULT_ATOL_SIM   = np.array([1e-3, 1e-3, 1e-3, 1e-4, 1e-4, 1e-4, 1e-4, 1e-4, 1e-4, 1e-4, 1e-4, 1e-4])
+DEFAULT_DT_MAX_SIM = 1.0  # Maximum time step size
+DEFAULT_DT_MIN_SIM = 1e-5 # Minimum time step size
+
+# Linearly implicit integration (Rosenbrock ROS2)
+# Components of the state vector treated implicitly: heave, roll, pitch, the speeds and the
+# angular speeds (the yaw damping and the lateral drag are stiff too). x, y and yaw are explicit
+IMPLICIT_STATE_IDX  = [2, 3, 4, 5, 6, 7, 9, 10, 11]
+JACOBIAN_UPDATE_SIM = 20   # Number of steps between two updates of the jacobian
+JACOBIAN_FD_EPS     = 1e-6 # Relative perturbation for the finite difference jacobian
+
+# Steady state (VPP equilibrium) solver
+STEADY_TOL         = 1e-4 # Tolerance on the acceleration and rotation acceleration (SI)
+STEADY_MAX_ITER    = 50   # Maximum number of Levenberg-Marquardt iterations
+STEADY_LM_LAMBDA   = 1e-3 # Initial damping of the Levenberg-Marquardt method
+STEADY_LM_MAX_TRY  = 10   # Maximum number of damping increases per iteration
+STEADY_MAX_RUDDER  = np.deg2rad(30) # Maximum rudder angle
+
+# Linearization of the EDO
+LINEARIZATION_EPS   = 1e-5 # Relative perturbation for the central difference jacobian
+LINEAR_MODE_MIN_EIG = 1e-6 # Eigenvalues smaller than this are neutral modes (1/s)
+
+# Events of a simulation
+EVENT_TOL_SIM  = 1e-4 # Tolerance on the time of an event (s)
+EVENT_MAX_ITER = 50   # Maximum number of iterations to locate an event
+
+# NACA model
+NACA_TABLE_STEP = np.deg2rad(0.25) # Angle step of the lookup table of the NACA coefficients (rad)
+NACA_CACHE_EXT     = ".cache" # Extension of the cache folder of a processed NACA model (next to its model file)
+NACA_CACHE_VERSION = 3      # Version of the cache format, the caches of another version are rebuilt
+NACA_QUADRATURE       = "gauss" # Quadrature of the forces along the wings: "uniform", "gauss" (Gauss-Legendre) or "simpson"
+NACA_QUADRATURE_NODES = 6       # Number of sections (nodes of the quadrature) of a wing
+
+# Parallel polar generation
+POLAR_MAX_TIME_SIM = 300 # Maximum simulated time for a polar point to converge (s)
 
 
 ROLL_AXIS  = 0 # rotation d'axe x
@@ -160,6 +209,7 @@ CRITICAL_PITCH = np.deg2rad(10) # Critical pitch for dynamic stability analysis
 
 N_HEADINGS_MX = 4
 HEADINGS_MX = np.linspace(150, 40, N_HEADINGS_MX)
+MX_CHECKPOINT_FILE = projectFolder + 'mxCaracteristic.ckpt' # Checkpoint of the complete Mx caracteristic
 COMPLETE_MX_CHARACTERISTIC_FORMS = {}
 
 for i in range(len(HEADINGS_MX)):
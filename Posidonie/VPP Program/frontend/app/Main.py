@@ -1,5 +1,7 @@
 from App import *
 
 
-app = App()
-app.mainloop()
\ No newline at end of file
+if __name__ != '__mp_main__':
+    # Not in the worker processes of the parallel polar engine (spawned on Windows)
+    app = App()
+    app.mainloop()
\ No newline at end of file
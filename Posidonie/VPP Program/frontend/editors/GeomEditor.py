@@ -18,27 +18,8 @@ import backend.solver.Solver as solverLib
 import backend.solver.Navigator as navigatorLib
 import backend.Wind as windLib
 
-defaultGeom = {'sail':sailLib.sailDefaultGeom,
-               'drift':driftLib.driftDefaultGeom,
-               'rudder':rudderLib.rudderDefaultGeom,
-               'solver':solverLib.solverDefaultGeom,
-               'wind':windLib.windDefaultGeom,
-               'navigator':navigatorLib.navigatorDefaultGeom}
-
-def fillMissingGeom(geom):
-    """
-    Fill the missing parameter of a geom dic
-    """
-    for comp in defaultGeom:
-        if (comp not in geom):
-            geom[comp] = copy.deepcopy(defaultGeom[comp])
-        
-        else:
-            # check every sub item
-            for elm in defaultGeom[comp]:
-                if elm not in geom[comp]:
-                    geom[comp][elm] = copy.deepcopy(defaultGeom[comp][elm])
-    return geom
+defaultGeom = solverLib.globalDefaultGeom
+fillMissingGeom = solverLib.fillMissingGeom
 
 class GeomEditor(tk.Frame):
     
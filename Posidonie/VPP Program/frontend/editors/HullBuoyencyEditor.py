@@ -16,6 +16,7 @@ sys.path.insert(0, str(_parentdir))
 sys.path.insert(0, str(_2parentdir))
 
 from utils.Utils import *
+from utils.TkWidgets import *
 from config.Config import *
 from backend.hull.HullBuoyencyCalculator import *
 from frontend.navigation.FctBlock import FctBlockType
@@ -248,8 +249,8 @@ class HullBuoyencyEditor(tk.Frame):
             Set the boat attitude
             """
             X0 = self.app.getBoat().getSolver().getX0()
-            X0._x_ang = np.array([np.deg2rad(floatifyVar(rollCtr)), np.deg2rad(floatifyVar(pitchCtr)), np.deg2rad(floatifyVar(yawCtr))])
-            X0._x_pos = np.array([0, 0, floatifyVar(zCtr)])
+            X0.setAng(np.array([np.deg2rad(floatifyVar(rollCtr)), np.deg2rad(floatifyVar(pitchCtr)), np.deg2rad(floatifyVar(yawCtr))]))
+            X0.setPos(np.array([0, 0, floatifyVar(zCtr)]))
             self.app.getBoatViewver().getRunStopButton().set(False)
             self.app.getBoat().getSolver().loadStateVector(X0)
             # update the forces
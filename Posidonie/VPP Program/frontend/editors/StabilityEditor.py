@@ -16,6 +16,7 @@ sys.path.insert(0, str(_2parentdir))
 from utils.Utils import *
 from config.Config import *
 from backend.naca.NACACalculator import *
+from backend.solver.Linearization import *
 
 
 class StabilityPlot(Enum):
@@ -23,6 +24,7 @@ class StabilityPlot(Enum):
     PITCH = "Pitch"
     DISPLACEMENT = "Displacement"
     CDC = "Center of buoyency"
+    MODES = "Dynamic modes"
 
     def fromName(name):
         for e in StabilityPlot:
@@ -94,6 +96,9 @@ class StabilityEditor(tk.Frame):
             elif (plot == StabilityPlot.CDC):
                 self.ax2.remove()
                 self.drawCdcCurve(ax)
+            elif (plot == StabilityPlot.MODES):
+                self.ax2.remove()
+                self.drawModes(ax)
             else:
                 raise Exception ("Unknow stability plot: "+str(plot))
         except Exception as e:
@@ -123,6 +128,42 @@ class StabilityEditor(tk.Frame):
         self.canvas.draw()
         
 
+    def drawModes(self, ax):
+        """
+        Draw the eigenvalues of the boat linearized at the steady state of the initial target,
+        with the pulsation and the damping ratio of the roll, pitch, yaw and heave modes
+        """
+        solver = self.app.getBoat().getSolver()
+        edoSolver = self.app.getBoat().getEDOSolver()
+        # The steady state and the linearization load their states in the solver: restore the
+        # state of the simulation afterwards
+        X0, U0 = solver.getState(), solver.U.copy()
+        try:
+            X, U, p, info = edoSolver.solveSteadyState(edoSolver.getTarget())
+            if not info['converged']:
+                print("[INFO] - The steady state did not converge (residual = {:.2e})".format(info['residual']))
+            A, B, modes = linearize(solver, X, U)
+        finally:
+            solver.loadStateVector(X0, U0)
+
+        eigs = np.linalg.eigvals(A)
+        ax.plot(eigs.real, eigs.imag, 'kx')
+        for mode in modes:
+            eig = modes[mode]['eig']
+            ax.plot(eig.real, eig.imag, 'o', color=getPlotColor(LINEAR_MODES.index(mode)),
+                    label=r'{}: $\omega$={:.2f}rad/s, $\zeta$={:.2f}'.format(mode, modes[mode]['omega'], modes[mode]['damping']))
+        ax.axvline(0, color='k', linewidth=0.5)
+        ax.axhline(0, color='k', linewidth=0.5)
+        ax.legend()
+        ax.grid()
+
+        ax.set_title("Eigenvalues of the linearized boat (speed: {:.2f}kt)".format(ms2noeud(X.getBoatSpeedNorm())))
+        ax.set_ylabel('Imaginary part [rad/s]')
+        ax.set_xlabel('Real part [1/s]')
+
+        # Actualize the canvas
+        self.canvas.draw()
+
     def drawDisplacementCurve(self, ax, ax2):
         """
         Draw the displacement curve
@@ -1,5 +1,6 @@
 import tkinter as tk
 from tkinter import ttk
+import os
 import matplotlib as mpl
 import matplotlib.pyplot as plt
 from matplotlib.backends.backend_tkagg import FigureCanvasTkAgg, NavigationToolbar2Tk
@@ -15,6 +16,8 @@ sys.path.insert(0, str(_2parentdir))
 from utils.Utils import *
 from config.Config import *
 from frontend.navigation.FctBlock import FctBlockType
+from backend.solver.Checkpoint import *
+from backend.solver.ResultCache import *
 
 
 class MxFigure():
@@ -276,6 +279,7 @@ class MxPlot(tk.Frame):
         ttk.Button(butPane, text="Generate", command=self.generateTestbench).pack(side=tk.LEFT)
         ttk.Button(butPane, text="Gen&Run", command=self.generateAndRun).pack(side=tk.LEFT)
         ttk.Button(butPane, text="Complete Caracteristic", command=self.completeCaracteristic).pack(side=tk.LEFT)
+        ttk.Button(butPane, text="Resume", command=self.resumeCaracteristic).pack(side=tk.LEFT)
         
 
         butPane.pack(fill=tk.X, expand=True)
@@ -294,6 +298,7 @@ class MxPlot(tk.Frame):
         self.canvas.get_tk_widget().pack(fill=tk.BOTH, expand=True)
 
         self.callback = None
+        self.cacheKey = None # Key of the trace of the running testbench in the result cache
 
     def getApp(self):
         return self.app
@@ -307,6 +312,18 @@ class MxPlot(tk.Frame):
         """
         self.app.getBoatViewver().resetSimu()
         self.generateTestbench(auto=auto)
+        self.cacheKey = self.getCacheKey()
+        cached = ResultCache().get(self.cacheKey)
+        if (cached != None):
+            print("[INFO] - Mx trace found in the result cache")
+            self.mxFigure.newTrace(0).load(cached)
+            self.mxFigure.fitTraces()
+            self.canvas.draw()
+            self.cacheKey = None
+            if (auto):
+                self.after(200, self.nextAutoStep)
+            return
+
         self.newTrace()
         self.app.getBoatViewver().setLiveComputation(True)
         self.app.getBoatViewver().getRunStopButton().set(True)
@@ -333,8 +350,48 @@ class MxPlot(tk.Frame):
         Create the complete caracteristic of the boat
         """
         self.completeRun = -1
+        self.app.getBoatViewver().setCheckpoint(MX_CHECKPOINT_FILE, self.getCheckpointDic)
         self.nextAutoStep()
 
+    def getCheckpointDic(self):
+        """
+        Return the data of the complete caracteristic saved with a checkpoint
+        """
+        return {'completeRun':self.completeRun,
+                't0':self.app.getNavController().getTargetT0(),
+                'geomStamp':self.app.getGeomStamp(),
+                'mxFigure':self.mxFigure.getSaveDic()}
+
+    def resumeCaracteristic(self):
+        """
+        Resume the complete caracteristic from its last checkpoint
+        """
+        if not os.path.exists(MX_CHECKPOINT_FILE):
+            tk.messagebox.showerror("Mx Plot Generator", "No checkpoint to resume from")
+            return
+        state, recorder, extra = loadCheckpoint(MX_CHECKPOINT_FILE)
+        if (extra['geomStamp'] != self.app.getGeomStamp()):
+            print("[INFO] - The geometry changed since the checkpoint")
+
+        # Restore the traces and the testbench of the run
+        self.completeRun = extra['completeRun']
+        self.mxFigure.clearPlot()
+        self.mxFigure.load(extra['mxFigure'])
+        self.canvas.draw()
+        self.autoForm(self.completeRun)
+        self.generateTestbench(auto=True)
+        print(f"[INFO] - Resume complete caracteristic run {self.completeRun+1}/{len(COMPLETE_MX_CHARACTERISTIC_FORMS)} at t={state['t']:.1f}s")
+
+        # Restore the simulation (the target state is reset when the functions are sent)
+        self.app.getBoatViewver().setLiveComputation(True)
+        self.app.getNavController().sendTargetFct(t0=extra['t0'])
+        self.app.getBoat().getEDOSolver().loadCheckpointState(state)
+        self.app.getBoat().getSolver().loadStateVector(self.app.getBoat().getEDOSolver().getState())
+        self.app.getBoatViewver().setCrashCallback(self.nextAutoStep)
+        self.app.getBoatViewver().setCheckpoint(MX_CHECKPOINT_FILE, self.getCheckpointDic)
+        self.cacheKey = self.getCacheKey()
+        self.app.getBoatViewver().getRunStopButton().set(True)
+
     def generateTestbench(self, auto=False):
         """
         Generate the testbench
@@ -346,6 +403,7 @@ class MxPlot(tk.Frame):
         cvTime = floatifyVar(self.cvTime)
         heading = floatifyVar(self.heading)
         N = int(floatifyVar(self.N))
+        self.cacheKey = None
 
         wspeeds = np.linspace(wmin, wmax, N)
         teditorSave = {}
@@ -391,22 +449,51 @@ class MxPlot(tk.Frame):
                         'duration':0.01,
                         'value':wspeed})
             
-        # Add the call back at the end if needed
-        if auto:
-            finalCode  = "if app != None:\n"
-            finalCode += "    app.getMxPlot().nextAutoStep()\n"
-            blocks.append({'type':FctBlockType.EXEC.value,
-                            'duration':0.01,
-                            'value':finalCode})
+        # Add the call back at the end
+        finalCode  = "if app != None:\n"
+        finalCode += f"    app.getMxPlot().finishRun({auto})\n"
+        blocks.append({'type':FctBlockType.EXEC.value,
+                        'duration':0.01,
+                        'value':finalCode})
             
         teditorSave['wspeed'] = {'gui':blocks}
 
         # Finally, load it
         self.app.getNavController().load({'editors':teditorSave})
 
+    def getCacheKey(self):
+        """
+        Return the key of the trace of the testbench in the result cache
+        """
+        scenario = {'heading':floatifyVar(self.heading),
+                    'wmin':floatifyVar(self.wmin),
+                    'wmax':floatifyVar(self.wmax),
+                    'tslope':floatifyVar(self.tslope),
+                    'anglecv':floatifyVar(self.anglecv),
+                    'cvTime':floatifyVar(self.cvTime),
+                    'N':int(floatifyVar(self.N))}
+        settings = self.app.getBoat().getEDOSolver().getIntegratorSettings()
+        settings['dt'] = self.app.getBoatViewver().getDtSim()
+        return getCacheKey('mxTrace', getSolverDigest(self.app.getBoat().getSolver()), scenario, settings)
+
+    def finishRun(self, auto=False):
+        """
+        Called at the end of the testbench: save the trace in the result cache,
+        then run the next step of the complete caracteristic if auto
+        """
+        traces = self.mxFigure.getTraces()
+        if (self.cacheKey != None) and (len(traces) > 0):
+            ResultCache().put(self.cacheKey, traces[-1].getSaveDic())
+        self.cacheKey = None
+        if (auto):
+            self.nextAutoStep()
+
     def nextAutoStep(self):
         self.completeRun += 1
         if (self.completeRun >= len(COMPLETE_MX_CHARACTERISTIC_FORMS)):
+            self.app.getBoatViewver().forgetCheckpoint()
+            if os.path.exists(MX_CHECKPOINT_FILE):
+                os.remove(MX_CHECKPOINT_FILE)
             tk.messagebox.showinfo("Mx Plot Generator", f"The caculation of the boat's characteristic is finished!") 
             return
         print(f"[INFO] - Complete caracteristic run {self.completeRun+1}/{len(COMPLETE_MX_CHARACTERISTIC_FORMS)}")
@@ -32,6 +32,7 @@ class NavController(tk.Frame):
     def __init__(self, master, app):
         super().__init__(master)
         self.app = app
+        self.t0 = 0 # Starting time of the target functions sent
         
         T0 = defaultT0.copy()
         self.editPanes = {} # dictionary that save target-editing pane
@@ -285,9 +286,10 @@ class NavController(tk.Frame):
         """
         self.startFromCurrentTime.set(state)
 
-    def sendTargetFct(self):
+    def sendTargetFct(self, t0=None):
         """
         Update the target function of the navigator by the one edited in tis editor
+        If t0 != None, the functions start at t0 (used to resume a simulation)
         """
         # Extract all the functions
         #with open('Tfct.py', 'w') as f:
@@ -296,9 +298,11 @@ class NavController(tk.Frame):
         Tpartials = {tname:lambda X, S, t, fct=NavController.getTargetFunctionFromStr(self.getStrFunctionOfTarget(tname)[0]): fct(self.app, X, S, t) for tname in self.editPanes}
         
         # If requiered, shift the time to start at the simu current time
-        t0 = 0
-        if (self.startFromCurrentTime.get() != 0):
-            t0 = self.app.getBoat().getEDOSolver().getTime()
+        if (t0 == None):
+            t0 = 0
+            if (self.startFromCurrentTime.get() != 0):
+                t0 = self.app.getBoat().getEDOSolver().getTime()
+        self.t0 = t0
 
         def Tfct(X, S, t):
             T = {}
@@ -316,6 +320,12 @@ class NavController(tk.Frame):
         self.app.getBoat().getSolver().getNavigator().setTargetFct(Tfct)
         print("Target function sent")
 
+    def getTargetT0(self):
+        """
+        Return the starting time of the target functions sent
+        """
+        return self.t0
+
     def getApp(self):
         """
         Return the app object
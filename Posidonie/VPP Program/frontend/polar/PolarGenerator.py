@@ -3,6 +3,8 @@ from tkinter import ttk
 import matplotlib as mpl
 import matplotlib.pyplot as plt
 from matplotlib.backends.backend_tkagg import FigureCanvasTkAgg, NavigationToolbar2Tk
+import threading
+import queue
 
 
 import sys
@@ -15,10 +17,34 @@ sys.path.insert(0, str(_2parentdir))
 from utils.Utils import *
 from config.Config import *
 from frontend.navigation.FctBlock import FctBlockType
+from backend.solver.PolarEngine import *
 
 class PolarPlotStrategy(Enum):
     RESET_STEP = "Reseted steps"
     SLOPE      = "Slope"
+    PARALLEL   = "Parallel"
+
+class PolarThread(threading.Thread):
+    def __init__(self, pg, geomSave, modelPath, wspeeds, headings, setup):
+        super().__init__(daemon=True)
+        self.pg = pg
+        self.geomSave = geomSave
+        self.modelPath = modelPath
+        self.wspeeds = wspeeds
+        self.headings = headings
+        self.setup = setup
+        self.results = None
+        self.error = None
+
+    def run(self):
+        try:
+            self.results = computePolar(self.geomSave, self.modelPath, self.wspeeds, self.headings,
+                                        self.setup, progressFct=self.setProgress)
+        except Exception as e:
+            self.error = e
+
+    def setProgress(self, n, N):
+        self.pg.getQueue().put((n, N))
 
 class PolarTrace():
     def __init__(self, axS, axR, wspeed, setup, geomStamp, color='r'):
@@ -139,6 +165,8 @@ class PolarGenerator(tk.Frame):
         self.app = app
         self.recording = False
         self.polarTraces = []
+        self.polarThread = None
+        self.queue = queue.LifoQueue()
 
         boxBorder = tk.Frame(self, background=COLOR_BOX_BORDER, padx=5, pady=5)
         box = tk.Frame(boxBorder, background=COLOR_BOX, padx=5, pady=5)
@@ -190,6 +218,9 @@ class PolarGenerator(tk.Frame):
         ttk.Button(inPane, text="Clear Fig.", command=self.clearPlot).grid(row=3, column=1)
         ttk.Button(inPane, text="Gen&Run", command=self.generateAndRun).grid(row=3, column=2)
 
+        self.statusLabel = ttk.Label(inPane, text="", background=COLOR_BOX)
+        self.statusLabel.grid(row=3, column=3, sticky=tk.NSEW)
+
         inPane.pack(fill=tk.X, expand=True)
         box.pack(fill=tk.X, expand=True)
         boxBorder.pack(fill=tk.X, expand=False, padx=5, pady=5)
@@ -261,6 +292,10 @@ class PolarGenerator(tk.Frame):
 
         headings = np.linspace(45, 170, N)
         blocks = []
+
+        if (self.strategyCb.get() == PolarPlotStrategy.PARALLEL.value):
+            print("The PARALLEL strategy does not use a testbench, use Gen&Run")
+            return
         loop = 0
         teditorSave = {}
             
@@ -372,6 +407,9 @@ class PolarGenerator(tk.Frame):
         """
         Generate and run the polar speed analysis
         """
+        if (self.strategyCb.get() == PolarPlotStrategy.PARALLEL.value):
+            self.runParallel()
+            return
         self.generateTestbench()
         self.app.getBoatViewver().resetSimu()
         self.app.getBoatViewver().setLiveComputation(True)
@@ -380,6 +418,70 @@ class PolarGenerator(tk.Frame):
         self.app.getBoatViewver().getRunStopButton().set(True)
         self.newTrace(floatifyVar(self.windSpeedVar))
 
+    def getWindSpeeds(self):
+        """
+        Return the wind speeds of the wind speed entry (comma separated values)
+        """
+        try:
+            return [float(v) for v in self.windSpeedVar.get().split(',')]
+        except:
+            return [0]
+
+    def runParallel(self):
+        """
+        Compute the polar points of each wind speed in a pool of processes
+        (each point is an independent simulation run until convergence)
+        """
+        if (self.polarThread != None) and self.polarThread.is_alive():
+            return
+        setup = getDefaultPolarSetup()
+        setup['steadyTime'] = floatifyVar(self.steadyTimeVar)
+        setup['steadyAng'] = floatifyVar(self.steadyAngVar)
+        setup['targetError'] = floatifyVar(self.targetErrorVar)
+        headings = np.linspace(45, 170, int(floatifyVar(self.nbHeadingVar)))
+
+        self.statusLabel.config(text="Starting process...")
+        self.queue = queue.LifoQueue()
+        self.polarThread = PolarThread(self,
+                                       self.app.getGeomEditor().getSaveDic()['geom'],
+                                       self.app.getHullBuoyencyEditor().getModelPath(),
+                                       self.getWindSpeeds(),
+                                       headings,
+                                       setup)
+        self.polarThread.start()
+        self.listenThread()
+
+    def listenThread(self):
+        """
+        Display the progress of the parallel computation, and plot the traces once done
+        """
+        if (self.polarThread == None):
+            return
+        if self.polarThread.is_alive():
+            self.after(500, self.listenThread)
+            try:
+                n, N = self.queue.get(False)
+                self.statusLabel.config(text=f"{n}/{N} points")
+            except queue.Empty:
+                pass
+            return
+
+        if (self.polarThread.error != None):
+            print("[ERROR] - Parallel polar failed:", self.polarThread.error)
+            self.statusLabel.config(text="Failed.")
+        else:
+            for traceSave in assemblePolarTraces(self.polarThread.results, self.getSetupDic(), self.app.getGeomStamp()):
+                self.newTrace().load(traceSave)
+            self.fitTrace()
+            self.statusLabel.config(text="Done.")
+        self.polarThread = None
+
+    def getQueue(self):
+        """
+        Return the queue of the parallel computation progress
+        """
+        return self.queue
+
     def getSaveDic(self):
         """
         Return the save dic of this component
@@ -3,6 +3,7 @@ from pylatex.utils import italic, NoEscape, bold
 from PIL import Image, EpsImagePlugin
 import datetime
 import matplotlib.pyplot as plt
+import tkinter as tk
 
 import sys
 import pathlib
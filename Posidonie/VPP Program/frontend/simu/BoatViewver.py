@@ -14,6 +14,7 @@ sys.path.insert(0, str(_parentdir))
 sys.path.insert(0, str(_2parentdir))
 
 from utils.Utils import *
+from utils.TkWidgets import *
 from config.Config import *
 from backend.solver.Run import *
 from frontend.simu.PlotViewver import *
@@ -159,13 +160,16 @@ class BoatViewver(tk.Frame):
 
         try:
             self.results.load('simu.json', self.app.getBoat().getSolver())
-            self.plotViewver.load()
+            self.plotViewver.load(self.app.getBoat().getSolver())
         except:
             print("[ERROR] Fail to read the result file")
 
         self.simuSourceChanged()
 
         self.crashCallback = None
+        self.checkpointPath = None
+        self.checkpointFct = None
+        self.checkpointTime = time.time()
 
         self.canvas.bind_all("<Key>", self.keyEvent)
 
@@ -221,7 +225,7 @@ class BoatViewver(tk.Frame):
             self.results.setBoatState(self.app.getBoat().getSolver())
             self.results.setAnim(self.app.getBoat().getSolver(), self.runStopButton.get())
             if (self.plotViewver != None):
-                self.plotViewver.load()
+                self.plotViewver.load(self.app.getBoat().getSolver())
         else:
             # Live computation
             # We load the state vector of the live computation
@@ -281,6 +285,12 @@ class BoatViewver(tk.Frame):
 
         self.updateSpeedLabel()
 
+    def getDtSim(self):
+        """
+        Return the time step of the live computation
+        """
+        return self.dtsim
+
     def updateSpeedLabel(self):
         if self.dtLabel == None:
             return
@@ -616,6 +626,7 @@ class BoatViewver(tk.Frame):
         if self.liveComputation.get() == 1:
             try:
                 self.app.getBoat().getEDOSolver().step(self.dtsim)
+                self.checkpoint()
             except ResetSimuException:
                 self.resetSimu(resetTargetFct=False)
                 self.forgetCrashCallback()
@@ -946,4 +957,32 @@ class BoatViewver(tk.Frame):
         """
         Forget the crash callback
         """
-        self.crashCallback = None
\ No newline at end of file
+        self.crashCallback = None
+
+    def setCheckpoint(self, path, fct=None):
+        """
+        Checkpoint the live computation in the file path every CHECKPOINT_PERIOD seconds.
+        fct returns the extra data saved with the checkpoint (dictionnary)
+        """
+        self.checkpointPath = path
+        self.checkpointFct = fct
+        self.checkpointTime = time.time()
+
+    def forgetCheckpoint(self):
+        """
+        Stop the checkpoints of the live computation
+        """
+        self.checkpointPath = None
+        self.checkpointFct = None
+
+    def checkpoint(self):
+        """
+        Save a checkpoint of the live computation if the period is elapsed
+        """
+        if (self.checkpointPath == None) or (time.time() - self.checkpointTime < CHECKPOINT_PERIOD):
+            return
+        extra = None
+        if (self.checkpointFct != None):
+            extra = self.checkpointFct()
+        saveCheckpoint(self.checkpointPath, self.app.getBoat().getEDOSolver().getCheckpointState(), None, extra)
+        self.checkpointTime = time.time()
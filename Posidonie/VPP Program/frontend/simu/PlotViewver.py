@@ -210,6 +210,7 @@ class LiveTrace():
 class PlotViewver(tk.Frame):
     def __init__(self, master, result):
         super().__init__(master)
+        self.result = result
 
         # Create a notebook for the different type of curves
         noteBook = ttk.Notebook(self)
@@ -300,6 +301,33 @@ class PlotViewver(tk.Frame):
         self.cinematiclplot.plot(solver, t, X, U, T, disp)
         self.mechaniclplot.plot(solver, t, X, U, T, disp)
 
+    def load(self, solver):
+        """
+        Plot the trajectory of the result (Run object), with at most
+        PLOT_MAX_SAMPLES samples
+        """
+        recorder = self.result.getRecorder()
+        if (recorder == None) or (len(recorder) == 0):
+            return
+        self.cinematiclplot.reset()
+        self.mechaniclplot.reset()
+
+        ts = recorder.getTimes()
+        for i in range(0, len(recorder), max(1, len(recorder)//PLOT_MAX_SAMPLES)):
+            X = recorder.getState(i, solver)
+            U = recorder.getCommand(i)
+            try:
+                # Compute the forces of the mechanical plots
+                solver.F(X, U)
+            except Exception as e:
+                print("[ERROR] - Fail to compute the sample at t={:.2f}s: {}".format(ts[i], e))
+                break
+            self.plot(solver, ts[i], X, U, recorder.getTarget(i), False)
+
+        # Restore the state of the playback
+        self.result.setBoatState(solver)
+        self.forceUpdateCurves()
+
     def updateCurves(self):
         """
         Update the display of the curves
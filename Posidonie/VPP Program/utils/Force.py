@@ -76,39 +76,13 @@ def getRefFromBase(base):
     raise Exception('Unknow base: '+base.value)
 
 def getPassageMatrix(solver, from_, to):
-    if (from_ == Base.BOAT) and (to == Base.SEA):
-        return solver.getBoatToSeaMatrix()
-    
-    if (from_ == Base.SEA) and (to == Base.BOAT):
-        return solver.getSeaToBoatMatrix()
-    
-    if (from_ == Base.SAIL):
-        if (to != Base.BOAT):
-            return np.matmul(getPassageMatrix(solver, Base.BOAT, to), solver.getSailToBoatMatrix())
-        else:
-            return solver.getSailToBoatMatrix()
-        
-    if (to == Base.SAIL):
-        if (from_ == Base.BOAT):
-            return solver.getBoatToSailMatrix()
-        elif (from_ == Base.SEA):
-            return solver.getSeaToSailMatrix()
-        else:
-            return np.matmul(solver.getBoatToSailMatrix(), getPassageMatrix(solver, from_, Base.BOAT))
-        
-    if (from_ == Base.RUDDER):
-        if (to != Base.BOAT):
-            return np.matmul(getPassageMatrix(solver, Base.BOAT, to), solver.getRudderToBoatMatrix())
-        else:
-            return solver.getRudderToBoatMatrix()
-        
-    if (to == Base.RUDDER):
-        if (from_ != Base.BOAT):
-            return np.matmul(solver.getBoatToRudderMatrix(), getPassageMatrix(solver, from_, Base.BOAT))
-        else:
-            return solver.getBoatToRudderMatrix()
-        
-    raise Exception("Unknow basis passage matrix: "+from_.value+", "+to.value)
+    """
+    Return the passing matrix from the basis from_ to the basis to (see Solver.computePassingMatrix)
+    """
+    try:
+        return solver.getPassingMatrix(from_, to)
+    except KeyError:
+        raise Exception("Unknow basis passage matrix: "+from_.value+", "+to.value)
     
 def getPointInBoat(solver, point):
     """
@@ -190,15 +164,19 @@ def getPointInRef(solver, pt, to):
 
 
 class Point():
+    # Last conversion (see valueIn), valid while the step of the solver is _convStep
+    __slots__ = ('_pt', '_ref', '_solver', '_convRef', '_convPt', '_convStep')
+
     def __init__(self, solver, pt, ref):
         """
         Point class:
-            - pt : coordinates
+            - pt : coordinates (not copied)
             - ref: referential of the point
         """
-        self._pt = np.array(pt)
+        self._pt = pt
         self._ref = ref
         self._solver = solver
+        self._convStep = None
 
         if not isinstance(pt, np.ndarray):
             raise TypeError("<pt> field of Point should be a numpy array")
@@ -220,14 +198,24 @@ class Point():
         Return this point expressed in another referential
         """
         if (ref != self._ref):
-            return getPointInRef(self._solver, self, ref)
+            return Point(self._solver, self.valueIn(ref), ref)
         return self
         
     def valueIn(self, ref):
         """
-        Return a numpy array of this point in the referential ref
+        Return a numpy array of this point in the referential ref.
+        The last conversion is memoized until the next step of the solver
         """
-        return self.inRef(ref)._pt
+        if (ref == self._ref):
+            return self._pt
+        step = self._solver.getStep()
+        if (self._convStep == step) and (self._convRef == ref):
+            return self._convPt
+        pt = getPointInRef(self._solver, self, ref)._pt
+        self._convRef = ref
+        self._convPt = pt
+        self._convStep = step
+        return pt
         
     def __add__(self, b):
         """
@@ -314,16 +302,20 @@ class Point():
 
 
 class Vector():
+    # Last conversion (see valueIn), valid while the step of the solver is _convStep
+    __slots__ = ('_vec', '_base', '_solver', '_convBase', '_convVec', '_convStep')
+
     def __init__(self, solver, vec, base):
         """
         Vecetor class:
             - solver : solver object (used to find the passage matrix)
-            - vec    : coordinates
+            - vec    : coordinates (arrays are not copied)
             - ref    : base of the vector
         """
-        self._vec = np.array(vec)
+        self._vec = vec if isinstance(vec, np.ndarray) else np.array(vec)
         self._base = base
         self._solver = solver
+        self._convStep = None
 
         if not isinstance(base, Base):
             raise TypeError("<base> field of Vector should be a Base object")
@@ -339,17 +331,25 @@ class Vector():
         Return this vector expressed in another base
         """
         if (base != self._base):
-            M = getPassageMatrix(self._solver, self._base, base)
-            newvec = M.dot(self._vec)
-            return Vector(self._solver, newvec, base)
+            return Vector(self._solver, self.valueIn(base), base)
         
         return self
         
     def valueIn(self, base):
         """
-        Return a numpy array of this vector in the base <base>
+        Return a numpy array of this vector in the base <base>.
+        The last conversion is memoized until the next step of the solver
         """
-        return self.inBase(base)._vec
+        if (base == self._base):
+            return self._vec
+        step = self._solver.getStep()
+        if (self._convStep == step) and (self._convBase == base):
+            return self._convVec
+        vec = getPassageMatrix(self._solver, self._base, base).dot(self._vec)
+        self._convBase = base
+        self._convVec = vec
+        self._convStep = step
+        return vec
     
     def __add__(self, b):
         """
@@ -391,6 +391,13 @@ class Vector():
     def getNorm(self):
         return np.linalg.norm(self._vec)
     
+    def setValue(self, vec):
+        """
+        Set the coordinates of this vector in place (in its base)
+        """
+        self._vec[:] = vec
+        self._convStep = None
+    
     def copy(self):
         """
         Return a copy of this object
@@ -436,6 +443,8 @@ class Vector():
 
 
 class Moment():
+    __slots__ = ('_vec',)
+
     def __init__(self, vec):
         """
         Moment class
@@ -491,6 +500,8 @@ class Moment():
 
 
 class Force():
+    __slots__ = ('_force', '_point', '_originMoment')
+
     def __init__(self, force, pointOrMoment):
         """
         Force class:
@@ -541,6 +552,154 @@ class Force():
         return "Force: " + self._force.__str__() + "\nMoment: " + self._originMoment.__str__()
 
 
+# Index of each base in the arrays of a Wrench
+WRENCH_BASES = list(Base)
+WRENCH_BASE_INDEX = {base:i for i, base in enumerate(WRENCH_BASES)}
+
+class Wrench():
+    __slots__ = ('_solver', '_force', '_moment', '_used')
+
+    def __init__(self, solver):
+        """
+        Mutable sum of forces: the force and the moment at the origin of the BOAT referential.
+        The forces are added in place, in the base they are expressed in, and each base
+        is converted once when the sum is read
+        """
+        self._solver = solver
+        self._force = np.zeros((len(WRENCH_BASES), 3))
+        self._moment = np.zeros((len(WRENCH_BASES), 3))
+        self._used = np.zeros(len(WRENCH_BASES), dtype=bool)
+
+    def reset(self):
+        """
+        Set the sum to zero
+        """
+        self._force.fill(0)
+        self._moment.fill(0)
+        self._used.fill(False)
+        return self
+
+    def add(self, force):
+        """
+        Add a Force to the sum
+        """
+        vec = force._force
+        i = WRENCH_BASE_INDEX[vec._base]
+        self._force[i] += vec._vec
+        self._used[i] = True
+
+        vec = force._originMoment._vec
+        i = WRENCH_BASE_INDEX[vec._base]
+        self._moment[i] += vec._vec
+        self._used[i] = True
+        return self
+
+    def addWrench(self, wrench):
+        """
+        Add another Wrench to the sum
+        """
+        self._force += wrench._force
+        self._moment += wrench._moment
+        self._used |= wrench._used
+        return self
+
+    def sumIn(self, values, base):
+        """
+        Return the sum of the partial sums <values> (one per base) expressed in the base <base>
+        """
+        res = np.zeros(3)
+        for i in np.flatnonzero(self._used):
+            if (WRENCH_BASES[i] == base):
+                res += values[i]
+            else:
+                res += getPassageMatrix(self._solver, WRENCH_BASES[i], base).dot(values[i])
+        return res
+
+    def getForce(self, base):
+        """
+        Return the force (array) in the base <base>
+        """
+        return self.sumIn(self._force, base)
+
+    def getMoment(self, base):
+        """
+        Return the moment at the origin (array) in the base <base>
+        """
+        return self.sumIn(self._moment, base)
+
+    def toForce(self, base=Base.BOAT):
+        """
+        Return the sum as a Force object, expressed in the base <base>
+        """
+        return Force(Vector(self._solver, self.getForce(base), base),
+                     Moment(Vector(self._solver, self.getMoment(base), base)))
+
+
+class Wrenches():
+    __slots__ = ('_n', '_force', '_moment')
+
+    def __init__(self, n):
+        """
+        Sums of forces of n boats (see Wrench): the forces and the moments at the origin of the
+        BOAT referential, added in the base they are expressed in. Each base is converted
+        once when the sums are read, with the passing matrices of each boat
+        """
+        self._n = n
+        self._force = {}
+        self._moment = {}
+
+    def addArrays(self, sums, base, values):
+        """
+        Add the values (n, 3) or (3,) in the base <base> to the partial sums <sums>
+        """
+        if (base in sums):
+            sums[base] = sums[base] + values
+        else:
+            sums[base] = np.broadcast_to(values, (self._n, 3))
+
+    def add(self, force):
+        """
+        Add a Force (the same for every boat) to the sums
+        """
+        self.addArrays(self._force, force._force._base, force._force._vec)
+        self.addArrays(self._moment, force._originMoment._vec._base, force._originMoment._vec._vec)
+        return self
+
+    def addForces(self, forces, forceBase, moments, momentBase):
+        """
+        Add the forces (n, 3) in the base forceBase and their moments at the origin (n, 3)
+        in the base momentBase to the sums
+        """
+        self.addArrays(self._force, forceBase, forces)
+        self.addArrays(self._moment, momentBase, moments)
+        return self
+
+    def sumIn(self, sums, base, passingMatrices):
+        """
+        Return the sums (n, 3) expressed in the base <base>. passingMatrices(from_, to)
+        returns the (n, 3, 3) passing matrices of the boats
+        """
+        res = np.zeros((self._n, 3))
+        for b in sums:
+            if (b == base):
+                res = res + sums[b]
+            else:
+                res = res + np.einsum('nij,nj->ni', passingMatrices(b, base), sums[b])
+        return res
+
+    def getForces(self, base, passingMatrices):
+        """
+        Return the forces (n, 3) in the base <base>
+        """
+        return self.sumIn(self._force, base, passingMatrices)
+
+    def getMoments(self, base, passingMatrices):
+        """
+        Return the moments at the origin (n, 3) in the base <base>
+        """
+        return self.sumIn(self._moment, base, passingMatrices)
+
+
 class Matrix():
     def __init__(self, solver, matrix, base):
         """
@@ -788,6 +947,13 @@ class PointSpeed():
 
         return PointSpeed(A, V_A_R1_R0-V_A_R2_R0, R1, R2)
     
+    def getVelocities(solver, pts, ref, R1, R2, base):
+        """
+        Return V(A in R1 / R2) of the N points A of coordinates pts (N, 3) in the
+        referential ref, as an array (N, 3) expressed in the base <base>
+        """
+        return solver.getVelocityField(R1).atArray(pts, ref, base) - solver.getVelocityField(R2).atArray(pts, ref, base)
+    
     def __add__(self, b):
         """
         Add Two Points Speed
@@ -934,7 +1100,12 @@ class AccelerationField():
         """
         The class AccelerationField save the field of acceleration
         """
-        
+        self.update(acceleration, rotSpeed)
+
+    def update(self, acceleration, rotSpeed):
+        """
+        Update the acceleration of the point and the angular speed of the field
+        """
         if not isinstance(rotSpeed, AngularSpeed):
             raise TypeError("<rotSpeed> field of AccelerationField should be a AngularSpeed object")
         
@@ -1022,4 +1193,20 @@ class VelocityField():
         # V(B, R/R0) = V(A, R/R0) + (A - B)^Omega(R/R0)
         speed = self._pointSpeed.getSpeed() - (self._pointSpeed.getPt() - B).vectorial(self._omega.getOmega())
         return PointSpeed(B, speed, self._R, Referential.SEA)
+    
+    def atArray(self, pts, ref, base):
+        """
+        Return - V(B in R / Sea) of the N points B of coordinates pts (N, 3) in the
+        referential ref, as an array (N, 3) expressed in the base <base>
+        """
+        A = self._pointSpeed.getPt()
+        speed = self._pointSpeed.getSpeed()
+        solver = speed.getSolver()
+        if (ref != A.getRef()):
+            pts = np.array([Point(solver, pt, ref).valueIn(A.getRef()) for pt in pts])
+        # Same variation as at(), in the base of the referential of A
+        baseA = getBaseFomRef(A.getRef())
+        omega = self._omega.getOmega().valueIn(baseA)
+        dif = np.cross(A.getPt() - pts, omega)
+        return speed.valueIn(base) - dif.dot(getPassageMatrix(solver, baseA, base).T)
     
\ No newline at end of file
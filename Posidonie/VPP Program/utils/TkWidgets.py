@@ -0,0 +1,68 @@
+import tkinter as tk
+from tkinter import ttk
+
+import sys
+import pathlib
+_parentdir = pathlib.Path(__file__).parent.parent.resolve()
+_2parentdir = pathlib.Path(__file__).parent.parent.parent.resolve()
+sys.path.insert(0, str(_parentdir))
+sys.path.insert(0, str(_2parentdir))
+
+from utils.Utils import *
+from config.Config import *
+
+class RunStopButton(ttk.Button):
+    def __init__(self, master, app, command=None):
+        super().__init__(master, command=self.toggle)
+        self.command = command
+        self.app = app
+        self.set(False)
+
+    def toggle(self):
+        """
+        Switch between play/stop
+        """
+        self.set(not self.get())
+
+    def get(self):
+        """
+        Get the state of the button
+        """
+        return self.play
+    
+    def set(self, state):
+        """
+        Set the state of the button
+        """
+        self.play = state
+        if (self.play):
+            self.config(image=self.app.getAssets().get('stop'))
+        else:
+            self.config(image=self.app.getAssets().get('run'))
+        if (self.command != None):
+            self.command(self.play)
+
+class TkValid(ttk.Label):
+    """
+    Display if a result is valid or not (need to be updated)
+    """
+    def __init__(self, master, app, background=''):
+        super().__init__(master, background=background)
+        self.app = app
+        self.set(True)
+
+    def get(self):
+        """
+        Get the state of the validity
+        """
+        return self.state
+    
+    def set(self, state):
+        """
+        Set the state of the validity
+        """
+        self.state = state
+        if (self.state):
+            self.config(image=self.app.getAssets().get('valid'))
+        else:
+            self.config(image=self.app.getAssets().get('invalid'))
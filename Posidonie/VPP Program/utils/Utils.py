@@ -1,9 +1,8 @@
-import tkinter as tk
-from tkinter import ttk
 from enum import Enum
 import numpy as np
-from PIL import ImageColor
 import json
+import hashlib
+from types import MappingProxyType
 
 import sys
 import pathlib
@@ -16,63 +15,7 @@ from config.Config import *
 from utils.Force import *
 from backend.solver.StateVector import *
 from backend.solver.CommandVector import *
-
-class RunStopButton(ttk.Button):
-    def __init__(self, master, app, command=None):
-        super().__init__(master, command=self.toggle)
-        self.command = command
-        self.app = app
-        self.set(False)
-
-    def toggle(self):
-        """
-        Switch between play/stop
-        """
-        self.set(not self.get())
-
-    def get(self):
-        """
-        Get the state of the button
-        """
-        return self.play
-    
-    def set(self, state):
-        """
-        Set the state of the button
-        """
-        self.play = state
-        if (self.play):
-            self.config(image=self.app.getAssets().get('stop'))
-        else:
-            self.config(image=self.app.getAssets().get('run'))
-        if (self.command != None):
-            self.command(self.play)
-
-class TkValid(ttk.Label):
-    """
-    Display if a result is valid or not (need to be updated)
-    """
-    def __init__(self, master, app, background=''):
-        super().__init__(master, background=background)
-        self.app = app
-        self.set(True)
-
-    def get(self):
-        """
-        Get the state of the validity
-        """
-        return self.state
-    
-    def set(self, state):
-        """
-        Set the state of the validity
-        """
-        self.state = state
-        if (self.state):
-            self.config(image=self.app.getAssets().get('valid'))
-        else:
-            self.config(image=self.app.getAssets().get('invalid'))
-
+from backend.solver.TrajectoryRecorder import *
 
 class Units(Enum):
     m = 'm'
@@ -128,12 +71,31 @@ class Units(Enum):
 
         raise Exception(f"Unhandeled unit conversion: {baseunit.value} -> {finalunit.value}")
 
+class GeomSnapshot():
+    """
+    Values in the SI system of a geometry dictionnary {name:{'value', 'unit', ...}}, compiled
+    when the geometry is updated so that reading a parameter is a plain dictionnary lookup
+    """
+    __slots__ = ('values', 'version')
+
+    def __init__(self, geom, previous=None):
+        """
+        Compile geom. <previous> is the snapshot of the former geometry (None: first geometry)
+        """
+        self.values = MappingProxyType({name:Units.toSI(geom[name]['value'], geom[name]['unit']) for name in geom})
+        # Number of updates of the geometry
+        self.version = 0 if (previous == None) else previous.version + 1
 
 class Dir(Enum):
     X = "x"
     Y = "y"
     Z = "z"
 
+class Quadrature(Enum):
+    UNIFORM = "uniform" # Equally spaced samples, each weighted by the distance to the previous one
+    GAUSS   = "gauss"   # Gauss-Legendre
+    SIMPSON = "simpson" # Composite Simpson
+
 class SimWarning(Enum):
     OUTOFBOUND = "OUTOFBOUND"
 
@@ -142,6 +104,7 @@ def npArrayToRGB(array):
     return "#%02x%02x%02x" % rgb
 
 def hexTonpArray(hex):
+    from PIL import ImageColor
     return np.array(ImageColor.getcolor(hex, "RGB"))
 
 def gradientColor(col1, col2, i):
@@ -192,6 +155,33 @@ def getMatRot(dir, ang):
                       [ux*uz*(1-c)-uy*s,uy*uz*(1-c)+ux*s,(1-c)*uz**2+c]])
     return M
 
+def getMatRots(dir, angs):
+    """
+    Return the rotation matrices (N, 3, 3) associed to N angles around an axis dir
+    """
+    c = np.cos(angs)
+    s = np.sin(angs)
+    M = np.zeros((len(angs), 3, 3))
+    if (dir == Dir.X):
+        M[:,0,0] = 1
+        M[:,1,1] = c
+        M[:,1,2] = s
+        M[:,2,1] = -s
+        M[:,2,2] = c
+    elif (dir == Dir.Y):
+        M[:,0,0] = c
+        M[:,0,2] = -s
+        M[:,1,1] = 1
+        M[:,2,0] = s
+        M[:,2,2] = c
+    else:
+        M[:,0,0] = c
+        M[:,0,1] = s
+        M[:,1,0] = -s
+        M[:,1,1] = c
+        M[:,2,2] = 1
+    return M
+
 def rotation(pts, xr, dir, ang):
     """
     Apply a rotation to the list <pts> of axis (<xr>, <dir>) 
@@ -382,6 +372,71 @@ def interpolDXXV(dic, V1, V2, V):
     """
     return interpolYYXXV(dic[V1], dic[V2], V1, V2, V)
 
+def getMonotoneCubicSlopes(x, y):
+    """
+    Return the slopes of the monotone cubic (Fritsch-Carlson) interpolation of the
+    points (x, y). y is a (n, k) array of k curves
+    """
+    h = np.diff(x)[:,None]
+    delta = np.diff(y, axis=0)/h
+    m = np.zeros(y.shape)
+
+    # Interior points: weighted harmonic mean of the secants, 0 at the extrema
+    w1 = 2*h[1:] + h[:-1]
+    w2 = h[1:] + 2*h[:-1]
+    same = delta[:-1]*delta[1:] > 0
+    with np.errstate(divide='ignore', invalid='ignore'):
+        m[1:-1] = np.where(same, (w1 + w2)/(w1/delta[:-1] + w2/delta[1:]), 0)
+
+    # End points: three point formula, limited to keep the monotonicity
+    for e, d0, d1, h0, h1 in [(0, delta[0], delta[1], h[0], h[1]), (-1, delta[-1], delta[-2], h[-1], h[-2])]:
+        me = ((2*h0 + h1)*d0 - h0*d1)/(h0 + h1)
+        me = np.where(np.sign(me) != np.sign(d0), 0, me)
+        m[e] = np.where((np.sign(d0) != np.sign(d1)) & (np.abs(me) > 3*np.abs(d0)), 3*d0, me)
+    return m
+
+def monotoneCubicInterpolation(x, y, xi):
+    """
+    Return the monotone cubic interpolation at xi of the points (x, y), x growing.
+    y is a (n, k) array of k curves, the result is a (len(xi), k) array
+    """
+    x = np.asarray(x, dtype=float)
+    y = np.asarray(y, dtype=float)
+    m = getMonotoneCubicSlopes(x, y)
+    idx = np.clip(np.searchsorted(x, xi) - 1, 0, len(x) - 2)
+    h = (x[idx + 1] - x[idx])[:,None]
+    t = ((xi - x[idx])[:,None])/h
+    # Cubic Hermite basis
+    return (2*t**3 - 3*t**2 + 1)*y[idx] + (t**3 - 2*t**2 + t)*h*m[idx] + \
+           (-2*t**3 + 3*t**2)*y[idx + 1] + (t**3 - t**2)*h*m[idx + 1]
+
+def getQuadrature(method, n):
+    """
+    Return the nodes and weights (arrays of n values) of the quadrature <method> on [0, 1]:
+        integral of f on [0, 1] ~ sum(weights*f(nodes))
+    The composite Simpson rule needs an odd number of nodes, n is rounded up
+    """
+    if (n < 2):
+        raise Exception("A quadrature needs at least 2 nodes, not {}".format(n))
+    if (method == Quadrature.UNIFORM):
+        nodes = np.linspace(0, 1, n)
+        weights = np.diff(nodes, prepend=0)
+    elif (method == Quadrature.GAUSS):
+        nodes, weights = np.polynomial.legendre.leggauss(n)
+        # From [-1, 1] to [0, 1]
+        nodes = (nodes + 1)/2
+        weights = weights/2
+    elif (method == Quadrature.SIMPSON):
+        n += 1 - n%2
+        nodes = np.linspace(0, 1, n)
+        weights = np.ones(n)
+        weights[1:-1:2] = 4
+        weights[2:-1:2] = 2
+        weights *= 1/(3*(n - 1))
+    else:
+        raise Exception("Unknow quadrature: " + str(method))
+    return nodes, weights
+
 def getFraming(dic, value):
     """
     Return the previous and following key that closly frame value
@@ -471,24 +526,33 @@ def hashFct(str):
         hash = (hash*281 ^ ord(ch)*997) & 0xFFFFFFFF
     return hash
 
+def getFileDigest(path):
+    """
+    Return the sha256 digest of the content of a file
+    """
+    digest = hashlib.sha256()
+    with open(path, 'rb') as f:
+        for chunk in iter(lambda: f.read(1 << 20), b''):
+            digest.update(chunk)
+    return digest.hexdigest()
+
 
-def saveSimuFile(path, ts, Xs, Us, Ts, solver):
+def saveSimuFile(path, recorder, solver):
     """
-    Save the result of a simulation into a simulation file
+    Save the trajectory of a simulation (TrajectoryRecorder) into a simulation file
     """
     with open(path, 'w') as f:
-        f.write(json.dumps({'ts':ts.tolist(),
-                         'Xs':[X.toJSON() for X in Xs],
-                         'Us':[U.toJSON() for U in Us],
-                         'Ts':Ts.tolist(),
+        f.write(json.dumps({'format':'packed',
+                         'ts':recorder.getTimes().tolist(),
+                         'Xs':recorder.getStates().tolist(),
+                         'Us':recorder.getCommands().tolist(),
+                         'Ts':{name:recorder.getTargets(name).tolist() for name in recorder.getTargetNames()},
+                         'errs':recorder.getErrors().tolist(),
                          'globalGeom':serializeGeom(solver.getGlobalGeom())}))
 
 def loadSimuFile(path, solver):
     """
-    Load a simulation file and output three arrays:
-        - ts: time
-        - Xs: state vectors
-        - Us: command vectors
+    Load a simulation file and return its trajectory (TrajectoryRecorder)
     """
     with open(path, 'r') as f:
         data = json.load(f)
@@ -496,20 +560,20 @@ def loadSimuFile(path, solver):
     # Update the geometry of the boat
     solver.updateGlobalGeom(deserializeGeom(data['globalGeom']))
 
-    ts = data['ts']
-    Xs = []
-    Us = []
-    Ts = data['Ts']
+    if ('format' in data) and (data['format'] == 'packed'):
+        return TrajectoryRecorder.fromArrays(data['ts'], data['Xs'], data['Us'], data['Ts'], data['errs'])
 
+    # Previous format: one JSON dictionnary per state vector and command vector
+    ts = data['ts']
+    xs = np.empty((len(ts), STATE_SIZE))
+    us = np.empty((len(ts), COMMAND_SIZE))
     for i in range(len(ts)):
-        Xs.append(StateVector.fromJSON(data['Xs'][i], solver))
-        Us.append(CommandVector.fromJSON(data['Us'][i]))
-
-        progress = 100*(i+1)/len(ts)
-        if (int(progress)%5 == 0) and (int(100*i/len(ts))%5 != 0):
-            print("{:.1f}%".format(progress))
-
-    return np.array(ts), np.array(Xs), np.array(Us), np.array(Ts)
+        xs[i] = StateVector.fromJSON(data['Xs'][i], solver).getArray()
+        us[i] = CommandVector.fromJSON(data['Us'][i]).toArray()
+    Ts = {}
+    if (len(data['Ts']) > 0):
+        Ts = {name:[T[name] for T in data['Ts']] for name in data['Ts'][0]}
+    return TrajectoryRecorder.fromArrays(ts, xs, us, Ts)
 
 
 def floatifyVar(var):